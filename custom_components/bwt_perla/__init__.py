@@ -1,27 +1,63 @@
 """The BWT Perla integration."""
 
+import asyncio
 import logging
 
 from bwt_api.api import BwtApi, BwtSilkApi, BwtSmartDosApi
 from bwt_api.bwt import BwtModel
-from bwt_api.exception import BwtException
+from bwt_api.exception import BwtException, WrongCodeException
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform, CONF_CODE, CONF_HOST
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
 from homeassistant.helpers.entity_registry import async_migrate_entries
-from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import (
+    config_validation as cv,
+    entity_registry as er,
+    issue_registry as ir,
+)
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import (
+    CONF_CAPTURE_TRACE,
+    CONF_SITE,
+    DATA_SETUP_LOCK,
+    DATA_SITE,
+    DEFAULT_CAPTURE_TRACE,
+    DOMAIN,
+)
+from .coordinator import BwtCoordinator, async_remove_entry_data
+from .fingerprint import same_device
+from .fleet import SiteAggregate
+from .trace import TracingApi
+from .export import ConsumptionView
+from . import services, websocket
 
 _LOGGER = logging.getLogger(__name__)
-PLATFORMS: list[Platform] = [Platform.SENSOR]
+PLATFORMS: list[Platform] = [Platform.BINARY_SENSOR, Platform.SENSOR]
+SITE_PLATFORMS: list[Platform] = [Platform.SENSOR]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the parts shared by all entries."""
+    websocket.async_setup(hass)
+    services.async_setup(hass)
+    hass.http.register_view(ConsumptionView)
+    hass.data[DATA_SITE] = SiteAggregate()
+    hass.data[DATA_SETUP_LOCK] = asyncio.Lock()
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up BWT Perla from a config entry."""
 
+    if entry.data.get(CONF_SITE):
+        # The totals of the devices, set up on their own
+        await hass.config_entries.async_forward_entry_setups(entry, SITE_PLATFORMS)
+        return True
+
     hass.data.setdefault(DOMAIN, {})
     # Backwards compatibility: older config entries may not have a `model` key.
     model_value = entry.data.get("model")
@@ -56,64 +92,175 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         await api.close()
         raise ConfigEntryNotReady from e
 
-    hass.data[DOMAIN][entry.entry_id] = api
+    if entry.options.get(CONF_CAPTURE_TRACE, DEFAULT_CAPTURE_TRACE):
+        path = hass.config.path(f"{DOMAIN}_trace_{entry.entry_id}.jsonl")
+        _LOGGER.info("Capturing the traffic of %s to %s", entry.data["host"], path)
+        api = TracingApi(api, path, hass.async_add_executor_job)
+
+    coordinator = BwtCoordinator(hass, api, BwtModel[model_value], entry)
+    # Entries set up at the same time would not see each other's device
+    async with hass.data[DATA_SETUP_LOCK]:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except WrongCodeException as e:
+            await api.close()
+            raise ConfigEntryAuthFailed from e
+        except ConfigEntryNotReady:
+            await api.close()
+            raise
+
+        if (owner := _find_same_device(hass, coordinator)) is not None:
+            # Never poll a device twice, the entry follows the coordinator of the other one
+            await coordinator.async_shutdown()
+            await api.close()
+            _create_duplicate_issue(hass, entry, owner.config_entry)
+            hass.data[DOMAIN][entry.entry_id] = owner
+        else:
+            ir.async_delete_issue(hass, DOMAIN, _duplicate_issue_id(entry))
+            await coordinator.async_load_profile()
+            await coordinator.async_load_baseline()
+            await coordinator.async_load_salt_account()
+            await coordinator.async_load_regeneration()
+            await coordinator.async_open_sample_store()
+            hass.data[DOMAIN][entry.entry_id] = coordinator
+            if coordinator.model != BwtModel.SMART_DOS:
+                hass.data[DATA_SITE].async_add_member(entry.entry_id, coordinator)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     return True
 
 
+def _find_same_device(hass: HomeAssistant, coordinator: BwtCoordinator) -> BwtCoordinator | None:
+    """Return the coordinator of another entry polling the device of `coordinator`."""
+    for entry_id, other in hass.data[DOMAIN].items():
+        # Entries sharing a coordinator are listed under the entry owning it too
+        if other.config_entry.entry_id != entry_id or other.model != coordinator.model:
+            continue
+        if other.data is not None and same_device(coordinator.data, other.data):
+            return other
+    return None
+
+
+def _duplicate_issue_id(entry: ConfigEntry) -> str:
+    return f"duplicate_device_{entry.entry_id}"
+
+
+def _create_duplicate_issue(hass: HomeAssistant, entry: ConfigEntry, owner: ConfigEntry) -> None:
+    """Tell the user that an entry adds a device already added by another one."""
+    _LOGGER.warning(
+        "%s (%s) is the device of %s (%s), it is polled once for both",
+        entry.title,
+        entry.data["host"],
+        owner.title,
+        owner.data["host"],
+    )
+    ir.async_create_issue(
+        hass,
+        DOMAIN,
+        _duplicate_issue_id(entry),
+        is_fixable=False,
+        severity=ir.IssueSeverity.WARNING,
+        translation_key="duplicate_device",
+        translation_placeholders={
+            "title": entry.title,
+            "host": entry.data["host"],
+            "other_title": owner.title,
+            "other_host": owner.data["host"],
+        },
+    )
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when the options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
+    if entry.data.get(CONF_SITE):
+        return await hass.config_entries.async_unload_platforms(entry, SITE_PLATFORMS)
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        api = hass.data[DOMAIN].pop(entry.entry_id)
-        await api.close()
+        ir.async_delete_issue(hass, DOMAIN, _duplicate_issue_id(entry))
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        if coordinator.config_entry is not entry:
+            # The coordinator of the other entry of the device keeps polling
+            return unload_ok
+        hass.data[DATA_SITE].async_remove_member(entry.entry_id)
+        await coordinator.async_shutdown()
+        await coordinator.my_api.close()
+        # The duplicates of the device lost their coordinator, they set up their own
+        for entry_id, other in hass.data[DOMAIN].items():
+            if other is coordinator:
+                hass.config_entries.async_schedule_reload(entry_id)
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored state and the samples of a removed entry."""
+    if not entry.data.get(CONF_SITE):
+        await async_remove_entry_data(hass, entry.entry_id)
+
+
 async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Migrate old entry."""
     _LOGGER.debug("Migrating from version %s", entry.version)
 
     # Add entry id to unique id in order to allow multiple devices
     if entry.version == 1:
+        prefix = entry.entry_id + "_"
 
         @callback
         def update_unique_id(entity_entry):
-            """Update unique ID of entity entry."""
-            return {"new_unique_id": entry.entry_id + "_" + entity_entry.unique_id}
+            """Update unique ID of entity entry, unless an interrupted migration did already."""
+            if entity_entry.unique_id.startswith(prefix):
+                return None
+            return {"new_unique_id": prefix + entity_entry.unique_id}
 
         await async_migrate_entries(hass, entry.entry_id, update_unique_id)
         hass.config_entries.async_update_entry(entry, version=2)
 
     # Fix entity ids
     if entry.version == 2:
-        # Remove dollar signs from entity IDs for entities created by this config entry
+        # Remove dollar signs from entity IDs for entities created by this config entry.
+        # The registry indexes the entities by config entry, so this doesn't scan
+        # the entities of all integrations for every entry.
         registry = er.async_get(hass)
+        renames = {
+            entity.entity_id: entity.entity_id.replace("$", "")
+            for entity in er.async_entries_for_config_entry(registry, entry.entry_id)
+            if "$" in entity.entity_id
+        }
 
-        for entity in list(registry.entities.values()):
-            # Only operate on entities that belong to this config entry
-            if entity.config_entry_id != entry.entry_id:
-                continue
-
-            if "$" not in entity.entity_id:
-                continue
-
-            new_entity_id = entity.entity_id.replace("$", "")
+        # The registry saves the renames together, after the last one
+        for entity_id, new_entity_id in renames.items():
             try:
-                registry.async_update_entity(entity.entity_id, new_entity_id=new_entity_id)
-                _LOGGER.info("Renamed entity %s -> %s", entity.entity_id, new_entity_id)
+                registry.async_update_entity(entity_id, new_entity_id=new_entity_id)
+                _LOGGER.info("Renamed entity %s -> %s", entity_id, new_entity_id)
             except ValueError as exc:
                 _LOGGER.warning(
                     "Could not rename entity %s -> %s: %s",
-                    entity.entity_id,
+                    entity_id,
                     new_entity_id,
                     exc,
                 )
-        
+
         hass.config_entries.async_update_entry(entry, version=3)
 
+    # The holiday mode moved from the sensor to the binary sensor platform
+    if entry.version == 3:
+        registry = er.async_get(hass)
+        entity_id = registry.async_get_entity_id(
+            Platform.SENSOR, DOMAIN, f"{entry.entry_id}_holiday_mode"
+        )
+        if entity_id is not None:
+            registry.async_remove(entity_id)
+            _LOGGER.info("Removed entity %s, now a binary sensor", entity_id)
+
+        hass.config_entries.async_update_entry(entry, version=4)
+
     _LOGGER.info("Migration to version %s successful", entry.version)
 
     return True
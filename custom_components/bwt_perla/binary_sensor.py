@@ -0,0 +1,27 @@
+"""BWT binary sensors."""
+from bwt_api.bwt import BwtModel
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .coordinator import BwtCoordinator
+from .sensors.holiday import HolidayModeSensor
+from .sensors.leak import LeakSensor
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up bwt binary sensors from config entry."""
+    coordinator: BwtCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    # Same identifiers as the sensors, so they belong to the same device
+    device_info = DeviceInfo(identifiers={(DOMAIN, config_entry.entry_id)})
+    entities = [LeakSensor(coordinator, device_info, config_entry.entry_id)]
+    if coordinator.model == BwtModel.PERLA_LOCAL_API:
+        entities.append(HolidayModeSensor(coordinator, device_info, config_entry.entry_id))
+    async_add_entities(entities)
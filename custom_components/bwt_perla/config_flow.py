@@ -9,11 +9,37 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_CODE, CONF_HOST
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigFlowResult
 from homeassistant.data_entry_flow import FlowResult
 
-from .const import DOMAIN
+from .const import (
+    CONF_CAPTURE_TRACE,
+    CONF_FLOW_DEADBAND,
+    CONF_FLOW_DEADBAND_PERCENT,
+    CONF_FLOW_MIN_INTERVAL,
+    CONF_LEAK_DURATION,
+    CONF_LEAK_MIN_FLOW,
+    CONF_LEAK_VOLUME,
+    CONF_PREDICTIVE_POLLING,
+    CONF_SALT_CAPACITY,
+    CONF_SAMPLE_RETENTION,
+    CONF_SAMPLE_STORE,
+    CONF_SITE,
+    CONF_VOLUME_DEADBAND,
+    CONF_VOLUME_MIN_INTERVAL,
+    DEFAULT_CAPTURE_TRACE,
+    DEFAULT_DEADBAND,
+    DEFAULT_LEAK_DURATION,
+    DEFAULT_LEAK_MIN_FLOW,
+    DEFAULT_LEAK_VOLUME,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_PREDICTIVE_POLLING,
+    DEFAULT_SALT_CAPACITY,
+    DEFAULT_SAMPLE_RETENTION,
+    DEFAULT_SAMPLE_STORE,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,6 +59,67 @@ def _code_schema(
     }
 )
 
+_POSITIVE = vol.All(vol.Coerce(float), vol.Range(min=0))
+
+def _options_schema(
+        options: dict[str, Any],
+): return vol.Schema(
+    {
+        vol.Required(
+            CONF_PREDICTIVE_POLLING,
+            default=options.get(CONF_PREDICTIVE_POLLING, DEFAULT_PREDICTIVE_POLLING),
+        ): bool,
+        vol.Required(
+            CONF_FLOW_DEADBAND,
+            default=options.get(CONF_FLOW_DEADBAND, DEFAULT_DEADBAND),
+        ): _POSITIVE,
+        vol.Required(
+            CONF_FLOW_DEADBAND_PERCENT,
+            default=options.get(CONF_FLOW_DEADBAND_PERCENT, DEFAULT_DEADBAND),
+        ): _POSITIVE,
+        vol.Required(
+            CONF_FLOW_MIN_INTERVAL,
+            default=options.get(CONF_FLOW_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+        ): _POSITIVE,
+        vol.Required(
+            CONF_VOLUME_DEADBAND,
+            default=options.get(CONF_VOLUME_DEADBAND, DEFAULT_DEADBAND),
+        ): _POSITIVE,
+        vol.Required(
+            CONF_VOLUME_MIN_INTERVAL,
+            default=options.get(CONF_VOLUME_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+        ): _POSITIVE,
+        vol.Required(
+            CONF_LEAK_DURATION,
+            default=options.get(CONF_LEAK_DURATION, DEFAULT_LEAK_DURATION),
+        ): _POSITIVE,
+        vol.Required(
+            CONF_LEAK_VOLUME,
+            default=options.get(CONF_LEAK_VOLUME, DEFAULT_LEAK_VOLUME),
+        ): _POSITIVE,
+        vol.Required(
+            CONF_LEAK_MIN_FLOW,
+            default=options.get(CONF_LEAK_MIN_FLOW, DEFAULT_LEAK_MIN_FLOW),
+        ): _POSITIVE,
+        vol.Required(
+            CONF_SALT_CAPACITY,
+            default=options.get(CONF_SALT_CAPACITY, DEFAULT_SALT_CAPACITY),
+        ): _POSITIVE,
+        vol.Required(
+            CONF_CAPTURE_TRACE,
+            default=options.get(CONF_CAPTURE_TRACE, DEFAULT_CAPTURE_TRACE),
+        ): bool,
+        vol.Required(
+            CONF_SAMPLE_STORE,
+            default=options.get(CONF_SAMPLE_STORE, DEFAULT_SAMPLE_STORE),
+        ): bool,
+        vol.Required(
+            CONF_SAMPLE_RETENTION,
+            default=options.get(CONF_SAMPLE_RETENTION, DEFAULT_SAMPLE_RETENTION),
+        ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect.
@@ -71,13 +158,44 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for BWT Perla."""
 
-    VERSION = 3
+    VERSION = 4
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Create the options flow."""
+        return OptionsFlowHandler()
 
+    @classmethod
+    @callback
+    def async_supports_options_flow(
+        cls, config_entry: config_entries.ConfigEntry
+    ) -> bool:
+        """Only devices have options, the site has none."""
+        return not config_entry.data.get(CONF_SITE)
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Handle the initial step."""
+        """Add a device, or the site totals once there is a device."""
+        if not self._async_current_entries():
+            return await self.async_step_device()
+        return self.async_show_menu(step_id="user", menu_options=["device", "site"])
+
+    async def async_step_site(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Add the totals of all devices on a virtual site device."""
+        await self.async_set_unique_id(CONF_SITE)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(title="BWT site", data={CONF_SITE: True})
+
+    async def async_step_device(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle the host of a device."""
         errors: dict[str, str] = {}
         if user_input is not None:
             try:
@@ -100,7 +218,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 errors["base"] = "unknown"
 
         return self.async_show_form(
-            step_id="user", data_schema=_host_schema(), errors=errors
+            step_id="device", data_schema=_host_schema(), errors=errors
         )
 
 
@@ -146,6 +264,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_reconfigure(self, user_input: dict[str, Any] | None = None):
         """Manual reconfiguration to change a setting."""
         current = self._get_reconfigure_entry()
+        if current.data.get(CONF_SITE):
+            return self.async_abort(reason="site_not_reconfigurable")
         errors: dict[str, str] = {}
         if user_input is not None:
             try:
@@ -177,3 +297,18 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 host=current.data[CONF_HOST],
             ), errors=errors
         )
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options of a BWT Perla entry."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the polling options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init", data_schema=_options_schema(self.config_entry.options)
+        )
@@ -1,3 +1,47 @@
 """Constants for the BWT Perla integration."""
 
 DOMAIN = "bwt_perla"
+
+CONF_PREDICTIVE_POLLING = "predictive_polling"
+DEFAULT_PREDICTIVE_POLLING = False
+
+# Write all requests and responses to <config>/bwt_perla_trace_<entry_id>.jsonl
+CONF_CAPTURE_TRACE = "capture_trace"
+DEFAULT_CAPTURE_TRACE = False
+
+# Append every sample to <config>/bwt_perla_samples/<entry_id>, keeping them for days.
+CONF_SAMPLE_STORE = "sample_store"
+CONF_SAMPLE_RETENTION = "sample_retention"
+DEFAULT_SAMPLE_STORE = False
+DEFAULT_SAMPLE_RETENTION = 30
+
+# Deadband [l/h or l] and minimum interval [s] between state writes.
+CONF_FLOW_DEADBAND = "flow_deadband"
+CONF_FLOW_DEADBAND_PERCENT = "flow_deadband_percent"
+CONF_FLOW_MIN_INTERVAL = "flow_min_interval"
+CONF_VOLUME_DEADBAND = "volume_deadband"
+CONF_VOLUME_MIN_INTERVAL = "volume_min_interval"
+DEFAULT_DEADBAND = 0
+DEFAULT_MIN_INTERVAL = 0
+
+# Leak suspected after continuous flow [min] or volume since the flow began [l, 0 = off].
+# Flows below the minimum flow [l/h] count as no flow.
+CONF_LEAK_DURATION = "leak_duration"
+CONF_LEAK_VOLUME = "leak_volume"
+CONF_LEAK_MIN_FLOW = "leak_min_flow"
+DEFAULT_LEAK_DURATION = 60
+DEFAULT_LEAK_VOLUME = 0
+DEFAULT_LEAK_MIN_FLOW = 0
+EVENT_LEAK_SUSPECTED = f"{DOMAIN}_leak_suspected"
+
+# Salt capacity of the tank [kg] to estimate refill masses, 0 = learn it (Perla One/Duplex only).
+CONF_SALT_CAPACITY = "salt_capacity"
+DEFAULT_SALT_CAPACITY = 0
+EVENT_SALT_REFILLED = f"{DOMAIN}_salt_refilled"
+
+# Config entry of the site totals instead of a device, and where its aggregate is kept.
+CONF_SITE = "site"
+DATA_SITE = f"{DOMAIN}_site"
+
+# Serializes the first refresh of the device entries, so duplicates are recognized.
+DATA_SETUP_LOCK = f"{DOMAIN}_setup_lock"
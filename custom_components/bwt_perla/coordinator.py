@@ -1,43 +1,321 @@
 """Coordinator to fetch the data once for all sensors."""
 
 import asyncio
-from datetime import timedelta
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from enum import StrEnum
+from functools import partial
 import json
 import logging
+import shutil
+import time
 
 from bwt_api.bwt import BwtModel
 from bwt_api.exception import BwtException
 
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
+from .const import (
+    CONF_LEAK_DURATION,
+    CONF_LEAK_MIN_FLOW,
+    CONF_LEAK_VOLUME,
+    CONF_PREDICTIVE_POLLING,
+    CONF_SALT_CAPACITY,
+    CONF_SAMPLE_RETENTION,
+    CONF_SAMPLE_STORE,
+    DEFAULT_LEAK_DURATION,
+    DEFAULT_LEAK_MIN_FLOW,
+    DEFAULT_LEAK_VOLUME,
+    DEFAULT_PREDICTIVE_POLLING,
+    DEFAULT_SALT_CAPACITY,
+    DEFAULT_SAMPLE_RETENTION,
+    DEFAULT_SAMPLE_STORE,
+    DOMAIN,
+    EVENT_LEAK_SUSPECTED,
+    EVENT_SALT_REFILLED,
+)
 from .data.data import ApiData
-from .data.local import LocalApiData
-from .data.silk import SilkApiData
-from .data.smartdos import SmartDosApiData
+from .flow_window import FlowStatistics
+from .leak import LeakDetector
+from .polling import (
+    PREDICTIVE_INTERVAL_MAX,
+    UPDATE_INTERVAL_MAX,
+    UPDATE_INTERVAL_MIN,
+    DevicePoller,
+    calculate_update_interval,
+    predicted_max_interval,
+)
+from .regeneration import RegenerationPredictor
+from .salt import SaltAccount
+from .sample_store import LAYOUT_REGISTERS, LAYOUT_SUMMARY, SampleStore
+from .usage_baseline import UsageBaseline
+from .usage_profile import UsageProfile, half_hour_bucket
+from .validation import InvalidSample
 
 _LOGGER = logging.getLogger(__name__)
 
-_UPDATE_INTERVAL_MIN = 1
-_UPDATE_INTERVAL_MAX = 30
+# Look ahead so polling is already fast when a likely slot begins.
+_PREDICTIVE_LOOKAHEAD = timedelta(minutes=10)
+_BUCKETS_PER_DAY = 48
+# Before midnight, the daily buckets are fetched for the rest of the day. Two
+# of the longest idle intervals of predictive polling, so at least one refresh
+# falls into it.
+_DAY_END = timedelta(seconds=2 * PREDICTIVE_INTERVAL_MAX)
+
+_STORAGE_VERSION = 1
+# Stores of the learned state of an entry.
+_ENTRY_STORES = ("profile", "baseline", "salt", "regeneration")
+_PROFILE_SAVE_DELAY = 300
+_BASELINE_SAVE_DELAY = 300
+_SALT_SAVE_DELAY = 300
+_REGENERATION_SAVE_DELAY = 300
+# Size of the files of the sample store, which are deleted as a whole.
+_SAMPLE_SEGMENT_BYTES = 4 * 1024 * 1024
+
+
+def _entry_store(hass: HomeAssistant, entry_id: str, name: str) -> Store:
+    """Return a store of the learned state of an entry."""
+    return Store(hass, _STORAGE_VERSION, f"{DOMAIN}.{entry_id}.{name}")
+
+
+def _sample_directory(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the directory of the sample segments of an entry."""
+    return hass.config.path(f"{DOMAIN}_samples", entry_id)
+
+
+async def async_remove_entry_data(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the learned state and the samples of a removed entry."""
+    for name in _ENTRY_STORES:
+        await _entry_store(hass, entry_id, name).async_remove()
+    await hass.async_add_executor_job(
+        partial(shutil.rmtree, _sample_directory(hass, entry_id), ignore_errors=True)
+    )
+
+
+class UpdateLane(StrEnum):
+    """How often an entity wants to be updated by the coordinator."""
+
+    # Every refresh, following the fast polling while water flows.
+    FLOW = "flow"
+    # Static or slowly changing values, at most once per default interval.
+    SLOW = "slow"
 
 
 class BwtCoordinator(DataUpdateCoordinator[ApiData]):
     """Bwt coordinator."""
     model: BwtModel
 
-    def __init__(self, hass: HomeAssistant, api, model: BwtModel) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api,
+        model: BwtModel,
+        config_entry: ConfigEntry | None = None,
+    ) -> None:
         """Initialize my coordinator."""
         super().__init__(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             # Name of the data. For logging purposes.
             name="My sensor",
             # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(seconds=_UPDATE_INTERVAL_MAX),
+            update_interval=timedelta(seconds=UPDATE_INTERVAL_MAX),
         )
         self.my_api = api
         self.model = model
+        # Clocks of the coordinator and its entities, the replay uses simulated time.
+        self.monotonic: Callable[[], float] = time.monotonic
+        self.now: Callable[[], datetime] = dt_util.now
+        self._profile: UsageProfile | None = None
+        self._profile_store: Store | None = None
+        # Next GetDailyData bucket to learn from (local API only).
+        self._profile_cursor: tuple[date, int] | None = None
+        # Current half hour and whether flow was seen in it (other models).
+        self._profile_bucket: tuple[date, int] | None = None
+        self._profile_flow_seen = False
+        self.poller = DevicePoller(api, model)
+        self.usage_baseline = UsageBaseline()
+        self.flow_statistics = FlowStatistics()
+        self._baseline_store: Store | None = None
+        options = config_entry.options if config_entry is not None else {}
+        self.leak_detector = LeakDetector(
+            options.get(CONF_LEAK_DURATION, DEFAULT_LEAK_DURATION) * 60,
+            options.get(CONF_LEAK_VOLUME, DEFAULT_LEAK_VOLUME),
+            options.get(CONF_LEAK_MIN_FLOW, DEFAULT_LEAK_MIN_FLOW),
+        )
+        # SmartDos devices dose a substance, they have no salt
+        self.salt_account: SaltAccount | None = None
+        if model != BwtModel.SMART_DOS:
+            self.salt_account = SaltAccount(
+                options.get(CONF_SALT_CAPACITY, DEFAULT_SALT_CAPACITY)
+            )
+        self._salt_store: Store | None = None
+        # Only Perla One/Duplex report the capacity of their columns
+        self.regeneration: RegenerationPredictor | None = None
+        if model == BwtModel.PERLA_LOCAL_API:
+            self.regeneration = RegenerationPredictor()
+        self._regeneration_store: Store | None = None
+        self._regeneration_saved: float | None = None
+        self.sample_store: SampleStore | None = None
+        # Idle intervals requested by live subscribers, see async_request_live_interval
+        self._live_intervals: list[int] = []
+        # Interval of a running burst and the callbacks ending it
+        self.burst_interval: int | None = None
+        self._burst_cancel: list[CALLBACK_TYPE] = []
+        self._manual_refresh: asyncio.Task | None = None
+        self._slow_lane_updated: float | None = None
+        self._slow_lane_success: bool | None = None
+        # If the slow lane is due in the running refresh, None outside of one
+        self._slow_lane_refresh: bool | None = None
+
+    async def async_load_profile(self) -> None:
+        """Load the usage profile if predictive polling is enabled."""
+        if self.config_entry is None or not self.config_entry.options.get(
+            CONF_PREDICTIVE_POLLING, DEFAULT_PREDICTIVE_POLLING
+        ):
+            return
+        self._profile_store = _entry_store(self.hass, self.config_entry.entry_id, "profile")
+        stored = await self._profile_store.async_load() or {}
+        self._profile = UsageProfile.from_dict(stored.get("profile"))
+        if cursor := stored.get("cursor"):
+            self._profile_cursor = (date.fromisoformat(cursor[0]), cursor[1])
+
+    async def async_load_baseline(self) -> None:
+        """Load the usage baseline of the hours of the week."""
+        if self.config_entry is None:
+            return
+        self._baseline_store = _entry_store(self.hass, self.config_entry.entry_id, "baseline")
+        self.usage_baseline = UsageBaseline.from_dict(
+            await self._baseline_store.async_load()
+        )
+
+    async def async_load_salt_account(self) -> None:
+        """Load the salt account of the models using salt."""
+        if self.config_entry is None or self.salt_account is None:
+            return
+        self._salt_store = _entry_store(self.hass, self.config_entry.entry_id, "salt")
+        self.salt_account = SaltAccount.from_dict(
+            await self._salt_store.async_load(),
+            self.config_entry.options.get(CONF_SALT_CAPACITY, DEFAULT_SALT_CAPACITY),
+        )
+
+    async def async_load_regeneration(self) -> None:
+        """Load the regeneration predictor of the models with column capacities."""
+        if self.config_entry is None or self.regeneration is None:
+            return
+        self._regeneration_store = _entry_store(self.hass, self.config_entry.entry_id, "regeneration")
+        self.regeneration = RegenerationPredictor.from_dict(
+            await self._regeneration_store.async_load()
+        )
+
+    async def async_open_sample_store(self) -> None:
+        """Open the sample store if it is enabled."""
+        if self.config_entry is None or not self.config_entry.options.get(
+            CONF_SAMPLE_STORE, DEFAULT_SAMPLE_STORE
+        ):
+            return
+        store = SampleStore(
+            _sample_directory(self.hass, self.config_entry.entry_id),
+            LAYOUT_REGISTERS if self.model == BwtModel.PERLA_SILK else LAYOUT_SUMMARY,
+            _SAMPLE_SEGMENT_BYTES,
+            self.config_entry.options.get(CONF_SAMPLE_RETENTION, DEFAULT_SAMPLE_RETENTION) * 86400,
+            self.hass.async_add_executor_job,
+        )
+        await self.hass.async_add_executor_job(store.open)
+        self.sample_store = store
+
+    async def async_shutdown(self) -> None:
+        """Persist the learned state and the samples before shutting down."""
+        self.async_stop_burst()
+        await super().async_shutdown()
+        if self._profile_store is not None:
+            await self._profile_store.async_save(self._profile_data())
+        if self._baseline_store is not None:
+            await self._baseline_store.async_save(self.usage_baseline.as_dict())
+        if self._salt_store is not None:
+            await self._salt_store.async_save(self.salt_account.as_dict())
+        if self._regeneration_store is not None:
+            await self._regeneration_store.async_save(self.regeneration.as_dict())
+        if self.sample_store is not None:
+            await self.sample_store.async_close()
+
+    @callback
+    def async_request_live_interval(self, interval: int) -> Callable[[], None]:
+        """Poll at least every `interval` seconds until the returned callback is called."""
+        self._live_intervals.append(interval)
+        if self.update_interval is not None and self.update_interval.seconds > interval:
+            self.hass.async_create_task(self.async_request_refresh())
+
+        @callback
+        def remove_live_interval() -> None:
+            self._live_intervals.remove(interval)
+
+        return remove_live_interval
+
+    async def async_refresh_now(self) -> None:
+        """Refresh right away, unless the device was polled within the minimum interval.
+
+        Callers arriving during such a refresh share it instead of fetching again.
+        """
+        if self._manual_refresh is None or self._manual_refresh.done():
+            last_poll = self.poller.last_poll
+            if last_poll is not None and self.monotonic() - last_poll < UPDATE_INTERVAL_MIN:
+                return
+            self._manual_refresh = self.hass.async_create_task(self.async_refresh())
+        await asyncio.shield(self._manual_refresh)
+
+    @callback
+    def async_start_burst(self, interval: int, duration: timedelta) -> None:
+        """Poll at least every `interval` seconds for `duration`, replacing a running burst."""
+        self.async_stop_burst()
+        self.burst_interval = interval
+        self._burst_cancel = [
+            self.async_request_live_interval(interval),
+            async_call_later(self.hass, duration, self._async_end_burst),
+        ]
+
+    @callback
+    def _async_end_burst(self, _now: datetime) -> None:
+        self.async_stop_burst()
+
+    @callback
+    def async_stop_burst(self) -> None:
+        """End a running burst, the interval returns to the usual schedule."""
+        for cancel in self._burst_cancel:
+            cancel()
+        self._burst_cancel = []
+        self.burst_interval = None
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the flow lane on every refresh and the slow lane only when due."""
+        # The refresh polled the slow lane values when due, the same decision updates them
+        slow_lane_due = self._slow_lane_refresh
+        self._slow_lane_refresh = None
+        if slow_lane_due is None:
+            slow_lane_due = self._slow_lane_due()
+        if slow_lane_due or self._slow_lane_success != self.last_update_success:
+            self._slow_lane_updated = self.monotonic()
+            self._slow_lane_success = self.last_update_success
+            super().async_update_listeners()
+            return
+        for update_callback, context in list(self._listeners.values()):
+            if context == UpdateLane.FLOW:
+                update_callback()
+
+    def _slow_lane_due(self) -> bool:
+        """Return if the slow lane entities are due for an update."""
+        return (
+            self._slow_lane_updated is None
+            or self.monotonic() - self._slow_lane_updated
+            >= UPDATE_INTERVAL_MAX - UPDATE_INTERVAL_MIN
+        )
 
     async def _async_update_data(self):
         """Fetch data from API endpoint.
@@ -50,40 +328,193 @@ class BwtCoordinator(DataUpdateCoordinator[ApiData]):
         # its own BwtException hierarchy (not derived from aiohttp.ClientError)
         # and the device may return empty responses that cause JSONDecodeError.
         # Both must be caught here to avoid unhandled tracebacks.
+        # Every request has its own timeout, adapted to the latency of the
+        # device. The next refresh is scheduled from the end of this one, so a
+        # slow device lowers the cadence instead of stacking up requests.
+        self._slow_lane_refresh = self._slow_lane_due()
         try:
-            async with asyncio.timeout(10):
-                if self.model == BwtModel.PERLA_LOCAL_API:
-                    new_values = LocalApiData(await self.my_api.get_current_data())
-                elif self.model == BwtModel.PERLA_SILK:
-                    new_values = SilkApiData(await self.my_api.get_registers())
-                elif self.model == BwtModel.SMART_DOS:
-                    device_info = await self.my_api.get_device_info()
-                    configuration = await self.my_api.get_configuration()
-                    remaining_capacity = await self.my_api.get_remaining_capacity()
-                    treated_water = await self.my_api.get_treated_water()
-                    substance_dosage = await self.my_api.get_substance_dosage()
-                    wifi_info = await self.my_api.get_wifi_info()
-                    new_values = SmartDosApiData(
-                        device_info,
-                        configuration,
-                        remaining_capacity,
-                        treated_water,
-                        substance_dosage,
-                        wifi_info,
-                    )
-                else:
-                    raise UpdateFailed(
-                        f"Unsupported API type: {type(self.my_api)}"
-                    )
+            new_values = await self.poller.poll(
+                self.data, self._slow_lane_refresh, self.monotonic()
+            )
         except (BwtException, json.JSONDecodeError) as err:
             raise UpdateFailed(
                 f"Error communicating with BWT device: {err}"
             ) from err
+        except InvalidSample as err:
+            if self.data is None or err.persistent:
+                raise UpdateFailed(f"Invalid data of BWT device: {err}") from err
+            # Hold the last good sample, nothing downstream sees the glitch
+            _LOGGER.debug("Keeping the last data of the BWT device: %s", err)
+            # Nothing new for the slow lane, it stays due for the next refresh
+            self._slow_lane_refresh = False
+            return self.data
+
+        if self.sample_store is not None:
+            self.sample_store.append(self.now().timestamp(), new_values)
+        self.flow_statistics.update(new_values.current_flow(), self.monotonic())
+        self._detect_leak(new_values.current_flow())
+        if (
+            self.usage_baseline.update(new_values.usage_counter(), self.now())
+            and self._baseline_store is not None
+        ):
+            self._baseline_store.async_delay_save(
+                self.usage_baseline.as_dict, _BASELINE_SAVE_DELAY
+            )
+        if self.salt_account is not None:
+            self._account_salt(new_values)
+        if self.regeneration is not None:
+            self._predict_regeneration(new_values)
+
+        max_interval = UPDATE_INTERVAL_MAX
+        if self._profile is not None:
+            await self._async_learn_profile(new_values)
+            max_interval = predicted_max_interval(self._predicted_probability())
+        if self._live_intervals:
+            max_interval = min(max_interval, *self._live_intervals)
         self.update_interval = calculate_update_interval(
-            self.update_interval, new_values.current_flow()
+            self.update_interval, new_values.current_flow(), max_interval
         )
         return new_values
 
+    def _detect_leak(self, flow: int) -> None:
+        """Feed the leak detector and fire an event when a leak is suspected."""
+        now = self.monotonic()
+        if not self.leak_detector.update(flow, now):
+            return
+        duration = self.leak_detector.duration(now)
+        _LOGGER.warning(
+            "Leak suspected: water flowing for %d minutes, %.0f l",
+            duration // 60,
+            self.leak_detector.volume,
+        )
+        self.hass.bus.async_fire(
+            EVENT_LEAK_SUSPECTED,
+            {
+                "entry_id": self.config_entry.entry_id if self.config_entry else None,
+                "duration": round(duration),
+                "volume": round(self.leak_detector.volume, 1),
+                "minimum_flow": self.leak_detector.minimum_flow,
+            },
+        )
+
+    def _account_salt(self, new_values: ApiData) -> None:
+        """Feed the salt account and fire an event when a refill is detected."""
+        account = self.salt_account
+        refills = account.refill_count
+        if not account.update(
+            new_values.regenerativ_level(),
+            new_values.regenerations(),
+            new_values.total_output(),
+            new_values.salt_mass(),
+            self.now(),
+        ):
+            return
+        if self._salt_store is not None:
+            self._salt_store.async_delay_save(account.as_dict, _SALT_SAVE_DELAY)
+        if account.refill_count == refills:
+            return
+        refill = account.refills[-1]
+        _LOGGER.info(
+            "Salt refill detected: level %d%% -> %d%%, about %s kg",
+            refill.level_before,
+            refill.level_after,
+            "?" if refill.mass is None else refill.mass,
+        )
+        self.hass.bus.async_fire(
+            EVENT_SALT_REFILLED,
+            {
+                "entry_id": self.config_entry.entry_id if self.config_entry else None,
+                "level_before": refill.level_before,
+                "level_after": refill.level_after,
+                "mass": refill.mass,
+            },
+        )
+
+    def _predict_regeneration(self, new_values: ApiData) -> None:
+        """Feed the regeneration predictor with the capacities of the columns."""
+        capacities = [new_values.capacity_1()]
+        if new_values.columns() == 2:
+            capacities.append(new_values.capacity_2())
+        if None in capacities:
+            # Without a hardness difference the device reports no capacity
+            return
+        self.regeneration.update(self.now(), new_values.total_output(), capacities)
+        # Every sample changes the predictor, a delayed save would be postponed forever
+        now = self.monotonic()
+        if self._regeneration_store is not None and (
+            self._regeneration_saved is None
+            or now - self._regeneration_saved >= _REGENERATION_SAVE_DELAY
+        ):
+            self._regeneration_saved = now
+            self._regeneration_store.async_delay_save(
+                self.regeneration.as_dict, _REGENERATION_SAVE_DELAY
+            )
+
+    async def _async_learn_profile(self, new_values: ApiData) -> None:
+        """Feed the usage profile with the half hours completed since the last refresh."""
+        now = self.now()
+        today = now.date()
+        bucket = half_hour_bucket(now)
+
+        if self.model == BwtModel.PERLA_LOCAL_API:
+            # The device keeps exact half-hour buckets, so short flows between
+            # two polls are not missed. Only fetch them once a bucket completed.
+            first = 0
+            if self._profile_cursor is not None and self._profile_cursor[0] == today:
+                first = self._profile_cursor[1]
+            last = bucket
+            # The device starts over at midnight, so the rest of the day is
+            # fetched shortly before: the last bucket is then nearly complete.
+            if (now + _DAY_END).date() != today:
+                last = _BUCKETS_PER_DAY
+            if first >= last:
+                return
+            try:
+                daily = await self.poller.request("get_daily_data")
+            except (BwtException, json.JSONDecodeError, TimeoutError) as err:
+                _LOGGER.debug("Could not fetch daily data for usage profile: %s", err)
+                return
+            self._profile.observe_buckets(now, daily.values, first, last)
+            self._profile_cursor = (today, last)
+        else:
+            # Without buckets on the device, learn from the flow seen while polling.
+            current = (today, bucket)
+            completed = self._profile_bucket
+            if completed == current:
+                self._profile_flow_seen |= new_values.current_flow() > 0
+                return
+            self._profile_bucket = current
+            flow_seen = self._profile_flow_seen
+            self._profile_flow_seen = new_values.current_flow() > 0
+            if completed is None:
+                return
+            start = dt_util.start_of_local_day(completed[0]) + timedelta(
+                minutes=30 * completed[1]
+            )
+            self._profile.observe(start, flow_seen)
+
+        self._profile_store.async_delay_save(self._profile_data, _PROFILE_SAVE_DELAY)
+
+    def _predicted_probability(self) -> float | None:
+        """Return the highest usage probability of now and the near future."""
+        now = self.now()
+        probabilities = [
+            p
+            for p in (
+                self._profile.probability(now),
+                self._profile.probability(now + _PREDICTIVE_LOOKAHEAD),
+            )
+            if p is not None
+        ]
+        return max(probabilities) if probabilities else None
+
+    def _profile_data(self) -> dict:
+        """Return the data persisted for the usage profile."""
+        cursor = None
+        if self._profile_cursor is not None:
+            cursor = [self._profile_cursor[0].isoformat(), self._profile_cursor[1]]
+        return {"profile": self._profile.as_dict(), "cursor": cursor}
+
     def get_model_suffix(self) -> str:
         """Get the model suffix based on the number of columns."""
         if self.model == BwtModel.PERLA_LOCAL_API:
@@ -102,15 +533,3 @@ class BwtCoordinator(DataUpdateCoordinator[ApiData]):
             return self.data.firmware_version()
         return "Unknown"
 
-
-def calculate_update_interval(current_interval: timedelta | None, current_flow: int):
-    """Calculate the new update interval, based on the old one and the current flow."""
-
-    if current_flow > 0:
-        return timedelta(seconds=_UPDATE_INTERVAL_MIN)
-    if current_interval is None:
-        return timedelta(seconds=_UPDATE_INTERVAL_MAX)
-    if current_interval.seconds >= _UPDATE_INTERVAL_MAX:
-        return current_interval
-    # Increase the interval to max step by step if there is no flow at the moment
-    return timedelta(seconds=min(_UPDATE_INTERVAL_MAX, current_interval.seconds * 2))
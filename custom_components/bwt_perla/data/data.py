@@ -22,3 +22,41 @@ class ApiData(ABC):
 
     @abstractmethod
     def regeneration_count_1(self) -> int: pass
+
+    # Flow derived from flow_counter() by the coordinator, for models without a usable flow.
+    _estimated_flow: float | None = None
+
+    def flow_counter(self) -> float | None:
+        """Return a water counter [l] to estimate the flow from, None if the flow is exact."""
+        return None
+
+    def identity(self) -> tuple:
+        """Return the settings and versions telling the device apart, without its counters."""
+        return ()
+
+    def usage_counter(self) -> float:
+        """Return a water counter [l] to learn the usage per hour from."""
+        return float(self.total_output())
+
+    def regenerations(self) -> int:
+        """Return the regenerations of all columns since the device setup."""
+        return self.regeneration_count_1()
+
+    def hardness_out(self) -> float | None:
+        """Return the hardness of the softened water, None if the device doesn't report it."""
+        return None
+
+    def salt_mass(self) -> float | None:
+        """Return the salt used since the device setup [g], None without such a counter."""
+        return None
+
+    def state_name(self) -> str | None:
+        """Return the name of the device state, None if the device has none."""
+        return None
+
+    def state_code(self) -> int | None:
+        """Return the numeric device state, None if the device has none."""
+        return None
+
+    def set_estimated_flow(self, flow: float) -> None:
+        self._estimated_flow = flow
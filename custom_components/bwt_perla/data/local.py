@@ -18,6 +18,16 @@ class LocalApiData(ApiData):
     def firmware_version(self) -> str:
         return self._data.firmware_version
 
+    def identity(self) -> tuple:
+        # The service dates are set on the device, they rarely match another one
+        return (
+            self._data.firmware_version,
+            self._data.columns,
+            self._data.in_hardness.dH,
+            self._data.out_hardness.dH,
+            self._data.service_customer,
+        )
+
     def total_output(self) -> int:
         return self._data.blended_total
 
@@ -33,11 +43,18 @@ class LocalApiData(ApiData):
     def day_output(self) -> int:
         return treated_to_blended(self._data.treated_day, self._data.in_hardness.dH, self._data.out_hardness.dH)
 
-    def capacity_1(self) -> int:
-        return self._data.capacity_1 / (self._data.in_hardness.dH - self._data.out_hardness.dH) / 1000.0
+    def capacity_1(self) -> int | None:
+        return self._capacity(self._data.capacity_1)
+
+    def capacity_2(self) -> int | None:
+        return self._capacity(self._data.capacity_2)
 
-    def capacity_2(self) -> int:
-        return self._data.capacity_2 / (self._data.in_hardness.dH - self._data.out_hardness.dH) / 1000.0
+    def _capacity(self, capacity: int) -> float | None:
+        # Without softening, e.g. set up with the same hardness in and out, there is no capacity
+        softening = self._data.in_hardness.dH - self._data.out_hardness.dH
+        if softening <= 0:
+            return None
+        return capacity / softening / 1000.0
 
     def last_regeneration_1(self) -> datetime:
         return self._data.regeneration_last_1.astimezone()
@@ -86,3 +103,15 @@ class LocalApiData(ApiData):
     
     def dosing_total(self):
         return self._data.dosing_total
+
+    def regenerations(self) -> int:
+        return self._data.regeneration_count
+
+    def salt_mass(self) -> float:
+        return self._data.regenerativ_total
+
+    def state_name(self) -> str:
+        return self._data.state.name
+
+    def state_code(self) -> int:
+        return self._data.state.value
@@ -13,7 +13,19 @@ class SilkApiData(ApiData):
         self._registers = registers
     
     def current_flow(self) -> int:
-        return self.get_register(CURRENT_FLOW_RATE) * 60 # l/m -> l/h
+        flow = self.get_register(CURRENT_FLOW_RATE) * 60 # l/m -> l/h
+        # The register is coarse, refine it with the counter while water flows
+        if flow and self._estimated_flow:
+            return int(self._estimated_flow)
+        return flow
+
+    def flow_counter(self) -> float:
+        # The total counter only steps by 100 l, the daily one by 1 l
+        return self.get_register(DAILY_WATER_USAGE)
+
+    def usage_counter(self) -> float:
+        # Restarts at midnight, which the usage baseline handles
+        return self.get_register(DAILY_WATER_USAGE)
 
     def total_output(self) -> int:
         return self.get_register(TOTAL_WATER_SERVED) * 100
@@ -44,6 +56,15 @@ class SilkApiData(ApiData):
     def regeneration_count_1(self) -> int:
         return self.get_register(TOTAL_NUMBER_OF_RECHARGES)
 
+    def identity(self) -> tuple:
+        return tuple(
+            self.get_register(index)
+            for index in (BASE_MODEL_NUMBER, DUPLEX_SETTING, TURBINE_PULSES_PER_LITER, WATER_HARDNESS)
+        )
+
+    def registers(self) -> list[int]:
+        return self._registers
+
     def get_register(self, index: int) -> int | None:
         if index < 0 or index >= len(self._registers):
             return None
@@ -1,3 +1,4 @@
+from copy import copy
 from typing import Optional
 
 from .data import ApiData
@@ -36,8 +37,22 @@ class SmartDosApiData(ApiData):
         self._substance_dosage = substance_dosage
         self._wifi_info = wifi_info
 
+    def with_treated_water(self, treated_water: TreatedWaterResponse) -> "SmartDosApiData":
+        """Return a copy with a new treated water counter and the other responses kept."""
+        data = copy(self)
+        data._treated_water = treated_water
+        data._estimated_flow = None
+        return data
+
     def current_flow(self) -> int:
-        return 0
+        # The device has no flow, only the total counter
+        return int(self._estimated_flow or 0)
+
+    def flow_counter(self) -> float:
+        return self._treated_water.total_flow / 1000.0
+
+    def usage_counter(self) -> float:
+        return self.flow_counter()
 
     def total_output(self) -> int:
         return int(self._treated_water.total_flow / 1000.0)
@@ -65,11 +80,24 @@ class SmartDosApiData(ApiData):
     def product_code(self) -> str:
         return self._device_info.product_code
 
+    def identity(self) -> tuple:
+        # The start-up date tells apart devices of the same product and firmware
+        info = self._device_info
+        return (info.fw_rev, info.hw_rev, info.product_code, info.comm_date)
+
     def device_state(self) -> str:
         if self._device_info.dev_state is None:
             return "UNKNOWN"
         return self._device_info.dev_state.name
 
+    def state_name(self) -> str:
+        return self.device_state()
+
+    def state_code(self) -> int | None:
+        if self._device_info.dev_state is None:
+            return None
+        return self._device_info.dev_state.value
+
     def active_states(self) -> str:
         return ", ".join(
             state.name if state is not None else "UNKNOWN"
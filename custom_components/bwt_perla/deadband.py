@@ -0,0 +1,51 @@
+"""Deadband and rate limit for sensors with frequently changing values."""
+
+
+class WriteFilter:
+    """Decide whether a new value is worth a state write.
+
+    A value is written when it differs from the last written one by more than
+    the deadband and the minimum interval since the last write has passed.
+    Water starting or stopping to flow is always written, so the start and end
+    of a usage are exact in the history. Without flow the deadband doesn't
+    apply, so a counter catching up after a usage is written once the
+    minimum interval passed.
+    """
+
+    def __init__(
+        self,
+        deadband: float = 0.0,
+        deadband_percent: float = 0.0,
+        min_interval: float = 0.0,
+    ) -> None:
+        """Initialize the filter with absolute and relative thresholds."""
+        self._deadband = deadband
+        self._deadband_percent = deadband_percent
+        self._min_interval = min_interval
+        self._last_value: float | None = None
+        self._last_write: float | None = None
+        self._flowing: bool | None = None
+
+    @property
+    def active(self) -> bool:
+        """Return if the filter suppresses anything besides unchanged values."""
+        return bool(self._deadband or self._deadband_percent or self._min_interval)
+
+    def should_write(self, value: float | None, flowing: bool, now: float) -> bool:
+        """Return if `value` should be written, `now` being a monotonic time."""
+        transition = self._flowing is not None and flowing != self._flowing
+        self._flowing = flowing
+        last = self._last_value
+        if value == last:
+            return False
+        if not transition and value is not None and last is not None:
+            if now - self._last_write < self._min_interval:
+                return False
+            threshold = max(self._deadband, abs(last) * self._deadband_percent / 100.0)
+            # Without flow a value only catches up with the end of a usage,
+            # nothing would write it later
+            if flowing and abs(value - last) <= threshold and value != 0:
+                return False
+        self._last_value = value
+        self._last_write = now
+        return True
@@ -0,0 +1,128 @@
+"""HTTP view streaming the consumption buckets of the devices as CSV.
+
+The half-hour, day and month buckets are read from the device itself, so the
+export covers every liter and not only what happened to be polled. One
+response of one device is converted and written at a time: memory stays the
+same with any number of entries.
+"""
+import csv
+from datetime import datetime, timedelta
+from http import HTTPStatus
+import io
+import json
+import logging
+
+from aiohttp import web
+from bwt_api.api import treated_to_blended
+from bwt_api.bwt import BwtModel
+from bwt_api.exception import BwtException
+
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .coordinator import BwtCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Endpoint of the buckets by period
+_ENDPOINTS = {
+    "daily": "get_daily_data",
+    "monthly": "get_monthly_data",
+    "yearly": "get_yearly_data",
+}
+_HEADER = ("entry_id", "start", "treated_l", "blended_l")
+
+
+def _bucket_starts(period: str, now: datetime) -> list[datetime]:
+    """Return the starts of the buckets of the period begun until `now`, in device order."""
+    if period == "daily":
+        midnight = dt_util.start_of_local_day(now)
+        return [
+            midnight + timedelta(minutes=30 * bucket)
+            for bucket in range((now.hour * 60 + now.minute) // 30 + 1)
+        ]
+    if period == "monthly":
+        return [
+            dt_util.start_of_local_day(now.date().replace(day=day))
+            for day in range(1, now.day + 1)
+        ]
+    return [
+        dt_util.start_of_local_day(now.date().replace(month=month, day=1))
+        for month in range(1, now.month + 1)
+    ]
+
+
+def _rows(entry_id: str, coordinator: BwtCoordinator, period: str, values: list[int]):
+    """Yield the CSV rows of the buckets of a device."""
+    data = coordinator.data
+    hardness_in, hardness_out = data.hardness_in(), data.hardness_out()
+    for start, treated in zip(_bucket_starts(period, coordinator.now()), values):
+        blended = treated_to_blended(treated, hardness_in, hardness_out)
+        yield entry_id, start.isoformat(), treated, round(blended, 1)
+
+
+class ConsumptionView(HomeAssistantView):
+    """Stream the consumption of one entry, or of all entries without `entry_id`."""
+
+    url = f"/api/{DOMAIN}/consumption/{{period}}"
+    name = f"api:{DOMAIN}:consumption"
+    requires_auth = True
+
+    async def get(self, request: web.Request, period: str) -> web.StreamResponse:
+        """Stream the buckets of the period as CSV."""
+        if period not in _ENDPOINTS:
+            return self.json_message(
+                f"Unknown period {period}, use one of {', '.join(_ENDPOINTS)}",
+                HTTPStatus.NOT_FOUND,
+            )
+        coordinators: dict[str, BwtCoordinator] = request.app[KEY_HASS].data.get(DOMAIN, {})
+        if entry_id := request.query.get("entry_id"):
+            if (coordinator := coordinators.get(entry_id)) is None:
+                return self.json_message(f"Unknown entry {entry_id}", HTTPStatus.NOT_FOUND)
+            if coordinator.model != BwtModel.PERLA_LOCAL_API:
+                return self.json_message(
+                    f"Entry {entry_id} keeps no consumption buckets", HTTPStatus.BAD_REQUEST
+                )
+            if coordinator.data is None:
+                return self.json_message(
+                    f"Entry {entry_id} has no data yet", HTTPStatus.SERVICE_UNAVAILABLE
+                )
+            selected = [(entry_id, coordinator)]
+        else:
+            # Only Perla One/Duplex keep buckets, a device added twice is exported once
+            selected = [
+                (entry_id, coordinator)
+                for entry_id, coordinator in coordinators.items()
+                if coordinator.model == BwtModel.PERLA_LOCAL_API
+                and coordinator.data is not None
+                and (coordinator.config_entry is None or coordinator.config_entry.entry_id == entry_id)
+            ]
+
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": "text/csv; charset=utf-8",
+                "Content-Disposition": f'attachment; filename="{DOMAIN}_{period}.csv"',
+            }
+        )
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(_HEADER)
+        for entry_id, coordinator in selected:
+            try:
+                buckets = await coordinator.poller.request(_ENDPOINTS[period])
+            except (BwtException, json.JSONDecodeError, TimeoutError) as err:
+                # Don't end the CSV as if it was complete
+                _LOGGER.warning("Aborting the %s export at entry %s: %s", period, entry_id, err)
+                raise ConnectionAbortedError(f"Entry {entry_id} didn't respond") from err
+            writer.writerows(_rows(entry_id, coordinator, period, buckets.values))
+            await response.write(buffer.getvalue().encode())
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            # Without entries, only the header
+            await response.write(buffer.getvalue().encode())
+        await response.write_eof()
+        return response
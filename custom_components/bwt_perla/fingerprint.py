@@ -0,0 +1,22 @@
+"""Recognize one device behind several config entries, e.g. added by IP and by hostname."""
+
+from .data.data import ApiData
+
+# Water [l] the totals of two samples of one device may differ by: the Silk
+# counts in steps of 100 l, and water flows between the polls of two entries.
+_TOTAL_TOLERANCE = 100
+
+
+def same_device(data: ApiData, other: ApiData) -> bool:
+    """Return if two samples, taken shortly after each other, come from the same device.
+
+    Devices of the same model can share firmware and settings, so their
+    counters must match as well: two softeners of a house don't have the
+    same regenerations and the same total output to 100 l.
+    """
+    return (
+        type(data) is type(other)
+        and data.identity() == other.identity()
+        and data.regenerations() == other.regenerations()
+        and abs(data.total_output() - other.total_output()) <= _TOTAL_TOLERANCE
+    )
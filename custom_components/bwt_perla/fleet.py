@@ -0,0 +1,125 @@
+"""Totals of all softeners of the site, maintained by delta.
+
+Every refresh of a member only replaces that member's contribution, so an
+update costs the same however many softeners the site has. SmartDos devices
+dose the water a softener treats, they would count it twice and are no
+members.
+"""
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .coordinator import BwtCoordinator, UpdateLane
+
+# Salt levels are whole percentages, the minimum is found among their counts.
+_LEVELS = 101
+
+
+@dataclass(frozen=True, slots=True)
+class _Contribution:
+    current_flow: float
+    total_output: float
+    day_output: float
+    level: int
+
+
+class SiteAggregate:
+    """Combined flow and outputs and the lowest salt level of the member softeners."""
+
+    def __init__(self) -> None:
+        """Initialize without members."""
+        self.current_flow = 0.0
+        self.total_output = 0.0
+        self.day_output = 0.0
+        self._contributions: dict[str, _Contribution] = {}
+        self._level_counts = [0] * _LEVELS
+        self._min_level: int | None = None
+        self._remove_listeners: dict[str, CALLBACK_TYPE] = {}
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def members(self) -> int:
+        """Return the members with data."""
+        return len(self._contributions)
+
+    @property
+    def min_level(self) -> int | None:
+        """Return the lowest salt level [%] of the members."""
+        return self._min_level
+
+    @callback
+    def async_add_member(self, entry_id: str, coordinator: BwtCoordinator) -> None:
+        """Follow the refreshes of a coordinator."""
+
+        @callback
+        def update() -> None:
+            if coordinator.last_update_success:
+                self.update(entry_id, coordinator.data)
+
+        self._remove_listeners[entry_id] = coordinator.async_add_listener(
+            update, UpdateLane.FLOW
+        )
+        if coordinator.data is not None:
+            self.update(entry_id, coordinator.data)
+
+    @callback
+    def async_remove_member(self, entry_id: str) -> None:
+        """Stop following a coordinator and take away its contribution."""
+        if remove_listener := self._remove_listeners.pop(entry_id, None):
+            remove_listener()
+        if (old := self._contributions.pop(entry_id, None)) is not None:
+            self._apply(old, None)
+            self._notify()
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call `update_callback` after the totals changed, until the returned callback is called."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    def update(self, entry_id: str, data) -> None:
+        """Replace the contribution of a member with its new data."""
+        new = _Contribution(
+            data.current_flow(),
+            data.total_output(),
+            data.day_output(),
+            max(0, min(_LEVELS - 1, int(data.regenerativ_level()))),
+        )
+        old = self._contributions.get(entry_id)
+        if new == old:
+            return
+        self._contributions[entry_id] = new
+        self._apply(old, new)
+        self._notify()
+
+    def _apply(self, old: _Contribution | None, new: _Contribution | None) -> None:
+        """Replace `old` with `new` in the totals, either may be None."""
+        for contribution, sign in ((old, -1), (new, 1)):
+            if contribution is None:
+                continue
+            self.current_flow += sign * contribution.current_flow
+            self.total_output += sign * contribution.total_output
+            self.day_output += sign * contribution.day_output
+            self._level_counts[contribution.level] += sign
+
+        if new is not None and (self._min_level is None or new.level < self._min_level):
+            self._min_level = new.level
+        elif old is not None and old.level == self._min_level and not self._level_counts[old.level]:
+            # The lowest member rose or left, the next lowest is above it
+            self._min_level = next(
+                (level for level in range(old.level, _LEVELS) if self._level_counts[level]),
+                None,
+            )
+        if not self._contributions:
+            # Without members, don't carry rounding errors to the next ones
+            self.current_flow = self.total_output = self.day_output = 0.0
+
+    def _notify(self) -> None:
+        for update_callback in list(self._listeners):
+            update_callback()
@@ -0,0 +1,65 @@
+"""Flow estimation from a total water counter for devices without a usable flow."""
+import math
+
+
+class FlowEstimator:
+    """Estimate the flow [l/h] from successive readings of a water counter [l].
+
+    The rate is the counter increase since its last change over the time since
+    that change, so a coarse counter that only steps every few polls still gives
+    a steady rate. Rates are smoothed with an exponential moving average. While
+    the counter stands still, the estimate is bounded by one counter step over
+    the time since the last change and drops to zero once that bound is below
+    `min_flow`. A decreasing counter (e.g. a daily counter at midnight) restarts
+    the estimation.
+    """
+
+    def __init__(
+        self,
+        resolution: float,
+        min_flow: float = 6.0,
+        smoothing: float = 10.0,
+    ) -> None:
+        """Initialize with the counter step [l], the smallest flow [l/h] and the time constant [s]."""
+        self._resolution = resolution
+        self._min_flow = min_flow
+        self._smoothing = smoothing
+        self._counter: float | None = None
+        self._changed: float = 0.0
+        self._sampled: float = 0.0
+        self._flow = 0.0
+
+    @property
+    def flow(self) -> float:
+        """Return the last estimated flow [l/h]."""
+        return self._flow
+
+    def update(self, counter: float, now: float) -> float:
+        """Add a counter reading at the monotonic time `now` and return the flow."""
+        if self._counter is None or counter < self._counter:
+            self._counter = counter
+            self._changed = self._sampled = now
+            self._flow = 0.0
+            return self._flow
+
+        if counter > self._counter:
+            if self._flow == 0.0:
+                # Water started after the last reading, not at the last change
+                elapsed = now - self._sampled
+            else:
+                elapsed = now - self._changed
+            if elapsed > 0:
+                rate = (counter - self._counter) / elapsed * 3600
+                if self._flow == 0.0:
+                    self._flow = rate
+                else:
+                    alpha = 1 - math.exp(-(now - self._sampled) / self._smoothing)
+                    self._flow += alpha * (rate - self._flow)
+            self._counter = counter
+            self._changed = now
+        elif now > self._changed:
+            bound = self._resolution / (now - self._changed) * 3600
+            self._flow = 0.0 if bound < self._min_flow else min(self._flow, bound)
+
+        self._sampled = now
+        return self._flow
@@ -0,0 +1,104 @@
+"""Rolling mean, peak and volume of the flow, in constant time per sample.
+
+The flow read at a poll is held until the next poll, so every sample adds one
+segment of constant flow to the windows. A window keeps the running volume of
+its segments and a deque of their flows that only decreases from the front,
+whose first flow is the peak. Segments leave the window once they ended before
+its start; the part of the oldest segment before the start is taken off the
+volume when it is read. Every segment enters and leaves each deque once, so a
+sample costs the same with any window length and polling rate.
+"""
+from collections import deque
+
+_SECONDS_PER_HOUR = 3600
+
+
+class FlowWindow:
+    """Flow statistics of the last `length` seconds."""
+
+    def __init__(self, length: float) -> None:
+        """Initialize an empty window of `length` seconds."""
+        self.length = length
+        # Start and end [s] and flow [l/h] of the segments in the window
+        self._segments: deque[tuple[float, float, float]] = deque()
+        # Flow [l/h] times seconds of the segments
+        self._volume = 0.0
+        # End [s] and flow of the segments with a smaller flow after them
+        self._peaks: deque[tuple[float, float]] = deque()
+
+    def add(self, start: float, end: float, flow: float) -> None:
+        """Add a segment of constant flow, starting where the last one ended."""
+        self._segments.append((start, end, flow))
+        self._volume += flow * (end - start)
+        while self._peaks and self._peaks[-1][1] <= flow:
+            self._peaks.pop()
+        self._peaks.append((end, flow))
+        self._evict(end)
+
+    def _evict(self, now: float) -> None:
+        begin = now - self.length
+        while self._segments and self._segments[0][1] <= begin:
+            start, end, flow = self._segments.popleft()
+            self._volume -= flow * (end - start)
+        while self._peaks and self._peaks[0][0] <= begin:
+            self._peaks.popleft()
+        if not self._segments:
+            # Don't carry rounding errors into the next segments
+            self._volume = 0.0
+
+    def volume(self, now: float) -> float | None:
+        """Return the water [l] of the window ending at `now`, None without segments."""
+        if not self._segments:
+            return None
+        start, _end, flow = self._segments[0]
+        outside = max(0.0, now - self.length - start)
+        return max(0.0, self._volume - flow * outside) / _SECONDS_PER_HOUR
+
+    def mean(self, now: float) -> float | None:
+        """Return the mean flow [l/h] of the covered part of the window."""
+        if not self._segments:
+            return None
+        covered = min(self.length, now - self._segments[0][0])
+        if covered <= 0:
+            return None
+        return self.volume(now) * _SECONDS_PER_HOUR / covered
+
+    def peak(self) -> float | None:
+        """Return the highest flow [l/h] in the window."""
+        return self._peaks[0][1] if self._peaks else None
+
+
+class FlowStatistics:
+    """Rolling windows of the flow of the last minute, quarter of an hour and hour."""
+
+    def __init__(self) -> None:
+        """Initialize without samples."""
+        self.minute = FlowWindow(60)
+        self.quarter = FlowWindow(15 * 60)
+        self.hour = FlowWindow(60 * 60)
+        self._windows = (self.minute, self.quarter, self.hour)
+        self._last: tuple[float, float] | None = None
+
+    def update(self, flow: float, now: float) -> None:
+        """Add the flow [l/h] read at the monotonic time `now` [s]."""
+        if self._last is not None:
+            start, held = self._last
+            if now <= start:
+                # Another reading at the same time replaces the held flow
+                self._last = (start, flow)
+                return
+            for window in self._windows:
+                window.add(start, now, held)
+        self._last = (now, flow)
+
+    @property
+    def last_time(self) -> float | None:
+        """Return the monotonic time of the last sample."""
+        return None if self._last is None else self._last[0]
+
+    def peak(self, window: FlowWindow) -> float | None:
+        """Return the peak flow of a window, including the flow read last."""
+        if self._last is None:
+            return None
+        peak = window.peak()
+        return self._last[1] if peak is None else max(peak, self._last[1])
@@ -0,0 +1,79 @@
+"""Leak detection on the stream of flow samples of the coordinator."""
+import math
+
+# Flow samples further apart [s] don't prove the flow was continuous in between.
+_MAX_GAP = 600
+# The window of the minimum flow is kept in this many buckets.
+_WINDOW_BUCKETS = 12
+
+
+class LeakDetector:
+    """Suspect a leak when water flows continuously for too long or too much.
+
+    Every sample costs the same, however long the flow lasts: the detector only
+    keeps the start of the continuous flow, the volume since then and the
+    minimum flow of the last `duration` seconds in a fixed number of buckets.
+    Short gaps between samples, e.g. failed refreshes, don't end a flow.
+    """
+
+    def __init__(self, duration: float, volume: float = 0.0, min_flow: float = 0.0) -> None:
+        """Initialize with the duration [s], volume [l] (0 = off) and the smallest flow [l/h]."""
+        self._duration = duration
+        self._volume_limit = volume
+        self._min_flow = min_flow
+        self._bucket_length = max(duration, 1.0) / _WINDOW_BUCKETS
+        self._buckets = [math.inf] * _WINDOW_BUCKETS
+        self._bucket = 0
+        self._started: float | None = None
+        self._last: float | None = None
+        self._last_flow = 0.0
+        self.volume = 0.0
+        self.suspected = False
+
+    def duration(self, now: float) -> float:
+        """Return the seconds water has been flowing continuously."""
+        return 0.0 if self._started is None else now - self._started
+
+    @property
+    def minimum_flow(self) -> float:
+        """Return the minimum flow [l/h] of the last `duration` seconds of the flow."""
+        minimum = min(self._buckets)
+        return 0.0 if minimum == math.inf else minimum
+
+    def update(self, flow: float, now: float) -> bool:
+        """Add a flow sample [l/h] at the monotonic time `now`.
+
+        Returns True if this sample raised the suspicion of a leak.
+        """
+        if flow <= 0 or flow < self._min_flow:
+            self._started = None
+            self._last = now
+            self._last_flow = 0.0
+            self.suspected = False
+            return False
+
+        if self._started is None or now - self._last > _MAX_GAP:
+            self._started = now
+            self.volume = 0.0
+            self._buckets = [math.inf] * _WINDOW_BUCKETS
+            self._bucket = int(now // self._bucket_length)
+        else:
+            self.volume += (self._last_flow + flow) / 2 * (now - self._last) / 3600
+        self._record(flow, now)
+        self._last = now
+        self._last_flow = flow
+
+        was_suspected = self.suspected
+        self.suspected = self.duration(now) >= self._duration or (
+            self._volume_limit > 0 and self.volume >= self._volume_limit
+        )
+        return self.suspected and not was_suspected
+
+    def _record(self, flow: float, now: float) -> None:
+        """Add the flow to the minimum of its bucket, clearing the buckets passed."""
+        bucket = int(now // self._bucket_length)
+        for passed in range(self._bucket + 1, min(bucket, self._bucket + _WINDOW_BUCKETS) + 1):
+            self._buckets[passed % _WINDOW_BUCKETS] = math.inf
+        self._bucket = max(bucket, self._bucket)
+        index = bucket % _WINDOW_BUCKETS
+        self._buckets[index] = min(self._buckets[index], flow)
@@ -0,0 +1,214 @@
+"""Fetching and polling intervals of the devices, without Home Assistant.
+
+The coordinator and the standalone exporter (exporter/bwt_exporter.py) share
+this module and the data classes, so none of them may import homeassistant.
+"""
+
+import asyncio
+from collections import deque
+from datetime import timedelta
+import time
+from typing import Any
+
+from bwt_api.bwt import BwtModel
+
+from .data.data import ApiData
+from .data.local import LocalApiData
+from .data.silk import SilkApiData
+from .data.smartdos import SmartDosApiData
+from .flow_estimator import FlowEstimator
+from .validation import InvalidSample, SampleValidator
+
+UPDATE_INTERVAL_MIN = 1
+UPDATE_INTERVAL_MAX = 30
+
+# Bounds of the idle interval when polling follows the learned usage profile.
+PREDICTIVE_INTERVAL_MIN = 5
+PREDICTIVE_INTERVAL_MAX = 120
+
+# Step [l] of the counter the flow is estimated from, for models without a usable flow.
+_FLOW_COUNTER_RESOLUTION = {
+    BwtModel.PERLA_SILK: 1.0,
+    BwtModel.SMART_DOS: 0.001,
+}
+
+# Bounds [s] of the timeout of a request, and its factor on the usual latency.
+_TIMEOUT_FLOOR = 2.0
+_TIMEOUT_CEILING = 10.0
+_TIMEOUT_FACTOR = 3.0
+# Latencies kept per endpoint, and needed before its timeout adapts.
+_LATENCY_SAMPLES = 50
+_MIN_LATENCY_SAMPLES = 10
+# Weight of the newest interval in the achieved cadence.
+_CADENCE_ALPHA = 0.1
+
+
+class AdaptiveTimeout:
+    """Timeout of one endpoint from the 95th percentile of its recent latencies.
+
+    A device answering in 50 ms fails after the floor instead of stalling the
+    fast polling for the ceiling, a slow one keeps enough headroom. Until
+    enough latencies are seen, the ceiling applies.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without latencies."""
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self.timeout = _TIMEOUT_CEILING
+        self.timeouts = 0
+
+    def record(self, latency: float) -> None:
+        """Add the latency [s] of a successful request."""
+        self._latencies.append(latency)
+        if len(self._latencies) >= _MIN_LATENCY_SAMPLES:
+            ordered = sorted(self._latencies)
+            p95 = ordered[int(0.95 * (len(ordered) - 1))]
+            self.timeout = min(_TIMEOUT_CEILING, max(_TIMEOUT_FLOOR, p95 * _TIMEOUT_FACTOR))
+
+
+class DevicePoller:
+    """Fetch the data of one device and estimate its flow where needed.
+
+    Polls never overlap: a poll requested while another one runs waits for
+    that one and gets its data, so requests can't stack up behind a slow
+    device.
+    """
+
+    def __init__(self, api, model: BwtModel) -> None:
+        """Initialize with a bwt_api client of the model."""
+        self.api = api
+        self.model = model
+        self.timeouts: dict[str, AdaptiveTimeout] = {}
+        # Achieved seconds between the starts of polls, and the last start
+        self.cadence: float | None = None
+        self.last_poll: float | None = None
+        # Futures of the polls waiting for the running one, None while none runs
+        self._waiters: list[asyncio.Future[ApiData]] | None = None
+        self._flow_estimator: FlowEstimator | None = None
+        self.validator = SampleValidator()
+
+    @property
+    def timeout_count(self) -> int:
+        """Return the requests that timed out, of all endpoints."""
+        return sum(timeout.timeouts for timeout in self.timeouts.values())
+
+    async def request(self, endpoint: str) -> Any:
+        """Call an endpoint method of the client with its adaptive timeout."""
+        timeout = self.timeouts.setdefault(endpoint, AdaptiveTimeout())
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(timeout.timeout):
+                response = await getattr(self.api, endpoint)()
+        except TimeoutError:
+            timeout.timeouts += 1
+            raise
+        timeout.record(time.monotonic() - started)
+        return response
+
+    async def poll(
+        self, previous: ApiData | None, full: bool, now: float
+    ) -> ApiData:
+        """Fetch the data at the monotonic time `now`.
+
+        Unless `full`, SmartDos devices only fetch their water counter and keep
+        the other responses of `previous`. bwt_api exceptions and TimeoutError
+        are passed on, InvalidSample is raised for an implausible sample.
+        """
+        if self._waiters is not None:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            return await waiter
+        if self.last_poll is not None and now > self.last_poll:
+            elapsed = now - self.last_poll
+            self.cadence = elapsed if self.cadence is None else (
+                self.cadence + _CADENCE_ALPHA * (elapsed - self.cadence)
+            )
+        self.last_poll = now
+        # Only polls arriving meanwhile create futures, the usual poll doesn't
+        self._waiters = waiters = []
+        try:
+            data = await self._poll(previous, full, now)
+        except Exception as err:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(err)
+            raise
+        except BaseException:
+            for waiter in waiters:
+                waiter.cancel()
+            raise
+        finally:
+            self._waiters = None
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(data)
+        return data
+
+    async def _poll(
+        self, previous: ApiData | None, full: bool, now: float
+    ) -> ApiData:
+        if self.model == BwtModel.PERLA_LOCAL_API:
+            data = LocalApiData(await self.request("get_current_data"))
+        elif self.model == BwtModel.PERLA_SILK:
+            data = SilkApiData(await self.request("get_registers"))
+        elif self.model == BwtModel.SMART_DOS and previous is not None and not full:
+            # Between full updates only the counter of the flow is needed
+            data = previous.with_treated_water(await self.request("get_treated_water"))
+        elif self.model == BwtModel.SMART_DOS:
+            data = await self._poll_smart_dos()
+        else:
+            raise ValueError(f"Unsupported model: {self.model}")
+
+        # A glitched counter must not reach the flow estimation either
+        self.validator.validate(previous, data)
+        if (counter := data.flow_counter()) is not None:
+            if self._flow_estimator is None:
+                self._flow_estimator = FlowEstimator(_FLOW_COUNTER_RESOLUTION[self.model])
+            data.set_estimated_flow(self._flow_estimator.update(counter, now))
+        return data
+
+    async def _poll_smart_dos(self) -> SmartDosApiData:
+        """Fetch all responses of a SmartDos."""
+        device_info = await self.request("get_device_info")
+        configuration = await self.request("get_configuration")
+        remaining_capacity = await self.request("get_remaining_capacity")
+        treated_water = await self.request("get_treated_water")
+        substance_dosage = await self.request("get_substance_dosage")
+        wifi_info = await self.request("get_wifi_info")
+        return SmartDosApiData(
+            device_info,
+            configuration,
+            remaining_capacity,
+            treated_water,
+            substance_dosage,
+            wifi_info,
+        )
+
+
+def predicted_max_interval(probability: float | None) -> int:
+    """Calculate the idle polling ceiling for a usage probability.
+
+    Unknown slots keep the default ceiling. Likely slots are polled quickly so
+    flow onset is caught early, slots without usage are polled rarely.
+    """
+    if probability is None:
+        return UPDATE_INTERVAL_MAX
+    interval = PREDICTIVE_INTERVAL_MAX * (1.0 - probability) ** 2
+    return int(max(PREDICTIVE_INTERVAL_MIN, min(PREDICTIVE_INTERVAL_MAX, interval)))
+
+
+def calculate_update_interval(
+    current_interval: timedelta | None,
+    current_flow: int,
+    max_interval: int = UPDATE_INTERVAL_MAX,
+):
+    """Calculate the new update interval, based on the old one and the current flow."""
+
+    if current_flow > 0:
+        return timedelta(seconds=UPDATE_INTERVAL_MIN)
+    if current_interval is None:
+        return timedelta(seconds=max_interval)
+    if current_interval.seconds >= max_interval:
+        return timedelta(seconds=max_interval)
+    # Increase the interval to max step by step if there is no flow at the moment
+    return timedelta(seconds=min(max_interval, current_interval.seconds * 2))
@@ -0,0 +1,100 @@
+"""Sampling profiler limited to the hot paths of the integration, without Home Assistant.
+
+A thread looks at the stack of the event loop thread at a fixed interval.
+Samples are only kept while the loop runs inside one of the scope functions,
+so the rest of Home Assistant doesn't dilute the result. Nothing is hooked
+into the profiled code: while no profiler runs, there is no overhead at all.
+"""
+from collections import Counter
+from collections.abc import Iterable
+import sys
+import threading
+from types import CodeType, FrameType
+
+# (file, first line, qualified name) of a function
+FunctionKey = tuple[str, int, str]
+
+
+def _key(code: CodeType) -> FunctionKey:
+    return code.co_filename, code.co_firstlineno, code.co_qualname
+
+
+class SamplingProfiler:
+    """Sample the stack of one thread while it runs inside the scope functions."""
+
+    def __init__(
+        self, scopes: Iterable[CodeType], interval: float, thread_id: int | None = None
+    ) -> None:
+        """Initialize for the thread, the calling thread by default."""
+        self._scopes = frozenset(scopes)
+        self.interval = interval
+        self._thread_id = threading.get_ident() if thread_id is None else thread_id
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.samples = 0
+        # Samples of the outermost scope function of the stack
+        self.scope_samples: Counter[FunctionKey] = Counter()
+        # Samples with the function on top of the stack, and anywhere below the scope
+        self.self_samples: Counter[FunctionKey] = Counter()
+        self.total_samples: Counter[FunctionKey] = Counter()
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name="bwt_perla_profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.sample(frame)
+            # The frames keep their locals alive, don't hold them until the next sample
+            del frame
+
+    def sample(self, frame: FrameType) -> None:
+        """Count the stack of `frame` if it runs inside a scope function."""
+        self.samples += 1
+        stack: list[CodeType] = []
+        scope_depth = None
+        while frame is not None:
+            code = frame.f_code
+            stack.append(code)
+            if code in self._scopes:
+                scope_depth = len(stack)
+            frame = frame.f_back
+        if scope_depth is None:
+            return
+        # Leaf first, up to the outermost scope function
+        stack = stack[:scope_depth]
+        self.scope_samples[_key(stack[-1])] += 1
+        self.self_samples[_key(stack[0])] += 1
+        # Recursive functions count once per sample
+        self.total_samples.update({_key(code) for code in stack})
+
+    def report(self, duration: float, limit: int = 50) -> str:
+        """Return the aggregated timings of the functions as a text table."""
+        milliseconds = self.interval * 1000
+        in_scope = sum(self.scope_samples.values())
+        lines = [
+            f"Profile of {duration:.0f} s, sampled every {milliseconds:g} ms",
+            f"{in_scope} of {self.samples} samples in the profiled functions, "
+            f"about {in_scope * milliseconds:.0f} ms",
+            "",
+            f"{'scope':<60} {'samples':>8} {'ms':>8}",
+        ]
+        for (_file, _line, name), count in self.scope_samples.most_common():
+            lines.append(f"{name:<60} {count:>8} {count * milliseconds:>8.0f}")
+        lines += ["", f"{'function':<60} {'self ms':>8} {'total ms':>8}  location"]
+        for key, total in self.total_samples.most_common(limit):
+            file, line, name = key
+            lines.append(
+                f"{name:<60} {self.self_samples[key] * milliseconds:>8.0f} "
+                f"{total * milliseconds:>8.0f}  {file}:{line}"
+            )
+        return "\n".join(lines) + "\n"
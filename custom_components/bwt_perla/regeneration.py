@@ -0,0 +1,126 @@
+"""Prediction of the next regeneration of every column of a Perla One/Duplex."""
+
+from datetime import datetime, timedelta
+import math
+
+# Time constant [s] of the consumption rate, averaging over the days of a week.
+_RATE_TIME_CONSTANT = 3 * 24 * 3600
+# Weight of the newest capacity drop in the shares of the columns.
+_SHARE_ALPHA = 0.05
+# Observed time [s] before the consumption rate is trusted.
+_MIN_OBSERVED = 24 * 3600
+# Columns with a smaller share of the drops stand by until the others regenerate.
+_STANDBY_SHARE = 0.05
+
+
+class RegenerationPredictor:
+    """Predict when the columns regenerate from their capacity and the consumption.
+
+    The blended water consumption rate [l/h] is an exponentially weighted
+    average over the time between samples, so days without water count as
+    much as busy ones. Each column drains its share of the consumption, the
+    shares are averaged from the capacity drops of the columns. A column
+    without a share stands by: it takes over the whole consumption once the
+    columns in service regenerated. The state is the same few numbers
+    however long the predictor runs.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without observations."""
+        self.rate = 0.0  # l/h, divided by the weight for the estimate
+        self._weight = 0.0
+        self.observed = 0.0  # s
+        self.shares: list[float] = []
+        # Last sample
+        self._time: datetime | None = None
+        self._total: float | None = None
+        self._capacities: list[float] = []
+
+    @property
+    def consumption_rate(self) -> float | None:
+        """Return the estimated consumption [l/h], None while observed too shortly."""
+        if self.observed < _MIN_OBSERVED or not self._weight:
+            return None
+        return self.rate / self._weight
+
+    def update(self, now: datetime, total_output: float, capacities: list[float]) -> None:
+        """Add a sample of the total output [l] and the capacities of the columns [l]."""
+        if len(self.shares) != len(capacities):
+            self.shares = [1 / len(capacities)] * len(capacities)
+            self._capacities = []
+        if self._time is not None:
+            elapsed = (now - self._time).total_seconds()
+            used = total_output - self._total
+            # A counter reset or a clock set back doesn't tell the rate
+            if elapsed > 0 and used >= 0:
+                alpha = 1 - math.exp(-elapsed / _RATE_TIME_CONSTANT)
+                self.rate += alpha * (used / elapsed * 3600 - self.rate)
+                self._weight += alpha * (1 - self._weight)
+                self.observed += elapsed
+            self._learn_shares(capacities)
+        self._time = now
+        self._total = total_output
+        self._capacities = list(capacities)
+
+    def _learn_shares(self, capacities: list[float]) -> None:
+        if not self._capacities or any(
+            new > old for new, old in zip(capacities, self._capacities)
+        ):
+            # A column regenerated, its drop isn't consumption
+            return
+        drops = [old - new for new, old in zip(capacities, self._capacities)]
+        total = sum(drops)
+        if total <= 0:
+            return
+        for index, drop in enumerate(drops):
+            self.shares[index] += _SHARE_ALPHA * (drop / total - self.shares[index])
+
+    def next_regeneration(self, column: int) -> datetime | None:
+        """Return the predicted time the column (0 based) regenerates."""
+        rate = self.consumption_rate
+        if rate is None or rate <= 0 or column >= len(self._capacities):
+            return None
+
+        def hours_left(index: int) -> float:
+            return max(0.0, self._capacities[index]) / (self.shares[index] * rate)
+
+        if self.shares[column] >= _STANDBY_SHARE:
+            hours = hours_left(column)
+        else:
+            in_service = [
+                index for index, share in enumerate(self.shares) if share >= _STANDBY_SHARE
+            ]
+            hours = min(map(hours_left, in_service)) + max(0.0, self._capacities[column]) / rate
+        return self._time + timedelta(hours=hours)
+
+    def as_dict(self) -> dict:
+        """Serialize the predictor for storage."""
+        return {
+            "rate": self.rate,
+            "weight": self._weight,
+            "observed": round(self.observed),
+            "shares": [round(share, 5) for share in self.shares],
+            "last": [
+                None if self._time is None else self._time.isoformat(),
+                self._total,
+                self._capacities,
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "RegenerationPredictor":
+        """Restore a predictor from storage, starting a new one from incompatible data."""
+        predictor = cls()
+        if not data:
+            return predictor
+        try:
+            predictor.rate = float(data["rate"])
+            predictor._weight = float(data["weight"])
+            predictor.observed = float(data["observed"])
+            predictor.shares = [float(share) for share in data["shares"]]
+            time, predictor._total, capacities = data["last"]
+            predictor._time = None if time is None else datetime.fromisoformat(time)
+            predictor._capacities = [float(capacity) for capacity in capacities]
+        except (KeyError, TypeError, ValueError):
+            return cls()
+        return predictor
@@ -0,0 +1,185 @@
+"""Salt refill detection and salt usage accounting."""
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+# A level this many percentage points above its lowest value since the last
+# refill is a refill, smaller rises are noise of the level measurement.
+_REFILL_MIN_RISE = 10
+# Rises within this time of a refill extend it, salt is often added in batches.
+_REFILL_MERGE = timedelta(hours=1)
+# Level drop [%] needed before the salt mass per percent is trusted.
+_MIN_LEARNED_DROP = 5
+_MAX_REFILLS = 10
+
+
+@dataclass
+class SaltRefill:
+    """A detected refill of the salt tank."""
+
+    time: datetime
+    level_before: int
+    level_after: int
+    # Estimated mass [kg], None while the mass of a percent is unknown.
+    mass: float | None
+
+
+class SaltAccount:
+    """Account of the salt used and refilled, fed with every device sample.
+
+    The salt used is the mass counter of the device if it has one (Perla
+    One/Duplex), otherwise the level drops times the mass of one percent of
+    the tank. That mass is the configured tank capacity or, without one,
+    learned from the mass counter against the level. Regenerations and the
+    blended water are counted from the totals of the device, so usage while
+    Home Assistant was stopped is accounted after the next start.
+    """
+
+    def __init__(self, capacity: float = 0.0) -> None:
+        """Initialize with the salt capacity of the tank [kg], 0 to learn it."""
+        self._capacity = capacity
+        # Totals since the account started
+        self.salt_used = 0.0  # g
+        self.regenerations = 0
+        self.water = 0  # l
+        self.refill_count = 0
+        # The last refills, newest last
+        self.refills: list[SaltRefill] = []
+        # Mass counter increase and level drop the mass of a percent is learned from
+        self._learned_mass = 0.0
+        self._learned_drop = 0
+        # Last sample and the lowest level since the last refill
+        self._level: int | None = None
+        self._low: int | None = None
+        self._regenerations: int | None = None
+        self._water: int | None = None
+        self._mass: float | None = None
+
+    @property
+    def grams_per_percent(self) -> float | None:
+        """Return the salt mass [g] of one percent of the tank, None while unknown."""
+        if self._capacity > 0:
+            return self._capacity * 10
+        if self._learned_drop >= _MIN_LEARNED_DROP:
+            return self._learned_mass / self._learned_drop
+        return None
+
+    @property
+    def salt_per_regeneration(self) -> float | None:
+        """Return the salt used per regeneration [g]."""
+        if not self.regenerations or not self.salt_used:
+            return None
+        return self.salt_used / self.regenerations
+
+    @property
+    def salt_per_cubic_meter(self) -> float | None:
+        """Return the salt used per m³ of blended water [g]."""
+        if not self.water or not self.salt_used:
+            return None
+        return self.salt_used / self.water * 1000
+
+    def update(
+        self,
+        level: int,
+        regenerations: int,
+        water: int,
+        mass: float | None,
+        now: datetime,
+    ) -> bool:
+        """Add a sample of the level [%], the counters and the salt mass counter [g].
+
+        Returns True if the account changed and should be saved.
+        """
+        changed = False
+        regenerations_delta = _delta(self._regenerations, regenerations)
+        water_delta = _delta(self._water, water)
+        mass_delta = _delta(self._mass, mass) if mass is not None else 0
+        level_drop = max(0, self._level - level) if self._level is not None else 0
+        self._regenerations, self._water, self._mass = regenerations, water, mass
+
+        if regenerations_delta or water_delta:
+            self.regenerations += regenerations_delta
+            self.water += water_delta
+            changed = True
+
+        if mass is not None:
+            self.salt_used += mass_delta
+            if self._capacity <= 0:
+                self._learned_mass += mass_delta
+                self._learned_drop += level_drop
+        elif level_drop and (grams := self.grams_per_percent) is not None:
+            self.salt_used += level_drop * grams
+        changed |= bool(mass_delta or level_drop)
+
+        if self._low is None or level < self._low:
+            self._low = level
+        elif level - self._low >= _REFILL_MIN_RISE:
+            self._refilled(level, now)
+            changed = True
+        if level != self._level:
+            changed = True
+        self._level = level
+        return changed
+
+    def _refilled(self, level: int, now: datetime) -> None:
+        """Record a refill from the lowest level to `level`."""
+        last = self.refills[-1] if self.refills else None
+        if last is not None and now - last.time <= _REFILL_MERGE:
+            last.level_after = level
+        else:
+            last = SaltRefill(now, self._low, level, None)
+            self.refill_count += 1
+            self.refills.append(last)
+            del self.refills[:-_MAX_REFILLS]
+        if (grams := self.grams_per_percent) is not None:
+            last.mass = round((last.level_after - last.level_before) * grams / 1000, 1)
+        self._low = level
+
+    def as_dict(self) -> dict:
+        """Serialize the account for storage."""
+        return {
+            "salt_used": round(self.salt_used),
+            "regenerations": self.regenerations,
+            "water": self.water,
+            "refill_count": self.refill_count,
+            "refills": [
+                {**asdict(refill), "time": refill.time.isoformat()}
+                for refill in self.refills
+            ],
+            "learned": [round(self._learned_mass), self._learned_drop],
+            "last": [self._level, self._low, self._regenerations, self._water, self._mass],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict | None, capacity: float = 0.0) -> "SaltAccount":
+        """Restore an account from storage, starting a new one from incompatible data."""
+        account = cls(capacity)
+        if not data:
+            return account
+        try:
+            account.salt_used = data["salt_used"]
+            account.regenerations = data["regenerations"]
+            account.water = data["water"]
+            account.refill_count = data["refill_count"]
+            account.refills = [
+                SaltRefill(**{**refill, "time": datetime.fromisoformat(refill["time"])})
+                for refill in data["refills"]
+            ]
+            account._learned_mass, account._learned_drop = data["learned"]
+            (
+                account._level,
+                account._low,
+                account._regenerations,
+                account._water,
+                account._mass,
+            ) = data["last"]
+        except (KeyError, TypeError, ValueError):
+            return cls(capacity)
+        return account
+
+
+def _delta(last: float | None, value: float) -> float:
+    """Return the increase of a counter, 0 for the first sample or a reset."""
+    if last is None or value < last:
+        return 0
+    return value - last
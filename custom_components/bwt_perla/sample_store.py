@@ -0,0 +1,274 @@
+"""Append-only store of the coordinator samples in fixed-width binary records.
+
+Every sample is one record in the current segment file of the device. Segments
+are rotated at a fixed size and deleted as a whole once all their records are
+older than the retention. Records have a fixed width and the timestamps never
+decrease, so a time range is found by bisecting the memory-mapped segments and
+returned as views into the mappings, without copying a single record.
+
+Segments start with a header naming their layout. Perla One/Duplex and SmartDos
+devices store a summary of the sample, Silk devices their raw register vector:
+
+    summary:   timestamp (f64), flow [l/h] (f32), total output [l] (f64),
+               day output [l] (f32), salt level [%] (u8, 255 = none), pad,
+               state code (u16, 65535 = none)
+    registers: timestamp (f64), 48 registers (i32, -1 = missing)
+
+Appends only buffer the record, the buffer is written in the executor from
+time to time. Nothing here needs Home Assistant.
+"""
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+import mmap
+import os
+from pathlib import Path
+import struct
+import threading
+import time
+from typing import Any
+
+from .data import ApiData
+
+_MAGIC = b"BWTS"
+_VERSION = 1
+# magic, version, layout, record size, pad
+_HEADER = struct.Struct("<4sBBH8x")
+
+LAYOUT_SUMMARY = 0
+LAYOUT_REGISTERS = 1
+SILK_REGISTERS = 48
+
+SUMMARY = struct.Struct("<dfdfBxH")
+REGISTERS = struct.Struct(f"<d{SILK_REGISTERS}i")
+_RECORDS = {LAYOUT_SUMMARY: SUMMARY, LAYOUT_REGISTERS: REGISTERS}
+_TIMESTAMP = struct.Struct("<d")
+
+_NO_LEVEL = 255
+_NO_STATE = 0xFFFF
+_NO_REGISTER = -1
+
+# Segment names are the millisecond timestamps of their first records.
+_SUFFIX = ".bin"
+# Write the buffered records at least this often [s] or when this many bytes are buffered.
+_FLUSH_INTERVAL = 10
+_FLUSH_SIZE = 16384
+
+
+def _optional(value, missing, maximum):
+    return missing if value is None or not 0 <= value <= maximum else int(value)
+
+
+def pack_sample(layout: int, timestamp: float, data: ApiData) -> bytes:
+    """Return the record of a sample in the layout."""
+    if layout == LAYOUT_REGISTERS:
+        registers = list(data.registers()[:SILK_REGISTERS])
+        registers += [_NO_REGISTER] * (SILK_REGISTERS - len(registers))
+        return REGISTERS.pack(timestamp, *registers)
+    return SUMMARY.pack(
+        timestamp,
+        data.current_flow(),
+        data.total_output(),
+        data.day_output(),
+        _optional(data.regenerativ_level(), _NO_LEVEL, 100),
+        _optional(data.state_code(), _NO_STATE, _NO_STATE - 1),
+    )
+
+
+def _layout_of(path: Path) -> int | None:
+    """Return the layout of a segment, None if it has another version."""
+    with path.open("rb") as file:
+        header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    magic, version, layout, record_size = _HEADER.unpack(header)
+    if magic != _MAGIC or version != _VERSION or layout not in _RECORDS:
+        return None
+    return layout if _RECORDS[layout].size == record_size else None
+
+
+class _Segment:
+    """A segment file and its mapping, mapped again after it grew."""
+
+    def __init__(self, path: Path, start: float) -> None:
+        self.path = path
+        self.start = start
+        self.layout: int | None = None
+        self._map: mmap.mmap | None = None
+
+    def records(self) -> tuple[int, memoryview] | None:
+        """Return the layout and records of the segment, None without records."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            # Expired meanwhile
+            return None
+        if size <= _HEADER.size:
+            return None
+        if self.layout is None and (layout := _layout_of(self.path)) is not None:
+            self.layout = layout
+        if (layout := self.layout) is None:
+            return None
+        if self._map is None or len(self._map) != size:
+            with self.path.open("rb") as file:
+                # An old mapping is closed once no view uses it any more
+                self._map = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+        record_size = _RECORDS[layout].size
+        usable = (size - _HEADER.size) // record_size * record_size
+        return layout, memoryview(self._map)[_HEADER.size : _HEADER.size + usable]
+
+
+class SampleStore:
+    """Segments of the records of one device in a directory."""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        layout: int,
+        segment_bytes: int,
+        retention: float,
+        executor: Callable[..., Awaitable[Any]],
+    ) -> None:
+        """Initialize with the segment size [bytes], the retention [s] and an executor job runner."""
+        self.directory = Path(directory)
+        self.layout = layout
+        self.segment_bytes = segment_bytes
+        self.retention = retention
+        self._executor = executor
+        self._buffer = bytearray()
+        self._last_flush = time.monotonic()
+        self._writer: asyncio.Future | None = None
+        self._last_timestamp = float("-inf")
+        self._segments: list[_Segment] = []
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        """Find the existing segments, runs in the executor."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = sorted(
+            (
+                _Segment(path, int(path.stem) / 1000)
+                for path in self.directory.glob(f"*{_SUFFIX}")
+                if path.stem.isdigit()
+            ),
+            key=lambda segment: segment.start,
+        )
+        with self._lock:
+            self._segments = segments
+            # Start a new segment with the first write, unless the last one continues
+            self._size = self.segment_bytes
+            if segments and (found := segments[-1].records()) is not None:
+                layout, records = found
+                size = segments[-1].path.stat().st_size
+                if layout == self.layout and _HEADER.size + len(records) == size:
+                    self._size = size
+                # The records continue after the last one, even if the clock was set back
+                self._last_timestamp = _TIMESTAMP.unpack_from(
+                    records, len(records) - _RECORDS[layout].size
+                )[0]
+                self._expire(self._last_timestamp)
+
+    def append(self, timestamp: float, data: ApiData) -> None:
+        """Buffer the record of a sample and write the buffer from time to time.
+
+        Timestamps never decrease, a clock set back repeats the last one.
+        """
+        self._last_timestamp = max(self._last_timestamp, timestamp)
+        self._buffer += pack_sample(self.layout, self._last_timestamp, data)
+        if (
+            len(self._buffer) >= _FLUSH_SIZE
+            or time.monotonic() - self._last_flush >= _FLUSH_INTERVAL
+        ) and (self._writer is None or self._writer.done()):
+            self._writer = asyncio.ensure_future(self.async_flush())
+
+    async def async_flush(self) -> None:
+        """Write all buffered records."""
+        records, self._buffer = self._buffer, bytearray()
+        self._last_flush = time.monotonic()
+        if records:
+            await self._executor(self.write, records)
+
+    def write(self, records: bytes) -> None:
+        """Append records to the current segment, runs in the executor.
+
+        A new segment is started when the current one is full, and then the
+        segments older than the retention are deleted.
+        """
+        with self._lock:
+            if not self._segments or self._size + len(records) > self.segment_bytes:
+                start = _TIMESTAMP.unpack_from(records)[0]
+                self._start_segment(start)
+                self._expire(start)
+            with self._segments[-1].path.open("ab") as file:
+                file.write(records)
+            self._size += len(records)
+
+    def _start_segment(self, start: float) -> None:
+        name = int(start * 1000)
+        if self._segments:
+            # Names must increase, even for a segment started in the same millisecond
+            name = max(name, int(self._segments[-1].start * 1000) + 1)
+        segment = _Segment(self.directory / f"{name:013d}{_SUFFIX}", name / 1000)
+        with segment.path.open("xb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, self.layout, _RECORDS[self.layout].size))
+        segment.layout = self.layout
+        self._segments.append(segment)
+        self._size = _HEADER.size
+
+    def _expire(self, now: float) -> None:
+        """Delete the segments whose records are all older than the retention at `now`.
+
+        The time is the one of the records, so replays with simulated time expire alike.
+        """
+        cutoff = now - self.retention
+        # A segment ends where the next one starts
+        while len(self._segments) > 1 and self._segments[1].start < cutoff:
+            self._segments.pop(0).path.unlink(missing_ok=True)
+
+    def read(self, start: float, end: float) -> list[tuple[int, memoryview]]:
+        """Return the written records with `start` <= timestamp < `end`, runs in the executor.
+
+        The records are returned as (layout, view) pairs, one per segment, the
+        views point into the mappings of the segments. Decode them with
+        `iter_records`, or e.g. with numpy.frombuffer.
+        """
+        found = []
+        with self._lock:
+            segments = list(self._segments)
+        for index, segment in enumerate(segments):
+            if index + 1 < len(segments) and segments[index + 1].start <= start:
+                continue
+            if segment.start >= end:
+                break
+            if (records := segment.records()) is None:
+                continue
+            layout, records = records
+            size = _RECORDS[layout].size
+            first = _bisect(records, size, start)
+            last = _bisect(records, size, end)
+            if first < last:
+                found.append((layout, records[first * size : last * size]))
+        return found
+
+    async def async_close(self) -> None:
+        """Write the remaining records."""
+        if self._writer is not None:
+            await self._writer
+        await self.async_flush()
+
+
+def _bisect(records: memoryview, size: int, timestamp: float) -> int:
+    """Return the index of the first record at or after the timestamp."""
+    low, high = 0, len(records) // size
+    while low < high:
+        middle = (low + high) // 2
+        if _TIMESTAMP.unpack_from(records, middle * size)[0] < timestamp:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def iter_records(layout: int, records: memoryview) -> Iterator[tuple]:
+    """Iterate the fields of the records returned by `SampleStore.read`."""
+    return _RECORDS[layout].iter_unpack(records)
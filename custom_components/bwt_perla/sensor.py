@@ -1,45 +1,61 @@
 """BWT Sensors."""
-from bwt_api.api import BwtApi, BwtSmartDosApi
 from bwt_api.bwt import BwtModel
-from bwt_api.exception import WrongCodeException
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
+    SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     PERCENTAGE,
     UnitOfMass,
-    UnitOfTime,
     UnitOfVolume,
+    UnitOfVolumeFlowRate,
 )
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.importlib import async_import_module
 
-from .const import DOMAIN
+from .const import CONF_SITE, DATA_SITE, DOMAIN
 from .coordinator import BwtCoordinator
-from .sensors.base import *
-from .sensors.error import *
+from .sensors.base import (
+    BwtEntity,
+    CalculatedWaterSensor,
+    CurrentFlowSensor,
+    SimpleSensor,
+    TotalOutputSensor,
+    UnitSensor,
+    flow_filter,
+    volume_filter,
+)
+from .sensors.baseline import UsageBaselineSensor
+from .sensors.flow_statistics import FlowStatisticSensor
+from .sensors.polling import PollCadenceSensor, PollTimeoutsSensor, RejectedSamplesSensor
+from .sensors.salt import LastSaltRefillSensor, SaltAccountSensor
+from .sensors.site import SiteSensor
 
 _GLASS = "mdi:cup-water"
+_FAUCET = "mdi:faucet"
 _COUNTER = "mdi:counter"
-_WRENCH_CLOCK = "mdi:wrench-clock"
-_WRENCH_PERSON = "mdi:account-wrench"
 _WATER_PLUS = "mdi:water-plus"
-_WATER_MINUS = "mdi:water-minus"
 _PERCENTAGE = "mdi:percent"
-_DAYS_LEFT = "mdi:sort-numeric-descending-variant"
 _MASS = "mdi:weight"
-_TIME = "mdi:calendar-clock"
 _DAY = "mdi:calendar-today"
-_MONTH = "mdi:calendar-month"
-_YEAR = "mdi:calendar-blank-multiple"
 _OIL_LEVEL = "mdi:oil-level"
 _WATER = "mdi:water"
-_WATER_CHECK = "mdi:water-check"
-_UNKNOWN = "mdi:help-circle"
+_CHART = "mdi:chart-bell-curve"
+_ALERT = "mdi:water-alert"
+
+# Entity modules of the models, imported only for the model of the entry
+_MODEL_MODULES = {
+    BwtModel.PERLA_LOCAL_API: "local",
+    BwtModel.PERLA_SILK: "silk",
+    BwtModel.SMART_DOS: "smartdos",
+}
+
+# Not among the units of Home Assistant
+_GRAMS_PER_CUBIC_METER = "g/m³"
 
 
 async def async_setup_entry(
@@ -48,19 +64,11 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up bwt sensors from config entry."""
-    my_api = hass.data[DOMAIN][config_entry.entry_id]
-    if isinstance(my_api, BwtApi):
-        model = BwtModel.PERLA_LOCAL_API
-    elif isinstance(my_api, BwtSmartDosApi):
-        model = BwtModel.SMART_DOS
-    else:
-        model = BwtModel.PERLA_SILK
-    coordinator = BwtCoordinator(hass, my_api, model)
-
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except WrongCodeException as e:
-        raise ConfigEntryAuthFailed from e
+    if config_entry.data.get(CONF_SITE):
+        async_add_entities(_site_entities(hass, config_entry))
+        return
+    coordinator: BwtCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    model = coordinator.model
 
     model_suffix = coordinator.get_model_suffix()
     device_info = DeviceInfo(
@@ -78,350 +86,251 @@ async def async_setup_entry(
         via_device=None,
     )
 
-    # Build base entity list: SmartDos has its own set, Perla models share common ones
     if model == BwtModel.SMART_DOS:
-        # SmartDos: only add model-specific entities, skip unsupported common ones
+        # SmartDos: skip the entities of the Perla models, it has its own set
         entities = []
     else:
-        # Perla Local API and Silk: add supported common entities
-        entities = [
-            TotalOutputSensor(coordinator, device_info, config_entry.entry_id),
-            SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "hardness_in",
-                lambda data: data.hardness_in(),
-                _WATER_PLUS,
-            ),
-            UnitSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "regenerativ_level",
-                lambda data: data.regenerativ_level(),
-                PERCENTAGE,
-                _PERCENTAGE,
-            ),
-            CalculatedWaterSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "day_output",
-                lambda data: data.day_output(),
-                _DAY,
-            ),
-            CurrentFlowSensor(coordinator, device_info, config_entry.entry_id),
-            UnitSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "capacity_1",
-                lambda data: data.capacity_1(),
-                UnitOfVolume.LITERS,
-                _GLASS,
-                0,
-            ),
-            SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "counter_regeneration_1",
-                lambda data: data.regeneration_count_1(),
-                _COUNTER,
-            ),
-        ]
+        entities = _perla_entities(coordinator, device_info, config_entry)
+    # Only the module of the configured model is imported, on first use
+    module = await async_import_module(hass, f"{__package__}.sensors.{_MODEL_MODULES[model]}")
+    entities.extend(module.entities(coordinator, device_info, config_entry))
 
-    if model == BwtModel.PERLA_LOCAL_API:
-        entities.append(
-            ErrorSensor(coordinator, device_info, config_entry.entry_id)
-        )
-        entities.append(
-            WarningSensor(coordinator, device_info, config_entry.entry_id)
-        )
-        entities.append(
-            SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "hardness_out",
-                lambda data: data.hardness_out(),
-                _WATER_MINUS,
-            )
-        )
-        entities.append(
-            DeviceClassSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "technician_service",
-                lambda data: data.service_technician(),
-                SensorDeviceClass.TIMESTAMP,
-                _WRENCH_PERSON,
-            )
-        )
-        entities.append(
-            StateSensor(coordinator, device_info, config_entry.entry_id)
-        )
-        entities.append(
-            UnitSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "regenerativ_days",
-                lambda data: data.regenerativ_days(),
-                UnitOfTime.DAYS,
-                _DAYS_LEFT,
-            )
-        )
+    if coordinator.salt_account is not None:
         entities.append(
-            UnitSensor(
+            SaltAccountSensor(
                 coordinator,
                 device_info,
                 config_entry.entry_id,
-                "regenerativ_mass",
-                lambda data: data.regenerativ_total(),
+                "salt_per_regeneration",
+                lambda account: account.salt_per_regeneration,
                 UnitOfMass.GRAMS,
                 _MASS,
             )
         )
         entities.append(
-            HolidayModeSensor(coordinator, device_info, config_entry.entry_id)
-        )
-        entities.append(
-            HolidayStartSensor(coordinator, device_info,
-                               config_entry.entry_id),
-        )
-        entities.append(
-            CalculatedWaterSensor(
+            SaltAccountSensor(
                 coordinator,
                 device_info,
                 config_entry.entry_id,
-                "month_output",
-                lambda data: data.month_output(),
-                _MONTH,
+                "salt_per_m3",
+                lambda account: account.salt_per_cubic_meter,
+                _GRAMS_PER_CUBIC_METER,
+                _MASS,
             )
         )
         entities.append(
-            CalculatedWaterSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "year_output",
-                lambda data: data.year_output(),
-                _YEAR,
-            )
+            LastSaltRefillSensor(coordinator, device_info, config_entry.entry_id)
         )
-        entities.append(
-            DeviceClassSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-               "customer_service",
-                lambda data: data.customer_service(),
-                SensorDeviceClass.TIMESTAMP,
-                _WRENCH_CLOCK,
-            )
+
+    # Usage of the current hour against the baseline learned for this hour of the week
+    entities.append(
+        UsageBaselineSensor(
+            coordinator,
+            device_info,
+            config_entry.entry_id,
+            "usage_percentile",
+            lambda baseline: baseline.percentile(),
+            PERCENTAGE,
+            _CHART,
+            0,
         )
-        entities.append(DeviceClassSensor(
+    )
+    entities.append(
+        UsageBaselineSensor(
             coordinator,
             device_info,
             config_entry.entry_id,
-            "last_regeneration_1",
-            lambda data: data.last_regeneration_1(),
-            SensorDeviceClass.TIMESTAMP,
-            _TIME,
-        ))
-        if coordinator.data.columns() == 2:
-            entities.append(UnitSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "capacity_2",
-                lambda data: data.capacity_2(),
-                UnitOfVolume.LITERS,
-                _GLASS,
-                0,
-            ))
-            entities.append(DeviceClassSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "last_regeneration_2",
-                lambda data: data.last_regeneration_2(),
-                SensorDeviceClass.TIMESTAMP,
-                _TIME,
-            ))
-            entities.append(SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "counter_regeneration_2",
-                lambda data: data.regeneration_count_2(),
-                _COUNTER,
-            ))
+            "usage_anomaly",
+            lambda baseline: baseline.anomaly_score(),
+            None,
+            _ALERT,
+            1,
+        )
+    )
 
-        if coordinator.data.dosing_total() > 0:
-            entities.append(
-                UnitSensor(
-                    coordinator,
-                    device_info,
-                    config_entry.entry_id,
-                    "dosing_total",
-                    lambda data: data.dosing_total(),
-                    UnitOfVolume.MILLILITERS,
-                    _OIL_LEVEL,
-                )
-            )
+    # Rolling flow statistics, updated in constant time per sample
+    entities.extend(_flow_statistics(coordinator, device_info, config_entry.entry_id))
 
-    elif model == BwtModel.SMART_DOS:
-        entities.append(
-            SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "state",
-                lambda data: data.device_state(),
-                _WATER_CHECK,
-            )
-        )
-        entities.append(
-            SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "warnings",
-                lambda data: data.active_states(),
-                _UNKNOWN,
-            )
-        )
-        entities.append(
-            SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "comm_date",
-                lambda data: data.comm_date(),
-                _TIME,
-            )
-        )
-        entities.append(
-            UnitSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "capacity_1",
-                lambda data: data.capacity_1(),
-                UnitOfVolume.LITERS,
-                _GLASS,
-                0,
-            )
-        )
-        entities.append(
-            UnitSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "remaining_capacity_pct",
-                lambda data: data.remaining_capacity_pct(),
-                PERCENTAGE,
-                _PERCENTAGE,
-                0,
-            )
-        )
-        entities.append(
-            UnitSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "remaining_capacity_days",
-                lambda data: data.remaining_capacity_days(),
-                UnitOfTime.DAYS,
-                _DAYS_LEFT,
-            )
-        )
-        entities.append(
-            SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "dosing_rate",
-                lambda data: data.dosing_rate(),
-                _OIL_LEVEL,
-            )
-        )
-        entities.append(
-            UnitSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "substance_dosage",
-                lambda data: data.substance_dosage(),
-                UnitOfVolume.MILLILITERS,
-                _OIL_LEVEL,
-            )
-        )
-        entities.append(
-            SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "wifi_ssid",
-                lambda data: data.wifi_ssid(),
-                _UNKNOWN,
-            )
-        )
-        entities.append(
-            SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "wifi_rssi",
-                lambda data: data.wifi_rssi(),
-                _WATER,
-            )
-        )
-    elif model == BwtModel.PERLA_SILK:
+    # Diagnostics of the polling: the achieved cadence, the timed out requests
+    # and the samples rejected as implausible
+    entities.append(PollCadenceSensor(coordinator, device_info, config_entry.entry_id))
+    entities.append(PollTimeoutsSensor(coordinator, device_info, config_entry.entry_id))
+    entities.append(RejectedSamplesSensor(coordinator, device_info, config_entry.entry_id))
+
+    async_add_entities(entities)
+
+
+def _perla_entities(
+    coordinator: BwtCoordinator, device_info: DeviceInfo, config_entry: ConfigEntry
+) -> list[BwtEntity]:
+    """Create the entities the Perla local API and Silk share."""
+    entry_id = config_entry.entry_id
+    return [
+        TotalOutputSensor(coordinator, device_info, entry_id),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "hardness_in",
+            lambda data: data.hardness_in(),
+            _WATER_PLUS,
+        ),
+        UnitSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "regenerativ_level",
+            lambda data: data.regenerativ_level(),
+            PERCENTAGE,
+            _PERCENTAGE,
+        ),
+        CalculatedWaterSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "day_output",
+            lambda data: data.day_output(),
+            _DAY,
+            volume_filter(config_entry.options),
+        ),
+        CurrentFlowSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            flow_filter(config_entry.options),
+        ),
+        UnitSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "capacity_1",
+            lambda data: data.capacity_1(),
+            UnitOfVolume.LITERS,
+            _GLASS,
+            0,
+        ),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "counter_regeneration_1",
+            lambda data: data.regeneration_count_1(),
+            _COUNTER,
+        ),
+    ]
+
+
+def _flow_statistics(
+    coordinator: BwtCoordinator, device_info: DeviceInfo, entry_id: str
+) -> list[FlowStatisticSensor]:
+    """Create the rolling mean and peak flows and the water of the last hour."""
+    statistics = coordinator.flow_statistics
+    windows = (("1m", statistics.minute), ("15m", statistics.quarter), ("1h", statistics.hour))
+    entities = []
+    for suffix, window in windows:
+        # HA only has m3 / h, the devices report l/h
         entities.append(
-            DeviceClassSensor(
+            FlowStatisticSensor(
                 coordinator,
                 device_info,
-                config_entry.entry_id,
-               "next_customer_service",
-                lambda data: data.next_customer_service(),
-                SensorDeviceClass.TIMESTAMP,
-                _WRENCH_CLOCK,
+                entry_id,
+                f"flow_mean_{suffix}",
+                lambda statistics, now, window=window: _per_mille(window.mean(now)),
+                UnitOfVolumeFlowRate.CUBIC_METERS_PER_HOUR,
+                _FAUCET,
+                SensorDeviceClass.VOLUME_FLOW_RATE,
+                3,
             )
         )
         entities.append(
-            SimpleSensor(
+            FlowStatisticSensor(
                 coordinator,
                 device_info,
-                config_entry.entry_id,
-                "days_in_service",
-                lambda data: data.days_in_service(),
-                _COUNTER,
+                entry_id,
+                f"flow_peak_{suffix}",
+                lambda statistics, now, window=window: _per_mille(statistics.peak(window)),
+                UnitOfVolumeFlowRate.CUBIC_METERS_PER_HOUR,
+                _FAUCET,
+                SensorDeviceClass.VOLUME_FLOW_RATE,
+                3,
             )
         )
-        entities.append(
-            SimpleSensor(
-                coordinator,
-                device_info,
-                config_entry.entry_id,
-                "warranty_end",
-                lambda data: data.warranty_end(),
-                _WRENCH_PERSON,
-            )
+    entities.append(
+        FlowStatisticSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "volume_1h",
+            lambda statistics, now: statistics.hour.volume(now),
+            UnitOfVolume.LITERS,
+            _GLASS,
+            # A rolling volume is no water meter for the energy dashboard
+            None,
+            0,
         )
-        for index in [0, 1, 5, 6, 9, 12, 20, 21, 22, 24, 29, 32, 33, 35, 36, 37, 38, 39, 40, 41, 42, 44, 45, 46, 47]:
-            entities.append(
-                UnknownSensor(
-                    coordinator,
-                    device_info,
-                    config_entry.entry_id,
-                    index
-                )
-            )
+    )
+    return entities
 
-    async_add_entities(entities)
 
+def _per_mille(value: float | None) -> float | None:
+    return None if value is None else value / 1000.0
+
+
+def _site_entities(hass: HomeAssistant, config_entry: ConfigEntry) -> list[SiteSensor]:
+    """Create the totals of the site on its virtual device."""
+    aggregate = hass.data[DATA_SITE]
+    device_info = DeviceInfo(
+        identifiers={(DOMAIN, config_entry.entry_id)},
+        manufacturer="BWT",
+        model="Site",
+        name=config_entry.title,
+    )
+    entry_id = config_entry.entry_id
+    return [
+        SiteSensor(
+            aggregate,
+            device_info,
+            entry_id,
+            "site_current_flow",
+            # HA only has m3 / h, the devices report l/h
+            lambda site: site.current_flow / 1000.0,
+            UnitOfVolumeFlowRate.CUBIC_METERS_PER_HOUR,
+            _FAUCET,
+            SensorDeviceClass.VOLUME_FLOW_RATE,
+            SensorStateClass.MEASUREMENT,
+            3,
+        ),
+        SiteSensor(
+            aggregate,
+            device_info,
+            entry_id,
+            "site_total_output",
+            lambda site: site.total_output,
+            UnitOfVolume.LITERS,
+            _WATER,
+            SensorDeviceClass.WATER,
+            SensorStateClass.TOTAL_INCREASING,
+        ),
+        SiteSensor(
+            aggregate,
+            device_info,
+            entry_id,
+            "site_day_output",
+            lambda site: site.day_output,
+            UnitOfVolume.LITERS,
+            _DAY,
+            SensorDeviceClass.WATER,
+            SensorStateClass.TOTAL_INCREASING,
+        ),
+        SiteSensor(
+            aggregate,
+            device_info,
+            entry_id,
+            "site_regenerativ_level",
+            lambda site: site.min_level,
+            PERCENTAGE,
+            _OIL_LEVEL,
+            None,
+            SensorStateClass.MEASUREMENT,
+        ),
+    ]
@@ -1,12 +1,7 @@
-
-from datetime import datetime
-
 import logging
 
 from bwt_api.api import treated_to_blended
-from bwt_api.data import BwtStatus
 
-from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
@@ -21,20 +16,49 @@ from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 
-from ..const import DOMAIN
-from ..coordinator import BwtCoordinator
+from ..const import (
+    CONF_FLOW_DEADBAND,
+    CONF_FLOW_DEADBAND_PERCENT,
+    CONF_FLOW_MIN_INTERVAL,
+    CONF_VOLUME_DEADBAND,
+    CONF_VOLUME_MIN_INTERVAL,
+    DEFAULT_DEADBAND,
+    DEFAULT_MIN_INTERVAL,
+    DOMAIN,
+)
+from ..coordinator import BwtCoordinator, UpdateLane
+from ..deadband import WriteFilter
 
 _LOGGER = logging.getLogger(__name__)
 
 _FAUCET = "mdi:faucet"
 _WATER = "mdi:water"
-_WATER_CHECK = "mdi:water-check"
-_HOLIDAY = "mdi:location-exit"
-_UNKNOWN = "mdi:help-circle"
+
+
+def flow_filter(options) -> WriteFilter:
+    """Create the write filter of the flow sensor from the entry options."""
+    return WriteFilter(
+        options.get(CONF_FLOW_DEADBAND, DEFAULT_DEADBAND),
+        options.get(CONF_FLOW_DEADBAND_PERCENT, DEFAULT_DEADBAND),
+        options.get(CONF_FLOW_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+    )
+
+
+def volume_filter(options) -> WriteFilter:
+    """Create the write filter of a calculated water sensor from the entry options."""
+    return WriteFilter(
+        options.get(CONF_VOLUME_DEADBAND, DEFAULT_DEADBAND),
+        0,
+        options.get(CONF_VOLUME_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+    )
+
 
 class BwtEntity(CoordinatorEntity[BwtCoordinator]):
     """General bwt entity with common properties."""
 
+    # Entities following the water flow override this with UpdateLane.FLOW.
+    _update_lane = UpdateLane.SLOW
+
     def __init__(
         self,
         coordinator: BwtCoordinator,
@@ -43,12 +67,22 @@ class BwtEntity(CoordinatorEntity[BwtCoordinator]):
         key: str,
     ) -> None:
         """Initialize the common properties."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, self._update_lane)
         self._attr_device_info = device_info
         self._attr_translation_key = key
         self._attr_has_entity_name = True
         self.entity_id = f"sensor.{DOMAIN}_{key}"
         self._attr_unique_id = entry_id + "_" + key
+        self._written_available = True
+
+    @callback
+    def _should_write(self, write_filter: WriteFilter, value, flowing: bool) -> bool:
+        """Return if the filtered value or the availability changed enough to write."""
+        significant = write_filter.should_write(value, flowing, self.coordinator.monotonic())
+        available = self.available
+        changed = available != self._written_available
+        self._written_available = available
+        return significant or changed
 
 
 class TotalOutputSensor(BwtEntity, SensorEntity):
@@ -58,6 +92,7 @@ class TotalOutputSensor(BwtEntity, SensorEntity):
     _attr_native_unit_of_measurement = UnitOfVolume.LITERS
     _attr_device_class = SensorDeviceClass.WATER
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _update_lane = UpdateLane.FLOW
 
     def __init__(self, coordinator, device_info, entry_id) -> None:
         """Initialize the sensor with the common coordinator."""
@@ -79,18 +114,32 @@ class CurrentFlowSensor(BwtEntity, SensorEntity):
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_device_class = SensorDeviceClass.VOLUME_FLOW_RATE
     _attr_icon = _FAUCET
+    _update_lane = UpdateLane.FLOW
 
-    def __init__(self, coordinator, device_info, entry_id) -> None:
+    def __init__(
+        self,
+        coordinator,
+        device_info,
+        entry_id,
+        write_filter: WriteFilter | None = None,
+    ) -> None:
         """Initialize the sensor with the common coordinator."""
         super().__init__(coordinator, device_info, entry_id, "current_flow")
-        self._attr_native_value = coordinator.data.current_flow() / 1000.0
+        self._write_filter = write_filter or WriteFilter()
+        flow = coordinator.data.current_flow()
+        self._write_filter.should_write(flow, flow > 0, self.coordinator.monotonic())
+        self._attr_native_value = flow / 1000.0
         self._attr_suggested_display_precision = 3
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        # The filter works on l/h, so the deadband is configured in the device unit
+        flow = self.coordinator.data.current_flow()
+        if not self._should_write(self._write_filter, flow, flow > 0):
+            return
         # HA only has m3 / h, we get the values in l/h
-        self._attr_native_value = self.coordinator.data.current_flow() / 1000.0
+        self._attr_native_value = flow / 1000.0
         self.async_write_ha_state()
 
 
@@ -158,75 +207,11 @@ class UnitSensor(SimpleSensor):
         self._attr_suggested_display_precision = display_precision
 
 
-class StateSensor(BwtEntity, SensorEntity):
-    """State of the machine."""
-
-    _attr_device_class = SensorDeviceClass.ENUM
-    _attr_options = list(BwtStatus.__members__)
-    _attr_icon = _WATER_CHECK
-
-    def __init__(self, coordinator, device_info: DeviceInfo, entry_id: str) -> None:
-        """Initialize the sensor with the common coordinator."""
-        super().__init__(coordinator, device_info, entry_id, "state")
-        self._attr_native_value = self.coordinator.data.state().name
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_native_value = self.coordinator.data.state().name
-        self.async_write_ha_state()
-
-
-class HolidayModeSensor(BwtEntity, BinarySensorEntity):
-    """Current holiday mode state."""
-
-    _attr_icon = _HOLIDAY
-
-    def __init__(self, coordinator, device_info: DeviceInfo, entry_id: str) -> None:
-        """Initialize the sensor with the common coordinator."""
-        super().__init__(coordinator, device_info, entry_id, "holiday_mode")
-        self._attr_is_on = self.coordinator.data.holiday_mode() == 1
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_is_on = self.coordinator.data.holiday_mode() == 1
-        self.async_write_ha_state()
-
-
-class HolidayStartSensor(BwtEntity, SensorEntity):
-    """Future start of holiday mode if active."""
-
-    _attr_device_class = SensorDeviceClass.TIMESTAMP
-    _attr_icon = _HOLIDAY
-
-    def __init__(self, coordinator, device_info: DeviceInfo, entry_id: str) -> None:
-        """Initialize the sensor with the common coordinator."""
-        super().__init__(coordinator, device_info, entry_id, "holiday_mode_start")
-        holiday_mode = self.coordinator.data.holiday_mode()
-        if holiday_mode > 1:
-            self._attr_native_value = datetime.fromtimestamp(
-                holiday_mode
-            )
-        else:
-            self._attr_native_value = None
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        holiday_mode = self.coordinator.data.holiday_mode()
-        if holiday_mode > 1:
-            self._attr_native_value = datetime.fromtimestamp(
-                holiday_mode
-            )
-        else:
-            self._attr_native_value = None
-        self.async_write_ha_state()
-
-
 class CalculatedWaterSensor(BwtEntity, SensorEntity):
     """Sensor calculating blended water from treated water."""
 
+    _update_lane = UpdateLane.FLOW
+
     def __init__(
         self,
         coordinator,
@@ -235,6 +220,7 @@ class CalculatedWaterSensor(BwtEntity, SensorEntity):
         key: str,
         extract,
         icon: str,
+        write_filter: WriteFilter | None = None,
     ) -> None:
         """Initialize the sensor with the common coordinator."""
         super().__init__(coordinator, device_info, entry_id, key)
@@ -243,36 +229,21 @@ class CalculatedWaterSensor(BwtEntity, SensorEntity):
         self._attr_device_class = SensorDeviceClass.WATER
         self._attr_icon = icon
         self._extract = extract
+        self._write_filter = write_filter or WriteFilter()
         self.suggested_display_precision = 0
         self._attr_native_value = self._extract(self.coordinator.data)
+        self._write_filter.should_write(
+            self._attr_native_value,
+            self.coordinator.data.current_flow() > 0,
+            self.coordinator.monotonic(),
+        )
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self._attr_native_value = self._extract(self.coordinator.data)
-        self.async_write_ha_state()
-
-
-
-class UnknownSensor(BwtEntity, SensorEntity):
-    """Unknown sensor for debugging."""
-
-    def __init__(
-        self,
-        coordinator: BwtCoordinator,
-        device_info: DeviceInfo,
-        entry_id: str,
-        index: int,
-    ) -> None:
-        """Initialize the sensor with the common coordinator."""
-        super().__init__(coordinator, device_info, entry_id, f"silk_register_{index}")
-        self._index = index
-        self._attr_icon = _UNKNOWN
-        self._attr_native_value = coordinator.data.get_register(index)
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_native_value = self.coordinator.data.get_register(self._index)
+        value = self._extract(self.coordinator.data)
+        flowing = self.coordinator.data.current_flow() > 0
+        if not self._should_write(self._write_filter, value, flowing):
+            return
+        self._attr_native_value = value
         self.async_write_ha_state()
-        
@@ -0,0 +1,64 @@
+"""Entities comparing the usage with the learned usage baseline."""
+from collections.abc import Callable
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..coordinator import BwtCoordinator
+from ..usage_baseline import UsageBaseline
+from .base import BwtEntity
+
+
+class UsageBaselineSensor(BwtEntity, SensorEntity):
+    """Usage of the current hour relative to the usual usage of this hour of the week."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: BwtCoordinator,
+        device_info: DeviceInfo,
+        entry_id: str,
+        key: str,
+        extract: Callable[[UsageBaseline], float | None],
+        unit: str | None,
+        icon: str,
+        precision: int,
+    ) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, key)
+        self._extract = extract
+        self._precision = precision
+        self._attr_native_unit_of_measurement = unit
+        self._attr_suggested_display_precision = precision
+        self._attr_icon = icon
+        self._attr_native_value, self._attr_extra_state_attributes = self._state()
+
+    def _state(self) -> tuple[float | None, dict]:
+        """Return the rounded value and the quantiles of the hour."""
+        baseline = self.coordinator.usage_baseline
+        value = self._extract(baseline)
+        if value is not None:
+            value = round(value, self._precision)
+        quantiles = baseline.quantiles()
+        attributes = {}
+        if quantiles is not None:
+            attributes = {"median": round(quantiles[0]), "p90": round(quantiles[1])}
+        return value, attributes
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the rounded value, quantiles or availability changed."""
+        value, attributes = self._state()
+        available = self.available
+        if (
+            value == self._attr_native_value
+            and attributes == self._attr_extra_state_attributes
+            and available == self._written_available
+        ):
+            return
+        self._written_available = available
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = attributes
+        self.async_write_ha_state()
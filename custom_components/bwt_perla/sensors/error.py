@@ -50,6 +50,8 @@ class ErrorSensor(TranslatableErrorMixin, BwtEntity, SensorEntity):
     """Errors reported by the device."""
 
     _attr_icon = _ERROR
+    # The raw codes are only meant for automations, the state holds the same errors
+    _unrecorded_attributes = frozenset({"error_codes"})
 
     def __init__(self, coordinator, device_info, entry_id) -> None:
         """Initialize the sensor with the common coordinator."""
@@ -90,6 +92,8 @@ class WarningSensor(TranslatableErrorMixin, BwtEntity, SensorEntity):
     """Warnings reported by the device."""
 
     _attr_icon = _WARNING
+    # The raw codes are only meant for automations, the state holds the same warnings
+    _unrecorded_attributes = frozenset({"warning_codes"})
 
     def __init__(self, coordinator, device_info, entry_id) -> None:
         """Initialize the sensor with the common coordinator."""
@@ -0,0 +1,58 @@
+"""Entities of the rolling flow statistics of the coordinator."""
+from collections.abc import Callable
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..coordinator import BwtCoordinator, UpdateLane
+from ..flow_window import FlowStatistics
+from .base import BwtEntity
+
+
+class FlowStatisticSensor(BwtEntity, SensorEntity):
+    """A rolling flow statistic, written when its rounded value changed."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _update_lane = UpdateLane.FLOW
+
+    def __init__(
+        self,
+        coordinator: BwtCoordinator,
+        device_info: DeviceInfo,
+        entry_id: str,
+        key: str,
+        extract: Callable[[FlowStatistics, float], float | None],
+        unit: str,
+        icon: str,
+        device_class: str | None,
+        precision: int,
+    ) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, key)
+        self._extract = extract
+        self._precision = precision
+        self._attr_native_unit_of_measurement = unit
+        self._attr_suggested_display_precision = precision
+        self._attr_icon = icon
+        self._attr_device_class = device_class
+        self._attr_native_value = self._value()
+
+    def _value(self) -> float | None:
+        """Return the statistic at the time of the last sample, rounded."""
+        statistics = self.coordinator.flow_statistics
+        if statistics.last_time is None:
+            return None
+        value = self._extract(statistics, statistics.last_time)
+        return None if value is None else round(value, self._precision)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the rounded value or availability changed."""
+        value = self._value()
+        available = self.available
+        if value == self._attr_native_value and available == self._written_available:
+            return
+        self._written_available = available
+        self._attr_native_value = value
+        self.async_write_ha_state()
@@ -0,0 +1,26 @@
+"""Holiday mode entity of the Perla with the local API."""
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..const import DOMAIN
+from ..coordinator import BwtCoordinator
+from .base import BwtEntity
+
+
+class HolidayModeSensor(BwtEntity, BinarySensorEntity):
+    """Current holiday mode state."""
+
+    _attr_icon = "mdi:location-exit"
+
+    def __init__(self, coordinator: BwtCoordinator, device_info: DeviceInfo, entry_id: str) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, "holiday_mode")
+        self.entity_id = f"binary_sensor.{DOMAIN}_holiday_mode"
+        self._attr_is_on = self.coordinator.data.holiday_mode() == 1
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._attr_is_on = self.coordinator.data.holiday_mode() == 1
+        self.async_write_ha_state()
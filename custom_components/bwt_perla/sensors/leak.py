@@ -0,0 +1,41 @@
+"""Leak detection entity."""
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..const import DOMAIN
+from ..coordinator import BwtCoordinator, UpdateLane
+from .base import BwtEntity
+
+
+class LeakSensor(BwtEntity, BinarySensorEntity):
+    """Water flowing suspiciously long or much, see LeakDetector."""
+
+    _attr_device_class = BinarySensorDeviceClass.MOISTURE
+    _update_lane = UpdateLane.FLOW
+
+    def __init__(self, coordinator: BwtCoordinator, device_info: DeviceInfo, entry_id: str) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, "leak")
+        self.entity_id = f"binary_sensor.{DOMAIN}_leak"
+        self._attr_is_on = coordinator.leak_detector.suspected
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the suspicion or the availability changed."""
+        detector = self.coordinator.leak_detector
+        available = self.available
+        if detector.suspected == self._attr_is_on and available == self._written_available:
+            return
+        self._written_available = available
+        self._attr_is_on = detector.suspected
+        # The flow when the suspicion was raised, not updated while it lasts
+        self._attr_extra_state_attributes = {
+            "duration": round(detector.duration(self.coordinator.monotonic()) / 60),
+            "volume": round(detector.volume),
+            "minimum_flow": detector.minimum_flow,
+        }
+        self.async_write_ha_state()
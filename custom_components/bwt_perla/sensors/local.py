@@ -0,0 +1,213 @@
+"""Entities of the Perla with the local API, loaded only for that model."""
+from datetime import datetime
+
+from bwt_api.data import BwtStatus
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfMass, UnitOfTime, UnitOfVolume
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..coordinator import BwtCoordinator
+from .base import (
+    BwtEntity,
+    CalculatedWaterSensor,
+    DeviceClassSensor,
+    SimpleSensor,
+    UnitSensor,
+    volume_filter,
+)
+from .error import ErrorSensor, WarningSensor
+from .regeneration import NextRegenerationSensor
+
+_GLASS = "mdi:cup-water"
+_COUNTER = "mdi:counter"
+_WRENCH_CLOCK = "mdi:wrench-clock"
+_WRENCH_PERSON = "mdi:account-wrench"
+_WATER_MINUS = "mdi:water-minus"
+_WATER_CHECK = "mdi:water-check"
+_DAYS_LEFT = "mdi:sort-numeric-descending-variant"
+_MASS = "mdi:weight"
+_TIME = "mdi:calendar-clock"
+_MONTH = "mdi:calendar-month"
+_YEAR = "mdi:calendar-blank-multiple"
+_OIL_LEVEL = "mdi:oil-level"
+_HOLIDAY = "mdi:location-exit"
+
+
+class StateSensor(BwtEntity, SensorEntity):
+    """State of the machine."""
+
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = list(BwtStatus.__members__)
+    _attr_icon = _WATER_CHECK
+
+    def __init__(self, coordinator, device_info: DeviceInfo, entry_id: str) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, "state")
+        self._attr_native_value = self.coordinator.data.state().name
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._attr_native_value = self.coordinator.data.state().name
+        self.async_write_ha_state()
+
+
+class HolidayStartSensor(BwtEntity, SensorEntity):
+    """Future start of holiday mode if active."""
+
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_icon = _HOLIDAY
+
+    def __init__(self, coordinator, device_info: DeviceInfo, entry_id: str) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, "holiday_mode_start")
+        holiday_mode = self.coordinator.data.holiday_mode()
+        if holiday_mode > 1:
+            self._attr_native_value = datetime.fromtimestamp(
+                holiday_mode
+            )
+        else:
+            self._attr_native_value = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        holiday_mode = self.coordinator.data.holiday_mode()
+        if holiday_mode > 1:
+            self._attr_native_value = datetime.fromtimestamp(
+                holiday_mode
+            )
+        else:
+            self._attr_native_value = None
+        self.async_write_ha_state()
+
+
+def entities(
+    coordinator: BwtCoordinator, device_info: DeviceInfo, config_entry: ConfigEntry
+) -> list[BwtEntity]:
+    """Create the entities only the local API provides."""
+    entry_id = config_entry.entry_id
+    entities = [
+        ErrorSensor(coordinator, device_info, entry_id),
+        WarningSensor(coordinator, device_info, entry_id),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "hardness_out",
+            lambda data: data.hardness_out(),
+            _WATER_MINUS,
+        ),
+        DeviceClassSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "technician_service",
+            lambda data: data.service_technician(),
+            SensorDeviceClass.TIMESTAMP,
+            _WRENCH_PERSON,
+        ),
+        StateSensor(coordinator, device_info, entry_id),
+        UnitSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "regenerativ_days",
+            lambda data: data.regenerativ_days(),
+            UnitOfTime.DAYS,
+            _DAYS_LEFT,
+        ),
+        UnitSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "regenerativ_mass",
+            lambda data: data.regenerativ_total(),
+            UnitOfMass.GRAMS,
+            _MASS,
+        ),
+        HolidayStartSensor(coordinator, device_info, entry_id),
+        CalculatedWaterSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "month_output",
+            lambda data: data.month_output(),
+            _MONTH,
+            volume_filter(config_entry.options),
+        ),
+        CalculatedWaterSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "year_output",
+            lambda data: data.year_output(),
+            _YEAR,
+            volume_filter(config_entry.options),
+        ),
+        DeviceClassSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "customer_service",
+            lambda data: data.customer_service(),
+            SensorDeviceClass.TIMESTAMP,
+            _WRENCH_CLOCK,
+        ),
+        DeviceClassSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "last_regeneration_1",
+            lambda data: data.last_regeneration_1(),
+            SensorDeviceClass.TIMESTAMP,
+            _TIME,
+        ),
+        NextRegenerationSensor(coordinator, device_info, entry_id, 1),
+    ]
+    if coordinator.data.columns() == 2:
+        entities.append(UnitSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "capacity_2",
+            lambda data: data.capacity_2(),
+            UnitOfVolume.LITERS,
+            _GLASS,
+            0,
+        ))
+        entities.append(DeviceClassSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "last_regeneration_2",
+            lambda data: data.last_regeneration_2(),
+            SensorDeviceClass.TIMESTAMP,
+            _TIME,
+        ))
+        entities.append(NextRegenerationSensor(coordinator, device_info, entry_id, 2))
+        entities.append(SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "counter_regeneration_2",
+            lambda data: data.regeneration_count_2(),
+            _COUNTER,
+        ))
+
+    if coordinator.data.dosing_total() > 0:
+        entities.append(
+            UnitSensor(
+                coordinator,
+                device_info,
+                entry_id,
+                "dosing_total",
+                lambda data: data.dosing_total(),
+                UnitOfVolume.MILLILITERS,
+                _OIL_LEVEL,
+            )
+        )
+    return entities
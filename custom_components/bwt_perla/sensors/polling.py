@@ -0,0 +1,100 @@
+"""Diagnostic entities of the polling itself."""
+from abc import abstractmethod
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..coordinator import BwtCoordinator
+from .base import BwtEntity
+
+_CADENCE = "mdi:timer-sync-outline"
+_TIMEOUT = "mdi:timer-alert-outline"
+_REJECTED = "mdi:filter-remove-outline"
+
+
+class PollingSensor(BwtEntity, SensorEntity):
+    """Base of the polling diagnostics, available while the device isn't."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    @property
+    def available(self) -> bool:
+        """Return True, the polling is diagnosed especially when it fails."""
+        return True
+
+    @abstractmethod
+    def _state(self) -> tuple[float | int | None, dict]:
+        """Return the value and the attributes of the current polling."""
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the value or the attributes changed."""
+        value, attributes = self._state()
+        if value == self._attr_native_value and attributes == self._attr_extra_state_attributes:
+            return
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = attributes
+        self.async_write_ha_state()
+
+
+class PollCadenceSensor(PollingSensor):
+    """Achieved seconds between polls, slower than planned when the device lags."""
+
+    _attr_icon = _CADENCE
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, coordinator: BwtCoordinator, device_info: DeviceInfo, entry_id: str) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, "poll_cadence")
+        self._attr_native_value, self._attr_extra_state_attributes = self._state()
+
+    def _state(self) -> tuple[float | None, dict]:
+        cadence = self.coordinator.poller.cadence
+        interval = self.coordinator.update_interval
+        return None if cadence is None else round(cadence, 1), {
+            "planned": None if interval is None else interval.seconds
+        }
+
+
+class PollTimeoutsSensor(PollingSensor):
+    """Requests that timed out, with the current timeout of every endpoint."""
+
+    _attr_icon = _TIMEOUT
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator: BwtCoordinator, device_info: DeviceInfo, entry_id: str) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, "poll_timeouts")
+        self._attr_native_value, self._attr_extra_state_attributes = self._state()
+
+    def _state(self) -> tuple[int, dict]:
+        poller = self.coordinator.poller
+        return poller.timeout_count, {
+            endpoint: round(timeout.timeout, 1)
+            for endpoint, timeout in poller.timeouts.items()
+        }
+
+
+class RejectedSamplesSensor(PollingSensor):
+    """Samples rejected as implausible, with the count of every reason."""
+
+    _attr_icon = _REJECTED
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator: BwtCoordinator, device_info: DeviceInfo, entry_id: str) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, "rejected_samples")
+        self._attr_native_value, self._attr_extra_state_attributes = self._state()
+
+    def _state(self) -> tuple[int, dict]:
+        validator = self.coordinator.poller.validator
+        return validator.rejected_count, dict(validator.rejected)
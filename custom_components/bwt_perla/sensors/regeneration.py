@@ -0,0 +1,48 @@
+"""Entities of the predicted regenerations of the columns."""
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..coordinator import BwtCoordinator
+from .base import BwtEntity
+
+_REGENERATION = "mdi:autorenew"
+
+
+class NextRegenerationSensor(BwtEntity, SensorEntity):
+    """Predicted time of the next regeneration of a column, to the minute."""
+
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_icon = _REGENERATION
+
+    def __init__(
+        self, coordinator: BwtCoordinator, device_info: DeviceInfo, entry_id: str, column: int
+    ) -> None:
+        """Initialize the sensor of the column (1 based) with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, f"next_regeneration_{column}")
+        self._column = column - 1
+        self._attr_native_value, self._attr_extra_state_attributes = self._state()
+
+    def _state(self) -> tuple:
+        predictor = self.coordinator.regeneration
+        predicted = predictor.next_regeneration(self._column)
+        if predicted is not None:
+            predicted = predicted.replace(second=0, microsecond=0)
+        rate = predictor.consumption_rate
+        return predicted, {"consumption_rate": None if rate is None else round(rate)}
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the minute, the rate or the availability changed."""
+        value, attributes = self._state()
+        available = self.available
+        if (
+            value == self._attr_native_value
+            and attributes == self._attr_extra_state_attributes
+            and available == self._written_available
+        ):
+            return
+        self._written_available = available
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = attributes
+        self.async_write_ha_state()
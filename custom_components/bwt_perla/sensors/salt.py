@@ -0,0 +1,96 @@
+"""Entities of the salt account."""
+from collections.abc import Callable
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..coordinator import BwtCoordinator
+from ..salt import SaltAccount
+from .base import BwtEntity
+
+_REFILL = "mdi:basket-fill"
+
+
+class SaltAccountSensor(BwtEntity, SensorEntity):
+    """Salt usage calculated by the salt account of the coordinator."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: BwtCoordinator,
+        device_info: DeviceInfo,
+        entry_id: str,
+        key: str,
+        extract: Callable[[SaltAccount], float | None],
+        unit: str,
+        icon: str,
+    ) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, key)
+        self._extract = extract
+        self._attr_native_unit_of_measurement = unit
+        self._attr_suggested_display_precision = 0
+        self._attr_icon = icon
+        self._attr_native_value = self._value()
+
+    def _value(self) -> float | None:
+        value = self._extract(self.coordinator.salt_account)
+        return None if value is None else round(value, 1)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the value or the availability changed."""
+        value = self._value()
+        available = self.available
+        if value == self._attr_native_value and available == self._written_available:
+            return
+        self._written_available = available
+        self._attr_native_value = value
+        self.async_write_ha_state()
+
+
+class LastSaltRefillSensor(BwtEntity, SensorEntity):
+    """Time of the last detected salt refill, with its levels and estimated mass."""
+
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_icon = _REFILL
+
+    def __init__(self, coordinator: BwtCoordinator, device_info: DeviceInfo, entry_id: str) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, "last_salt_refill")
+        self._set_state()
+
+    def _set_state(self) -> None:
+        account = self.coordinator.salt_account
+        if not account.refills:
+            self._attr_native_value = None
+            self._attr_extra_state_attributes = {"refills": 0}
+            return
+        refill = account.refills[-1]
+        self._attr_native_value = refill.time
+        self._attr_extra_state_attributes = {
+            "level_before": refill.level_before,
+            "level_after": refill.level_after,
+            "mass": refill.mass,
+            "refills": account.refill_count,
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when a refill was detected or the availability changed."""
+        previous = (self._attr_native_value, self._attr_extra_state_attributes)
+        self._set_state()
+        available = self.available
+        if (
+            previous == (self._attr_native_value, self._attr_extra_state_attributes)
+            and available == self._written_available
+        ):
+            return
+        self._written_available = available
+        self.async_write_ha_state()
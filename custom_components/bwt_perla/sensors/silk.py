@@ -0,0 +1,80 @@
+"""Entities of the Perla Silk, loaded only for that model."""
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..coordinator import BwtCoordinator
+from .base import BwtEntity, DeviceClassSensor, SimpleSensor
+
+_COUNTER = "mdi:counter"
+_WRENCH_CLOCK = "mdi:wrench-clock"
+_WRENCH_PERSON = "mdi:account-wrench"
+_UNKNOWN = "mdi:help-circle"
+
+# Registers without a known meaning, exposed for debugging
+_UNKNOWN_REGISTERS = [
+    0, 1, 5, 6, 9, 12, 20, 21, 22, 24, 29, 32, 33, 35, 36, 37, 38, 39, 40, 41, 42, 44, 45, 46, 47
+]
+
+
+class UnknownSensor(BwtEntity, SensorEntity):
+    """Unknown sensor for debugging."""
+
+    def __init__(
+        self,
+        coordinator: BwtCoordinator,
+        device_info: DeviceInfo,
+        entry_id: str,
+        index: int,
+    ) -> None:
+        """Initialize the sensor with the common coordinator."""
+        super().__init__(coordinator, device_info, entry_id, f"silk_register_{index}")
+        self._index = index
+        self._attr_icon = _UNKNOWN
+        self._attr_native_value = coordinator.data.get_register(index)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._attr_native_value = self.coordinator.data.get_register(self._index)
+        self.async_write_ha_state()
+
+
+def entities(
+    coordinator: BwtCoordinator, device_info: DeviceInfo, config_entry: ConfigEntry
+) -> list[BwtEntity]:
+    """Create the entities only the Silk provides."""
+    entry_id = config_entry.entry_id
+    entities = [
+        DeviceClassSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "next_customer_service",
+            lambda data: data.next_customer_service(),
+            SensorDeviceClass.TIMESTAMP,
+            _WRENCH_CLOCK,
+        ),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "days_in_service",
+            lambda data: data.days_in_service(),
+            _COUNTER,
+        ),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "warranty_end",
+            lambda data: data.warranty_end(),
+            _WRENCH_PERSON,
+        ),
+    ]
+    entities.extend(
+        UnknownSensor(coordinator, device_info, entry_id, index)
+        for index in _UNKNOWN_REGISTERS
+    )
+    return entities
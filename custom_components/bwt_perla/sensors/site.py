@@ -0,0 +1,71 @@
+"""Entities of the site totals, on the virtual BWT site device."""
+from collections.abc import Callable
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..const import DOMAIN
+from ..fleet import SiteAggregate
+
+
+class SiteSensor(SensorEntity):
+    """A total of the site, written when its rounded value changed."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        aggregate: SiteAggregate,
+        device_info: DeviceInfo,
+        entry_id: str,
+        key: str,
+        extract: Callable[[SiteAggregate], float | None],
+        unit: str,
+        icon: str,
+        device_class: SensorDeviceClass | None,
+        state_class: SensorStateClass,
+        precision: int = 0,
+    ) -> None:
+        """Initialize the sensor with the aggregate of the site."""
+        self._aggregate = aggregate
+        self._extract = extract
+        self._attr_device_info = device_info
+        self._attr_translation_key = key
+        self.entity_id = f"sensor.{DOMAIN}_{key}"
+        self._attr_unique_id = entry_id + "_" + key
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._precision = precision
+        self._attr_suggested_display_precision = precision
+        self._attr_native_value = self._value()
+
+    def _value(self) -> float | None:
+        if not self._aggregate.members:
+            return None
+        value = self._extract(self._aggregate)
+        if value is None:
+            return None
+        return round(value, self._precision) if self._precision else round(value)
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the aggregate."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._aggregate.async_add_listener(self._handle_update))
+        self._attr_native_value = self._value()
+
+    @callback
+    def _handle_update(self) -> None:
+        """Write the state only when the rounded value changed."""
+        value = self._value()
+        if value == self._attr_native_value:
+            return
+        self._attr_native_value = value
+        self.async_write_ha_state()
@@ -0,0 +1,118 @@
+"""Entities of the SmartDos, loaded only for that model."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import PERCENTAGE, UnitOfTime, UnitOfVolume
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from ..coordinator import BwtCoordinator
+from .base import BwtEntity, CurrentFlowSensor, SimpleSensor, UnitSensor, flow_filter
+
+_GLASS = "mdi:cup-water"
+_PERCENTAGE = "mdi:percent"
+_DAYS_LEFT = "mdi:sort-numeric-descending-variant"
+_TIME = "mdi:calendar-clock"
+_OIL_LEVEL = "mdi:oil-level"
+_WATER = "mdi:water"
+_WATER_CHECK = "mdi:water-check"
+_UNKNOWN = "mdi:help-circle"
+
+
+def entities(
+    coordinator: BwtCoordinator, device_info: DeviceInfo, config_entry: ConfigEntry
+) -> list[BwtEntity]:
+    """Create the entities of the SmartDos, it shares none of the Perla ones."""
+    entry_id = config_entry.entry_id
+    return [
+        # Estimated from the treated water counter
+        CurrentFlowSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            flow_filter(config_entry.options),
+        ),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "state",
+            lambda data: data.device_state(),
+            _WATER_CHECK,
+        ),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "warnings",
+            lambda data: data.active_states(),
+            _UNKNOWN,
+        ),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "comm_date",
+            lambda data: data.comm_date(),
+            _TIME,
+        ),
+        UnitSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "capacity_1",
+            lambda data: data.capacity_1(),
+            UnitOfVolume.LITERS,
+            _GLASS,
+            0,
+        ),
+        UnitSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "remaining_capacity_pct",
+            lambda data: data.remaining_capacity_pct(),
+            PERCENTAGE,
+            _PERCENTAGE,
+            0,
+        ),
+        UnitSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "remaining_capacity_days",
+            lambda data: data.remaining_capacity_days(),
+            UnitOfTime.DAYS,
+            _DAYS_LEFT,
+        ),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "dosing_rate",
+            lambda data: data.dosing_rate(),
+            _OIL_LEVEL,
+        ),
+        UnitSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "substance_dosage",
+            lambda data: data.substance_dosage(),
+            UnitOfVolume.MILLILITERS,
+            _OIL_LEVEL,
+        ),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "wifi_ssid",
+            lambda data: data.wifi_ssid(),
+            _UNKNOWN,
+        ),
+        SimpleSensor(
+            coordinator,
+            device_info,
+            entry_id,
+            "wifi_rssi",
+            lambda data: data.wifi_rssi(),
+            _WATER,
+        ),
+    ]
@@ -0,0 +1,160 @@
+"""Services to refresh entries on demand, to poll them fast for a while and to profile them."""
+import asyncio
+from collections.abc import Iterable
+from datetime import timedelta
+import logging
+from pathlib import Path
+from types import CodeType
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .coordinator import BwtCoordinator
+from .data import LocalApiData, SilkApiData, SmartDosApiData
+from .polling import UPDATE_INTERVAL_MAX, UPDATE_INTERVAL_MIN
+from .profiler import SamplingProfiler
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_REFRESH = "refresh"
+SERVICE_BURST = "burst"
+SERVICE_PROFILE = "profile"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_INTERVAL = "interval"
+ATTR_DURATION = "duration"
+ATTR_PATH = "path"
+
+# Requests per second all running bursts together may cause.
+_MAX_BURST_RATE = 10
+_MAX_BURST_MINUTES = 60
+# Seconds between the samples of the profiler.
+_PROFILE_INTERVAL = 0.005
+_MAX_PROFILE_SECONDS = 300
+
+_ENTRIES_SCHEMA = {vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string])}
+_REFRESH_SCHEMA = vol.Schema(_ENTRIES_SCHEMA)
+_BURST_SCHEMA = vol.Schema(
+    {
+        **_ENTRIES_SCHEMA,
+        vol.Optional(ATTR_INTERVAL, default=UPDATE_INTERVAL_MIN): vol.All(
+            vol.Coerce(int), vol.Range(min=UPDATE_INTERVAL_MIN, max=UPDATE_INTERVAL_MAX)
+        ),
+        vol.Optional(ATTR_DURATION, default=10): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=_MAX_BURST_MINUTES)
+        ),
+    }
+)
+_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=30): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=_MAX_PROFILE_SECONDS)
+        ),
+    }
+)
+
+
+def _profile_scopes() -> list[CodeType]:
+    """Return the functions profiled: the refresh, the snapshots and the entity updates."""
+    return [
+        BwtCoordinator._async_update_data.__code__,
+        BwtCoordinator.async_update_listeners.__code__,
+        LocalApiData.__init__.__code__,
+        SilkApiData.__init__.__code__,
+        SmartDosApiData.__init__.__code__,
+    ]
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Register the services."""
+
+    async def refresh(call: ServiceCall) -> None:
+        """Refresh the entries now and wait for their data."""
+        coordinators = _coordinators(hass, call)
+        await asyncio.gather(*(c.async_refresh_now() for c in _unique(coordinators.values())))
+        if failed := [
+            entry_id for entry_id, c in coordinators.items() if not c.last_update_success
+        ]:
+            raise HomeAssistantError(f"Refreshing entries failed: {', '.join(failed)}")
+
+    @callback
+    def burst(call: ServiceCall) -> None:
+        """Poll the entries at the interval for the duration, then as usual again."""
+        targeted = _unique(_coordinators(hass, call).values())
+        interval = call.data[ATTR_INTERVAL]
+        # Bursts of the targeted devices are replaced
+        others = [
+            c for c in _unique(hass.data.get(DOMAIN, {}).values())
+            if c.burst_interval is not None and c not in targeted
+        ]
+        rate = len(targeted) / interval + sum(1 / c.burst_interval for c in others)
+        if rate > _MAX_BURST_RATE:
+            raise ServiceValidationError(
+                f"Bursts would poll {rate:.1f} times per second, at most "
+                f"{_MAX_BURST_RATE} are allowed: use a longer interval or fewer entries"
+            )
+        duration = timedelta(minutes=call.data[ATTR_DURATION])
+        for coordinator in targeted:
+            coordinator.async_start_burst(interval, duration)
+
+    profiling = False
+
+    async def profile(call: ServiceCall) -> ServiceResponse:
+        """Sample the hot paths for the duration and write the timings to a file."""
+        nonlocal profiling
+        if profiling:
+            raise ServiceValidationError("A profile is already running")
+        duration = call.data[ATTR_DURATION]
+        profiler = SamplingProfiler(_profile_scopes(), _PROFILE_INTERVAL)
+        profiling = True
+        profiler.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            await hass.async_add_executor_job(profiler.stop)
+            profiling = False
+        path = Path(
+            hass.config.path(f"{DOMAIN}_profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}.txt")
+        )
+        await hass.async_add_executor_job(
+            path.write_text, profiler.report(duration), "utf-8"
+        )
+        _LOGGER.info("Wrote the profile to %s", path)
+        return {ATTR_PATH: str(path)}
+
+    hass.services.async_register(DOMAIN, SERVICE_REFRESH, refresh, schema=_REFRESH_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_BURST, burst, schema=_BURST_SCHEMA)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        profile,
+        schema=_PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _coordinators(hass: HomeAssistant, call: ServiceCall) -> dict[str, BwtCoordinator]:
+    """Return the coordinators of the targeted entries, all loaded entries without a target."""
+    loaded: dict[str, BwtCoordinator] = hass.data.get(DOMAIN, {})
+    entry_ids = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_ids is None:
+        return dict(loaded)
+    if missing := [entry_id for entry_id in entry_ids if entry_id not in loaded]:
+        raise ServiceValidationError(f"Entries not found or not loaded: {', '.join(missing)}")
+    return {entry_id: loaded[entry_id] for entry_id in entry_ids}
+
+
+def _unique(coordinators: Iterable[BwtCoordinator]) -> list[BwtCoordinator]:
+    """Return every coordinator once, the entries of one device share theirs."""
+    return list({id(c): c for c in coordinators}.values())
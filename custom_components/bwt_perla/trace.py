@@ -0,0 +1,217 @@
+"""Capture and replay of the device traffic as compact JSONL traces.
+
+Every line of a trace is one api call: the wall clock time `t` it was started,
+its duration `d`, the api method `m` and either the result `r` or the raised
+exception `e`. Results are the bwt_api response objects, encoded with type tags
+so a replay hands the coordinator exactly what the device returned.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import dataclasses
+from datetime import datetime
+import enum
+import inspect
+import json
+import logging
+import time
+from typing import Any
+
+from bwt_api import data as bwt_data, error as bwt_error, exception as bwt_exception
+
+_LOGGER = logging.getLogger(__name__)
+
+# Write the buffered calls at least this often [s] or when this many are buffered.
+_FLUSH_INTERVAL = 10
+_FLUSH_SIZE = 50
+
+
+def encode(value: Any) -> Any:
+    """Encode an api result into JSON compatible values."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, enum.Enum):
+        return {"__enum__": type(value).__name__, "v": value.value}
+    if isinstance(value, datetime):
+        return {"__dt__": value.isoformat()}
+    if dataclasses.is_dataclass(value):
+        return {
+            "__type__": type(value).__name__,
+            "v": {f.name: encode(getattr(value, f.name)) for f in dataclasses.fields(value)},
+        }
+    if isinstance(value, dict):
+        return {"__map__": {str(k): encode(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return [encode(v) for v in value]
+    raise TypeError(f"Cannot encode {type(value).__name__} in a trace")
+
+
+def _lookup(name: str) -> type:
+    """Find a bwt_api type by its name."""
+    for module in (bwt_data, bwt_error):
+        if isinstance(found := getattr(module, name, None), type):
+            return found
+    raise ValueError(f"Unknown type in trace: {name}")
+
+
+def decode(value: Any) -> Any:
+    """Decode a value created by `encode`."""
+    if isinstance(value, list):
+        return [decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "__enum__" in value:
+        return _lookup(value["__enum__"])(value["v"])
+    if "__dt__" in value:
+        return datetime.fromisoformat(value["__dt__"])
+    if "__type__" in value:
+        return _lookup(value["__type__"])(**{k: decode(v) for k, v in value["v"].items()})
+    return {k: decode(v) for k, v in value["__map__"].items()}
+
+
+class TracingApi:
+    """Api wrapper writing every call of the wrapped api to a trace file."""
+
+    def __init__(
+        self,
+        api,
+        path: str,
+        executor: Callable[..., Awaitable[Any]],
+    ) -> None:
+        """Wrap `api`, writing the trace with the given executor job runner."""
+        self._api = api
+        self._path = path
+        self._executor = executor
+        self._buffer: list[str] = []
+        self._last_flush = time.monotonic()
+        self._writer: asyncio.Future | None = None
+
+    def __getattr__(self, name: str):
+        """Return the attribute of the api, tracing its fetch coroutines."""
+        attr = getattr(self._api, name)
+        if not name.startswith("get_") or not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def traced(*args, **kwargs):
+            started = time.time()
+            begin = time.perf_counter()
+            record: dict[str, Any] = {"t": round(started, 3), "m": name}
+            try:
+                result = await attr(*args, **kwargs)
+            except Exception as err:
+                record["e"] = [type(err).__name__, str(err)]
+                raise
+            except asyncio.CancelledError:
+                # The request timeouts of the poller cancel the call
+                record["e"] = ["TimeoutError", "Cancelled"]
+                raise
+            else:
+                record["r"] = encode(result)
+                return result
+            finally:
+                record["d"] = round(time.perf_counter() - begin, 4)
+                self._append(json.dumps(record, separators=(",", ":")))
+
+        return traced
+
+    def _append(self, line: str) -> None:
+        """Buffer a trace line and write the buffer from time to time."""
+        self._buffer.append(line)
+        if (
+            len(self._buffer) >= _FLUSH_SIZE
+            or time.monotonic() - self._last_flush >= _FLUSH_INTERVAL
+        ) and (self._writer is None or self._writer.done()):
+            self._writer = asyncio.ensure_future(self._async_flush())
+
+    async def _async_flush(self) -> None:
+        """Write all buffered lines."""
+        lines, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        if lines:
+            await self._executor(self._write, lines)
+
+    def _write(self, lines: list[str]) -> None:
+        """Append lines to the trace file, runs in the executor."""
+        with open(self._path, "a", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    async def close(self) -> None:
+        """Write the remaining calls and close the wrapped api."""
+        if self._writer is not None:
+            await self._writer
+        await self._async_flush()
+        await self._api.close()
+
+
+class ReplayApi:
+    """Api stand-in answering every call with the recorded one at the current time.
+
+    A call is answered by the last recorded call of the same method started at or
+    before `now()`, or by the first one if the replay is still before it.
+    """
+
+    def __init__(
+        self,
+        records: list[dict[str, Any]],
+        now: Callable[[], float],
+        sleep: Callable[[float], Awaitable[None]] | None = None,
+    ) -> None:
+        """Initialize with the parsed trace records and a wall clock [s]."""
+        self._now = now
+        self._sleep = sleep
+        self._calls: dict[str, list[dict[str, Any]]] = {}
+        for record in sorted(records, key=lambda r: r["t"]):
+            self._calls.setdefault(record["m"], []).append(record)
+        self._positions = dict.fromkeys(self._calls, 0)
+        self.requests: dict[str, int] = dict.fromkeys(self._calls, 0)
+
+    @classmethod
+    def from_file(cls, path: str, now, sleep=None) -> "ReplayApi":
+        """Load a trace file."""
+        with open(path, encoding="utf-8") as file:
+            return cls([json.loads(line) for line in file if line.strip()], now, sleep)
+
+    @property
+    def methods(self) -> set[str]:
+        """Return the recorded api methods."""
+        return set(self._calls)
+
+    @property
+    def start(self) -> float:
+        """Return the time of the first recorded call."""
+        return min(calls[0]["t"] for calls in self._calls.values())
+
+    @property
+    def end(self) -> float:
+        """Return the time of the last recorded call."""
+        return max(calls[-1]["t"] for calls in self._calls.values())
+
+    def __getattr__(self, name: str):
+        """Return a replaying coroutine for a recorded api method."""
+        if name not in self._calls:
+            raise AttributeError(name)
+
+        async def replay(*args, **kwargs):
+            calls = self._calls[name]
+            position = self._positions[name]
+            now = self._now()
+            while position + 1 < len(calls) and calls[position + 1]["t"] <= now:
+                position += 1
+            self._positions[name] = position
+            self.requests[name] += 1
+            record = calls[position]
+            if self._sleep is not None:
+                await self._sleep(record.get("d", 0))
+            if "e" in record:
+                if record["e"][0] == "TimeoutError":
+                    raise TimeoutError(record["e"][1])
+                exc_type = getattr(bwt_exception, record["e"][0], None)
+                if not isinstance(exc_type, type) or not issubclass(exc_type, Exception):
+                    exc_type = bwt_exception.ApiException
+                raise exc_type(record["e"][1])
+            return decode(record["r"])
+
+        return replay
+
+    async def close(self) -> None:
+        """Nothing to close for a replay."""
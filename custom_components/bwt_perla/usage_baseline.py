@@ -0,0 +1,190 @@
+"""Hour-of-week baseline of the water usage to flag unusual consumption."""
+
+from datetime import datetime
+import math
+
+_SLOTS = 7 * 24
+# Bucket k > 0 of a sketch holds usages in [GAMMA^(k-1), GAMMA^k) liters, bucket 0
+# everything below 1 l, so a quantile is off by at most 12 %.
+_GAMMA = 1.25
+_BUCKETS = 48
+# Weight of the newest observation of a slot, roughly the last 10 weeks count.
+_ALPHA = 0.1
+# Observations a slot needs before it is trusted.
+_MIN_OBSERVATIONS = 3
+# Samples further apart [s] leave the hour incomplete, it is not learned.
+_MAX_GAP = 300
+# Smallest spread [l] of the anomaly score, so a flush in an hour that is
+# usually dry doesn't look like a burst pipe.
+_MIN_SPREAD = 10.0
+
+
+class QuantileSketch:
+    """Exponentially weighted histogram of a value in logarithmic buckets.
+
+    Memory is constant whatever the number of observations, and quantiles
+    have a bounded relative error instead of an absolute one, which suits
+    usages from a few liters to a full bath.
+    """
+
+    def __init__(self, weights: list[float] | None = None, observations: int = 0) -> None:
+        """Initialize an empty sketch or restore a stored one."""
+        self._weights = list(weights or [0.0] * _BUCKETS)
+        self.observations = observations
+
+    @staticmethod
+    def _bucket(value: float) -> int:
+        if value < 1:
+            return 0
+        return min(_BUCKETS - 1, int(math.log(value, _GAMMA)) + 1)
+
+    @staticmethod
+    def _representative(bucket: int) -> float:
+        """Return the geometric middle of a bucket."""
+        return 0.0 if bucket == 0 else _GAMMA ** (bucket - 0.5)
+
+    def add(self, value: float) -> None:
+        """Add an observation, fading the older ones."""
+        for index, weight in enumerate(self._weights):
+            self._weights[index] = weight * (1 - _ALPHA)
+        self._weights[self._bucket(value)] += _ALPHA
+        self.observations = min(self.observations + 1, 0xFFFF)
+
+    def quantile(self, q: float) -> float:
+        """Return the value below which the share `q` of the weight lies."""
+        target = q * sum(self._weights)
+        cumulative = 0.0
+        for index, weight in enumerate(self._weights):
+            cumulative += weight
+            if weight and cumulative >= target:
+                return self._representative(index)
+        return self._representative(_BUCKETS - 1)
+
+    def rank(self, value: float) -> float:
+        """Return the share of the weight below the value, half of its own bucket included."""
+        total = sum(self._weights)
+        if total == 0:
+            return 0.0
+        bucket = self._bucket(value)
+        below = sum(self._weights[:bucket]) + self._weights[bucket] / 2
+        return below / total
+
+    def as_dict(self) -> dict:
+        """Serialize the sketch sparsely for storage."""
+        return {
+            "weights": {
+                str(index): round(weight, 5)
+                for index, weight in enumerate(self._weights)
+                if weight >= 1e-5
+            },
+            "observations": self.observations,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        """Restore a sketch from storage."""
+        weights = [0.0] * _BUCKETS
+        for index, weight in data.get("weights", {}).items():
+            if 0 <= int(index) < _BUCKETS:
+                weights[int(index)] = weight
+        return cls(weights, data.get("observations", 0))
+
+
+class UsageBaseline:
+    """Usage per hour of the week learned from a water counter.
+
+    Every slot holds a QuantileSketch of the liters used in that hour, fed
+    from the counter increases seen while polling. Only hours polled from
+    their start to their end are learned. A counter that decreases, e.g. a
+    daily counter at midnight, is taken as restarted from zero.
+    """
+
+    def __init__(self, sketches: list[QuantileSketch] | None = None) -> None:
+        """Initialize an empty baseline or restore a stored one."""
+        self._sketches = sketches or [QuantileSketch() for _ in range(_SLOTS)]
+        self._hour: datetime | None = None
+        self._complete = False
+        self._used = 0.0
+        self._last_counter: float | None = None
+        self._last_time: float | None = None
+
+    @staticmethod
+    def slot(when: datetime) -> int:
+        """Return the hour-of-week slot of a timestamp."""
+        return when.weekday() * 24 + when.hour
+
+    def update(self, counter: float, now: datetime) -> bool:
+        """Add a counter reading [l] and return True if an hour was learned."""
+        timestamp = now.timestamp()
+        continuous = self._last_time is not None and timestamp - self._last_time <= _MAX_GAP
+        if continuous:
+            if counter >= self._last_counter:
+                self._used += counter - self._last_counter
+            else:
+                self._used += counter
+        else:
+            self._complete = False
+        self._last_counter = counter
+        self._last_time = timestamp
+
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        if hour == self._hour:
+            return False
+        learned = self._hour is not None and self._complete and continuous
+        if learned:
+            self._sketches[self.slot(self._hour)].add(self._used)
+        self._hour = hour
+        self._used = 0.0
+        # The sample before this one was still in the last hour
+        self._complete = continuous
+        return learned
+
+    @property
+    def used(self) -> float | None:
+        """Return the liters used so far in this hour, None if not polled since its start."""
+        return self._used if self._complete else None
+
+    def _current_sketch(self) -> QuantileSketch | None:
+        """Return the sketch of the current hour, None while unknown or still learning."""
+        if not self._complete:
+            return None
+        sketch = self._sketches[self.slot(self._hour)]
+        if sketch.observations < _MIN_OBSERVATIONS:
+            return None
+        return sketch
+
+    def percentile(self) -> float | None:
+        """Return the percentile of the usage so far within the usual usage of this hour."""
+        if (sketch := self._current_sketch()) is None:
+            return None
+        return sketch.rank(self._used) * 100
+
+    def anomaly_score(self) -> float | None:
+        """Return by how many spreads the usage so far exceeds the median of this hour.
+
+        The spread is the distance of the 90th percentile from the median. The
+        score is 0 up to the median; the hour is still running, so only usage
+        above the usual is flagged.
+        """
+        if (sketch := self._current_sketch()) is None:
+            return None
+        median = sketch.quantile(0.5)
+        spread = max(sketch.quantile(0.9) - median, _MIN_SPREAD)
+        return max(0.0, (self._used - median) / spread)
+
+    def quantiles(self) -> tuple[float, float] | None:
+        """Return the median and the 90th percentile [l] of this hour."""
+        if (sketch := self._current_sketch()) is None:
+            return None
+        return sketch.quantile(0.5), sketch.quantile(0.9)
+
+    def as_dict(self) -> dict:
+        """Serialize the baseline for storage."""
+        return {"sketches": [sketch.as_dict() for sketch in self._sketches]}
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "UsageBaseline":
+        """Restore a baseline from storage, ignoring incompatible data."""
+        if not data or len(data.get("sketches", [])) != _SLOTS:
+            return cls()
+        return cls([QuantileSketch.from_dict(sketch) for sketch in data["sketches"]])
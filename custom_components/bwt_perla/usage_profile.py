@@ -0,0 +1,76 @@
+"""Hour-of-week usage profile to predict when water is likely to flow."""
+
+from datetime import datetime, timedelta
+
+_SLOTS = 7 * 24
+# Weight of the newest observation of a slot, roughly the last 5 weeks count.
+_ALPHA = 0.2
+# Observations a slot needs before its probability is trusted.
+_MIN_OBSERVATIONS = 3
+
+
+class UsageProfile:
+    """Probability of water usage for every hour of the week.
+
+    Every slot holds an exponentially weighted share of observed half hours
+    with consumption, so the profile slowly follows changes in the household.
+    """
+
+    def __init__(
+        self,
+        probabilities: list[float] | None = None,
+        observations: list[int] | None = None,
+    ) -> None:
+        """Initialize an empty profile or restore a stored one."""
+        self._probabilities = list(probabilities or [0.0] * _SLOTS)
+        self._observations = list(observations or [0] * _SLOTS)
+
+    @staticmethod
+    def slot(when: datetime) -> int:
+        """Return the hour-of-week slot of a timestamp."""
+        return when.weekday() * 24 + when.hour
+
+    def observe(self, when: datetime, used: bool) -> None:
+        """Record whether water was used in the half hour starting at `when`."""
+        index = self.slot(when)
+        target = 1.0 if used else 0.0
+        self._probabilities[index] += _ALPHA * (target - self._probabilities[index])
+        self._observations[index] = min(self._observations[index] + 1, 0xFFFF)
+
+    def observe_buckets(
+        self, day: datetime, buckets: list[int], first: int, last: int
+    ) -> None:
+        """Record the half-hour buckets [first, last) of a GetDailyData response."""
+        midnight = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        for index in range(first, min(last, len(buckets))):
+            self.observe(midnight + timedelta(minutes=30 * index), buckets[index] > 0)
+
+    def probability(self, when: datetime) -> float | None:
+        """Return the usage probability of the slot, None while still learning."""
+        index = self.slot(when)
+        if self._observations[index] < _MIN_OBSERVATIONS:
+            return None
+        return self._probabilities[index]
+
+    def as_dict(self) -> dict:
+        """Serialize the profile for storage."""
+        return {
+            "probabilities": [round(p, 4) for p in self._probabilities],
+            "observations": self._observations,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "UsageProfile":
+        """Restore a profile from storage, ignoring incompatible data."""
+        if (
+            not data
+            or len(data.get("probabilities", [])) != _SLOTS
+            or len(data.get("observations", [])) != _SLOTS
+        ):
+            return cls()
+        return cls(data["probabilities"], data["observations"])
+
+
+def half_hour_bucket(when: datetime) -> int:
+    """Return the GetDailyData bucket index (0-47) of a timestamp."""
+    return when.hour * 2 + when.minute // 30
@@ -0,0 +1,126 @@
+"""Plausibility checks of the samples of a device, without Home Assistant.
+
+Shared with the standalone exporter like the polling, see polling.py.
+"""
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+from .data.data import ApiData
+
+# Reasons a sample is rejected for.
+REJECT_MALFORMED = "malformed"
+REJECT_FLOW = "flow"
+REJECT_LEVEL = "level"
+REJECT_HARDNESS = "hardness"
+REJECT_COUNTER = "counter"
+
+# Far above the flow [l/h] any of the devices can pass.
+MAX_FLOW = 10_000
+# Consecutive rejections of a reason after which the device is believed.
+_CONFIRMATIONS = 3
+
+# Errors of accessors reading a truncated or garbled response.
+_MALFORMED_ERRORS = (AttributeError, LookupError, TypeError, ValueError)
+
+
+class InvalidSample(Exception):
+    """A sample failed the plausibility checks."""
+
+    def __init__(self, reason: str, persistent: bool) -> None:
+        """Initialize with the reason and if the device keeps sending such samples."""
+        super().__init__(f"Implausible sample: {reason}")
+        self.reason = reason
+        self.persistent = persistent
+
+
+class SampleValidator:
+    """Reject glitched samples before they reach the entities.
+
+    Counters must not go backwards, the flow, the salt level and the hardness
+    must be within their range, and the accessors must be able to read the
+    sample at all. A glitch doesn't last: once the same implausible value
+    comes `confirmations` times in a row, it is a reset or a new setting of
+    the device and accepted, out of range values for as long as they last.
+    An unreadable sample is never accepted, it is persistent instead. A
+    check reads a few values and compares them with the last accepted
+    sample, it costs the same for every sample.
+    """
+
+    def __init__(self, confirmations: int = _CONFIRMATIONS) -> None:
+        """Initialize without rejections."""
+        self._confirmations = confirmations
+        self.rejected: Counter[str] = Counter()
+        self._streak_reason: str | None = None
+        self._streak = 0
+
+    @property
+    def rejected_count(self) -> int:
+        """Return the rejected samples of all reasons."""
+        return self.rejected.total()
+
+    def validate(self, previous: ApiData | None, sample: ApiData) -> None:
+        """Raise InvalidSample if the sample is implausible after the accepted `previous`."""
+        reason = _check(previous, sample)
+        if reason is None:
+            self._streak_reason, self._streak = None, 0
+            return
+        if reason == self._streak_reason:
+            self._streak += 1
+        else:
+            self._streak_reason, self._streak = reason, 1
+        confirmed = self._streak >= self._confirmations
+        if confirmed and reason != REJECT_MALFORMED:
+            if reason == REJECT_COUNTER:
+                # The reset is the new previous sample, a later drop is a new glitch
+                self._streak_reason, self._streak = None, 0
+            # Other values stay accepted until a plausible sample or another reason comes
+            return
+        self.rejected[reason] += 1
+        raise InvalidSample(reason, confirmed)
+
+
+def _check(previous: ApiData | None, sample: ApiData) -> str | None:
+    """Return why the sample is implausible, None if it is plausible."""
+    try:
+        flow = _computed(sample.current_flow)
+        level = _computed(sample.regenerativ_level)
+        hardness_in = _computed(sample.hardness_in)
+        hardness_out = _computed(sample.hardness_out)
+        counters = _computed(lambda: (sample.total_output(), sample.regenerations()))
+        previous_counters = None
+        if previous is not None:
+            previous_counters = _computed(
+                lambda: (previous.total_output(), previous.regenerations())
+            )
+    except _MALFORMED_ERRORS:
+        return REJECT_MALFORMED
+
+    if flow is not None and not 0 <= flow <= MAX_FLOW:
+        return REJECT_FLOW
+    if level is not None and not 0 <= level <= 100:
+        return REJECT_LEVEL
+    # Softening only ever lowers the hardness
+    if hardness_in is not None and (
+        hardness_in < 0 or hardness_out is not None and not 0 <= hardness_out <= hardness_in
+    ):
+        return REJECT_HARDNESS
+    if (
+        counters is not None
+        and previous_counters is not None
+        and (counters[0] < previous_counters[0] or counters[1] < previous_counters[1])
+    ):
+        return REJECT_COUNTER
+    return None
+
+
+def _computed(accessor: Callable[[], Any]) -> Any:
+    """Return the value of an accessor, None if the device's values don't give one.
+
+    E.g. the salt level of a Silk without a salt capacity divides by zero,
+    only the entity of that value fails then, like without the checks.
+    """
+    try:
+        return accessor()
+    except ArithmeticError:
+        return None
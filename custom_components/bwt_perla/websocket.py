@@ -0,0 +1,84 @@
+"""WebSocket API streaming the samples of a coordinator to the frontend.
+
+Live graphs get every sample of the coordinator without writing it to the
+state machine, so they don't cost any recorder rows.
+"""
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .coordinator import BwtCoordinator, UpdateLane
+
+# Idle interval [s] while a client is subscribed, unless it asks for another one.
+_DEFAULT_LIVE_INTERVAL = 5
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Register the WebSocket commands."""
+    websocket_api.async_register_command(hass, websocket_subscribe_flow)
+
+
+def _sample(coordinator: BwtCoordinator) -> dict[str, Any]:
+    """Return the sample of the last refresh."""
+    data = coordinator.data
+    if data is None or not coordinator.last_update_success:
+        return {"time": coordinator.now().isoformat(), "available": False}
+    return {
+        "time": coordinator.now().isoformat(),
+        "available": True,
+        "flow": data.current_flow(),
+        "day_output": data.day_output(),
+        "state": data.state_name(),
+    }
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe_flow",
+        vol.Required("entry_id"): str,
+        vol.Optional("interval", default=_DEFAULT_LIVE_INTERVAL): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=30)
+        ),
+    }
+)
+@callback
+def websocket_subscribe_flow(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Stream the flow, day output and state of an entry after every refresh.
+
+    While subscribed, the entry is polled at least every `interval` seconds
+    when no water flows; while water flows it is polled every second anyway.
+    """
+    coordinator: BwtCoordinator | None = hass.data.get(DOMAIN, {}).get(msg["entry_id"])
+    if coordinator is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Entry not found or not loaded"
+        )
+        return
+
+    @callback
+    def forward_sample() -> None:
+        connection.send_message(
+            websocket_api.event_message(msg["id"], _sample(coordinator))
+        )
+
+    remove_listener = coordinator.async_add_listener(forward_sample, UpdateLane.FLOW)
+    connection.send_result(msg["id"])
+    forward_sample()
+    # Last, it may refresh right away and send the next sample
+    remove_live_interval = coordinator.async_request_live_interval(msg["interval"])
+
+    @callback
+    def unsubscribe() -> None:
+        remove_listener()
+        remove_live_interval()
+
+    connection.subscriptions[msg["id"]] = unsubscribe
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Replay a captured device trace through the coordinator and the entities.
+
+Usage: python dev/replay.py <trace.jsonl> [--speed 60] [--samples out.jsonl]
+
+Traces are written by the "Capture device traffic" option. The replay runs in
+simulated time: every refresh answers with the recorded response of that time,
+then the clock advances by the interval the coordinator chose. `--speed 0`
+(default) runs as fast as possible, `--speed 1` in real time.
+
+Prints a JSON report of the requests, chosen polling intervals and state
+writes per entity, `--samples` additionally writes every refresh with the
+values that were written.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+import json
+import logging
+from pathlib import Path
+import sys
+import tempfile
+import time
+from types import MappingProxyType
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bwt_api.bwt import BwtModel  # noqa: E402
+
+from homeassistant.config_entries import SOURCE_USER, ConfigEntry  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+from custom_components.bwt_perla import sensor  # noqa: E402
+from custom_components.bwt_perla.config_flow import ConfigFlow  # noqa: E402
+from custom_components.bwt_perla.const import DOMAIN  # noqa: E402
+from custom_components.bwt_perla.coordinator import BwtCoordinator  # noqa: E402
+from custom_components.bwt_perla.trace import ReplayApi  # noqa: E402
+
+_LOGGER = logging.getLogger(__name__)
+
+# The first refresh of every model calls one of these methods.
+_MODELS = {
+    "get_current_data": BwtModel.PERLA_LOCAL_API,
+    "get_registers": BwtModel.PERLA_SILK,
+    "get_device_info": BwtModel.SMART_DOS,
+}
+
+
+class SimulatedClock:
+    """Wall clock that only moves when advanced."""
+
+    def __init__(self, start: float) -> None:
+        self.time = start
+
+    def monotonic(self) -> float:
+        return self.time
+
+    def now(self):
+        return dt_util.as_local(dt_util.utc_from_timestamp(self.time))
+
+    def advance(self, seconds: float) -> None:
+        self.time += seconds
+
+
+def _parse_options(values: list[str]) -> dict:
+    """Parse key=value entry options, e.g. flow_deadband=50."""
+    options = {}
+    for value in values:
+        key, _, raw = value.partition("=")
+        try:
+            options[key] = json.loads(raw)
+        except json.JSONDecodeError:
+            options[key] = raw
+    return options
+
+
+async def replay(trace: str, speed: float, options: dict, samples: str | None) -> dict:
+    """Replay the trace and return the report."""
+    clock = SimulatedClock(0)
+
+    async def sleep(seconds: float) -> None:
+        if speed > 0:
+            await asyncio.sleep(seconds / speed)
+
+    api = ReplayApi.from_file(trace, lambda: clock.time, sleep)
+    clock.time = api.start
+    model = next(model for method, model in _MODELS.items() if method in api.methods)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        entry = ConfigEntry(
+            data={},
+            discovery_keys=MappingProxyType({}),
+            domain=DOMAIN,
+            entry_id="replay",
+            minor_version=1,
+            options=options,
+            source=SOURCE_USER,
+            subentries_data=None,
+            title="Replay",
+            unique_id=None,
+            version=ConfigFlow.VERSION,
+        )
+        coordinator = BwtCoordinator(hass, api, model, entry)
+        coordinator.monotonic = clock.monotonic
+        coordinator.now = clock.now
+        await coordinator.async_refresh()
+        # Like the setup of an entry, the stores start empty in the temporary config
+        await coordinator.async_load_profile()
+        await coordinator.async_load_baseline()
+        await coordinator.async_load_salt_account()
+        await coordinator.async_load_regeneration()
+        hass.data[DOMAIN] = {entry.entry_id: coordinator}
+
+        entities = []
+        await sensor.async_setup_entry(hass, entry, entities.extend)
+        writes: Counter[str] = Counter()
+        written: dict[str, object] = {}
+
+        def counting_writer(entity):
+            key = entity.translation_key
+
+            def write() -> None:
+                writes[key] += 1
+                written[key] = getattr(entity, "native_value", None)
+
+            return write
+
+        for entity in entities:
+            entity.async_write_ha_state = counting_writer(entity)
+            coordinator.async_add_listener(
+                entity._handle_coordinator_update, entity.coordinator_context
+            )
+
+        intervals: Counter[int] = Counter()
+        failures = 0
+        started = time.perf_counter()
+        sample_file = open(samples, "w", encoding="utf-8") if samples else None
+        try:
+            while clock.time <= api.end:
+                written.clear()
+                await coordinator.async_refresh()
+                # The replay advances the time, not the timer of the coordinator
+                coordinator._unschedule_refresh()
+                interval = coordinator.update_interval.total_seconds()
+                intervals[int(interval)] += 1
+                failures += not coordinator.last_update_success
+                if sample_file is not None:
+                    sample = {
+                        "t": clock.now().isoformat(),
+                        "ok": coordinator.last_update_success,
+                        "flow": coordinator.data.current_flow(),
+                        "interval": interval,
+                        "written": written,
+                    }
+                    sample_file.write(json.dumps(sample, default=str) + "\n")
+                clock.advance(interval)
+                await sleep(interval)
+        finally:
+            if sample_file is not None:
+                sample_file.close()
+            await coordinator.async_shutdown()
+            # Ends the executors, e.g. of the lazily imported entity modules
+            await hass.async_stop(force=True)
+
+    return {
+        "model": model.name,
+        "simulated_seconds": round(api.end - api.start),
+        "real_seconds": round(time.perf_counter() - started, 3),
+        "refreshes": sum(intervals.values()),
+        "failed_refreshes": failures,
+        "requests": api.requests,
+        "intervals": dict(sorted(intervals.items())),
+        "state_writes": dict(writes.most_common()),
+    }
+
+
+def main() -> None:  # pragma: no cover - run as script
+    parser = argparse.ArgumentParser()
+    parser.add_argument("trace", help="trace file written by the capture option")
+    parser.add_argument("--speed", type=float, default=0, help="0 = as fast as possible")
+    parser.add_argument("--samples", help="write every refresh to this JSONL file")
+    parser.add_argument("--time-zone", default="UTC")
+    parser.add_argument(
+        "--option", action="append", default=[], help="entry option, e.g. flow_deadband=50"
+    )
+    args = parser.parse_args()
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone(args.time_zone))
+    report = asyncio.run(
+        replay(args.trace, args.speed, _parse_options(args.option), args.samples)
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""Asyncio simulator for many virtual BWT devices (Perla, Silk, SmartDos).
+
+Usage: python dev/simulator.py --perla 100 --silk 50 --smartdos 50 [options]
+
+Every virtual device runs a scripted flow profile: water draws arrive per hour
+of the day, the counters, daily/monthly/yearly buckets, column capacities,
+regenerations and the salt or mineral level evolve with them. The responses
+use the JSON files in `dev/data/<model>/` as templates for static values.
+
+Devices are reachable the way the integration expects them:
+* `--bind loopback` (default): every device gets its own address 127.0.x.y on
+  the native port (Perla 8080, Silk and SmartDos 80), so plain hosts work in
+  the config flow. Binding port 80 needs root, as in the dev container.
+* `--bind ports`: all devices share `--host` on the port range starting at
+  `--port-base`, for load tools that address devices by port.
+
+Faults can be injected for all devices (`--latency`, `--timeout-rate`,
+`--empty-rate`, `--error-rate`) or per device group with `--scenario`, a JSON
+list like `[{"model": "silk", "count": 10, "profile": "leak",
+"faults": {"error_rate": 0.1}}]`. `--time-scale 60` runs one simulated
+minute per second. GET / lists all devices and their addresses.
+
+Perla endpoints: GET /api/<EndpointName> (e.g. /api/GetCurrentData), basic
+auth with user "user" and the code "perla".
+Silk endpoint: GET /silk/registers
+SmartDos endpoints: GET /api/v1/gatt/<uuid>
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import copy
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import ipaddress
+import json
+import logging
+from pathlib import Path
+import random
+import time
+from typing import Any
+
+from aiohttp import web
+
+_LOGGER = logging.getLogger(__name__)
+
+_PERLA_AUTH = "Basic " + base64.b64encode(b"user:perla").decode("ascii")
+_NATIVE_PORTS = {"perla": 8080, "silk": 80, "smartdos": 80}
+# Hosts binding all local addresses.
+_WILDCARD_HOSTS = ("0.0.0.0", "::", "")
+
+# Expected water draws per hour of the day.
+_PROFILES: dict[str, list[float]] = {
+    "household": [0.2] * 5 + [2, 6, 6, 3] + [1.5] * 8 + [3, 4, 4, 4, 3, 1] + [0.4],
+    "heavy": [0.5] * 5 + [6, 15, 15, 8] + [5] * 8 + [8, 10, 10, 10, 8, 3] + [1],
+    "idle": [0.0] * 24,
+}
+# A leak adds a constant flow [l/h] on top of the household profile.
+_LEAK_FLOW = 25
+
+
+def _load_templates(folder: Path) -> dict[str, Any]:
+    """Load the JSON response templates of one model."""
+    templates: dict[str, Any] = {}
+    for path in folder.glob("*.json"):
+        with path.open(encoding="utf-8") as file:
+            templates[path.stem] = json.load(file)
+    return templates
+
+
+@dataclass
+class Faults:
+    """Injected faults of a device, rates are probabilities per request."""
+
+    latency: float = 0.0  # mean seconds
+    jitter: float = 0.0  # seconds
+    timeout_rate: float = 0.0
+    empty_rate: float = 0.0
+    error_rate: float = 0.0
+
+
+class FlowScript:
+    """Scripted water draws with random start, duration and flow rate."""
+
+    def __init__(self, rng: random.Random, profile: str) -> None:
+        self._rng = rng
+        self._rates = _PROFILES["household" if profile == "leak" else profile]
+        self._base_flow = _LEAK_FLOW if profile == "leak" else 0
+        self._next_start: float | None = None
+        self._event_end = 0.0
+        self._event_flow = 0.0
+
+    def flow(self, now: float) -> float:
+        """Return the flow [l/h] at `now`."""
+        drawing = self._event_flow if now < self._event_end else 0.0
+        return self._base_flow + drawing
+
+    def next_change(self, now: float) -> float:
+        """Return the next time the flow changes, scheduling the next draw if needed."""
+        if now < self._event_end:
+            return self._event_end
+        if self._next_start is None or self._next_start < now:
+            hour = datetime.fromtimestamp(now).hour
+            rate = self._rates[hour]
+            wait = self._rng.expovariate(rate / 3600) if rate > 0 else 3600
+            self._next_start = now + wait
+        return self._next_start
+
+    def start_draw(self, now: float) -> None:
+        """Start the scheduled draw if it is due."""
+        if self._next_start is not None and self._next_start <= now:
+            self._next_start = None
+            self._event_end = now + self._rng.uniform(10, 600)
+            self._event_flow = self._rng.choice((180, 360, 480, 720, 1200))
+
+
+class VirtualDevice:
+    """Common state of a simulated device."""
+
+    model: str
+
+    def __init__(
+        self,
+        index: int,
+        host: str,
+        port: int,
+        profile: str,
+        faults: Faults,
+        templates: dict[str, Any],
+        now: float,
+    ) -> None:
+        self.index = index
+        self.host = host
+        self.port = port
+        self.profile = profile
+        self.faults = faults
+        self.templates = templates
+        self.rng = random.Random(index)
+        self.script = FlowScript(self.rng, profile)
+        self.updated = now
+        self.requests = 0
+        self.hardness_in = self.rng.randint(12, 25)
+        self.hardness_out = self.rng.choice((4, 6, 8))
+        self.blended_total = self.rng.uniform(10_000, 500_000)
+        self.daily = [0.0] * 48
+        self.monthly = [0.0] * 31
+        self.yearly = [0.0] * 12
+        self.day = datetime.fromtimestamp(now).date()
+
+    def advance(self, now: float) -> None:
+        """Integrate the scripted flow up to `now`."""
+        t = self.updated
+        while t < now:
+            moment = datetime.fromtimestamp(t)
+            bucket_end = (
+                moment.replace(minute=(moment.minute // 30) * 30, second=0, microsecond=0)
+                + timedelta(minutes=30)
+            ).timestamp()
+            change = self.script.next_change(t)
+            end = min(now, bucket_end, change)
+            liters = self.script.flow(t) * (end - t) / 3600
+            if moment.date() != self.day:
+                self._new_day(moment)
+            self.daily[moment.hour * 2 + moment.minute // 30] += liters
+            self.monthly[moment.day - 1] += liters
+            self.yearly[moment.month - 1] += liters
+            self.blended_total += liters
+            self.consume(liters, end)
+            t = end
+            self.script.start_draw(t)
+        self.updated = now
+
+    def _new_day(self, moment: datetime) -> None:
+        """Reset the buckets that start over."""
+        self.daily = [0.0] * 48
+        if moment.day == 1:
+            self.monthly = [0.0] * 31
+            if moment.month == 1:
+                self.yearly = [0.0] * 12
+        self.day = moment.date()
+
+    def treated(self, blended: float) -> int:
+        """Convert blended into treated water, the unit of the device buckets."""
+        return int(blended * (1 - self.hardness_out / self.hardness_in))
+
+    def consume(self, liters: float, now: float) -> None:
+        """Update the model specific state for used water."""
+
+    def routes(self, path: str, request: web.Request) -> Any:
+        """Return the JSON body for a path, None for 404 or a web.Response."""
+        raise NotImplementedError
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "index": self.index,
+            "model": self.model,
+            "host": self.host,
+            "port": self.port,
+            "profile": self.profile,
+            "requests": self.requests,
+        }
+
+
+class PerlaDevice(VirtualDevice):
+    """Perla One or Duplex with the local API."""
+
+    model = "perla"
+
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.columns = 2 if self.index % 3 == 0 else 1
+        self.column_capacity = self.rng.choice((1500.0, 2500.0))
+        self.remaining = [self.column_capacity * self.rng.random(), self.column_capacity]
+        self.active = 0
+        self.regenerations = [self.rng.randint(50, 500), 0]
+        self.last_regeneration = [self.updated, self.updated]
+        self.salt_capacity = 25_000.0
+        self.salt = self.salt_capacity * self.rng.uniform(0.2, 1)
+        self.salt_total = self.rng.uniform(50_000, 500_000)
+
+    def consume(self, liters: float, now: float) -> None:
+        self.remaining[self.active] -= liters
+        if self.remaining[self.active] > 0:
+            return
+        # Regenerate the exhausted column, a duplex switches to the other one
+        regenerated = self.active
+        self.remaining[regenerated] = self.column_capacity
+        self.regenerations[regenerated] += 1
+        self.last_regeneration[regenerated] = now
+        salt = self.column_capacity * (self.hardness_in - self.hardness_out) * 0.012
+        self.salt = max(0.0, self.salt - salt)
+        self.salt_total += salt
+        if self.salt < 0.1 * self.salt_capacity and self.rng.random() < 0.5:
+            self.salt = self.salt_capacity
+        if self.columns == 2:
+            self.active = 1 - self.active
+
+    def _current(self) -> dict[str, Any]:
+        data = copy.deepcopy(self.templates.get("GetCurrentData", {}))
+
+        def stamp(ts: float) -> str:
+            return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+        def capacity(column: int) -> int:
+            return int(self.remaining[column] * (self.hardness_in - self.hardness_out) * 1000)
+
+        data.update(
+            {
+                "BlendedWaterSinceSetup_l": int(self.blended_total),
+                "CapacityColumn1_ml_dH": capacity(0),
+                "CapacityColumn2_ml_dH": capacity(1) if self.columns == 2 else -1,
+                "CurrentFlowrate_l_h": int(self.script.flow(self.updated)),
+                "HardnessIN_dH": self.hardness_in,
+                "HardnessOUT_dH": self.hardness_out,
+                "LastRegenerationColumn1": stamp(self.last_regeneration[0]),
+                "LastRegenerationColumn2": stamp(self.last_regeneration[1]),
+                "RegenerationCounterColumn1": self.regenerations[0],
+                "RegenerationCounterColumn2": self.regenerations[1],
+                "RegenerationCountSinceSetup": sum(self.regenerations),
+                "RegenerativLevel": int(self.salt / self.salt_capacity * 100),
+                "RegenerativRemainingDays": int(self.salt / 150),
+                "RegenerativSinceSetup_g": int(self.salt_total),
+                "WaterTreatedCurrentDay_l": self.treated(sum(self.daily)),
+                "WaterTreatedCurrentMonth_l": self.treated(sum(self.monthly)),
+                "WaterTreatedCurrentYear_l": self.treated(sum(self.yearly)),
+            }
+        )
+        return data
+
+    def routes(self, path: str, request: web.Request) -> Any:
+        if path == "/api":
+            return web.Response(status=404, text="Not Found")
+        if request.headers.get("Authorization") != _PERLA_AUTH:
+            return web.Response(status=404, text="")
+        match path:
+            case "/api/GetCurrentData":
+                return self._current()
+            case "/api/GetDailyData":
+                return {
+                    f"{i // 2:02}{(i % 2) * 30:02}_{i // 2:02}{(i % 2) * 30 + 29:02}_l": self.treated(v)
+                    for i, v in enumerate(self.daily)
+                }
+            case "/api/GetMonthlyData":
+                return {f"Day{i + 1:02}_l": self.treated(v) for i, v in enumerate(self.monthly)}
+            case "/api/GetYearlyData":
+                return {f"Month{i + 1:02}_l": self.treated(v) for i, v in enumerate(self.yearly)}
+        return None
+
+
+class SilkDevice(VirtualDevice):
+    """Perla Silk serving its raw register list."""
+
+    model = "silk"
+
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.capacity = self.rng.choice((1500.0, 2500.0))
+        self.remaining = self.capacity * self.rng.random()
+        self.recharges = self.rng.randint(50, 500)
+        self.salt_capacity = 100
+        self.salt = self.rng.randint(20, 100)
+        self.days_in_service = self.rng.randint(10, 2000)
+
+    def consume(self, liters: float, now: float) -> None:
+        self.remaining -= liters
+        if self.remaining > 0:
+            return
+        self.remaining = self.capacity
+        self.recharges += 1
+        self.salt = max(0, self.salt - 2)
+        if self.salt < 10 and self.rng.random() < 0.5:
+            self.salt = self.salt_capacity
+
+    def routes(self, path: str, request: web.Request) -> Any:
+        if path != "/silk/registers":
+            return None
+        registers = [0] * 48
+        registers[4] = int(self.hardness_in * 17.8)  # ppm
+        registers[15] = int(self.blended_total / 100)
+        registers[16] = int(self.script.flow(self.updated) / 60)  # l/min
+        registers[17] = self.days_in_service
+        registers[18] = max(0, 730 - self.days_in_service)
+        registers[19] = self.recharges
+        registers[23] = int(self.remaining)
+        registers[30] = self.salt_capacity
+        registers[31] = self.salt
+        registers[34] = 180
+        registers[42] = int(sum(self.daily))
+        return {"params": registers}
+
+
+class SmartDosDevice(VirtualDevice):
+    """SmartDos dosing device with its GATT characteristics."""
+
+    model = "smartdos"
+
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.pouch = 1000.0  # ml
+        self.remaining = self.pouch * self.rng.uniform(0.1, 1)
+        self.dosed = self.rng.uniform(0, 5000)
+        self.dosing_rate = 1.5  # ml/m3
+
+    def consume(self, liters: float, now: float) -> None:
+        dosed = liters / 1000 * self.dosing_rate
+        self.dosed += dosed
+        self.remaining -= dosed
+        if self.remaining <= 0:
+            self.remaining = self.pouch
+
+    def routes(self, path: str, request: web.Request) -> Any:
+        if not path.startswith("/api/v1/gatt/"):
+            return None
+        uuid = path.rsplit("/", 1)[1]
+        data = copy.deepcopy(self.templates.get(f"gatt_{uuid}"))
+        if data is None:
+            return None
+        flowing = self.script.flow(self.updated) > 0
+        match uuid:
+            case "0201":
+                data["devState"] = 2002 if flowing else 2001
+                data["activeStates"] = [data["devState"]]
+                data["uptime"] = int(self.updated) % 1_000_000
+            case "0208":
+                data["time"] = datetime.fromtimestamp(self.updated).strftime("%Y-%m-%d %H:%M:%S")
+            case "0402":
+                data["remCapacity"] = round(self.remaining, 1)
+                data["remCapacityPct"] = round(self.remaining / self.pouch * 100)
+                data["remCapacityDays"] = int(self.remaining / self.dosing_rate / 0.2)
+            case "0503":
+                data["flow"] = {"1": {"totFlow": int(self.blended_total * 1000)}}
+            case "0505":
+                data["dosedMineral"] = round(self.dosed, 1)
+        return data
+
+
+_DEVICE_TYPES = {"perla": PerlaDevice, "silk": SilkDevice, "smartdos": SmartDosDevice}
+
+
+@dataclass
+class Simulator:
+    """All virtual devices, addressed by the local socket of a request."""
+
+    time_scale: float = 1.0
+    devices: dict[tuple[str, int], VirtualDevice] = field(default_factory=dict)
+    started: float = field(default_factory=time.time)
+
+    def now(self) -> float:
+        """Return the simulated wall clock."""
+        return self.started + (time.time() - self.started) * self.time_scale
+
+    def device_at(self, host: str, port: int) -> VirtualDevice | None:
+        """Return the device of a local address, also when bound to all addresses."""
+        if (device := self.devices.get((host, port))) is not None:
+            return device
+        # The socket of a request has the concrete address, e.g. 127.0.0.1
+        for wildcard in _WILDCARD_HOSTS:
+            if (device := self.devices.get((wildcard, port))) is not None:
+                return device
+        return None
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        """Answer a request for the device behind the local address."""
+        if request.path == "/":
+            return web.json_response([d.describe() for d in self.devices.values()])
+        sockname = request.transport.get_extra_info("sockname") if request.transport else None
+        device = self.device_at(sockname[0], sockname[1]) if sockname else None
+        if device is None:
+            raise web.HTTPNotFound
+        device.requests += 1
+        faults = device.faults
+        if faults.latency or faults.jitter:
+            delay = device.rng.gauss(faults.latency, faults.jitter)
+            await asyncio.sleep(max(0.0, delay))
+        roll = device.rng.random()
+        if roll < faults.timeout_rate:
+            await asyncio.sleep(3600)
+        roll -= faults.timeout_rate
+        if roll < faults.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+        roll -= faults.error_rate
+        if roll < faults.empty_rate:
+            return web.Response(status=200, text="", content_type="application/json")
+        device.advance(self.now())
+        body = device.routes(request.path, request)
+        if body is None:
+            raise web.HTTPNotFound
+        if isinstance(body, web.StreamResponse):
+            return body
+        return web.json_response(body)
+
+
+def _addresses(args, count: int):
+    """Yield (host, port or None) per device, None meaning the native port."""
+    if args.bind == "ports":
+        for index in range(count):
+            yield args.host, args.port_base + index
+        return
+    base = ipaddress.ip_address(args.loopback_base)
+    for index in range(count):
+        yield str(base + index), None
+
+
+def build_devices(args) -> Simulator:
+    """Create the devices of the command line and the scenario file."""
+    simulator = Simulator(time_scale=args.time_scale)
+    default_faults = Faults(
+        latency=args.latency,
+        jitter=args.jitter,
+        timeout_rate=args.timeout_rate,
+        empty_rate=args.empty_rate,
+        error_rate=args.error_rate,
+    )
+    groups = [
+        {"model": model, "count": getattr(args, model), "profile": args.profile}
+        for model in _DEVICE_TYPES
+        if getattr(args, model)
+    ]
+    if args.scenario:
+        with open(args.scenario, encoding="utf-8") as file:
+            groups.extend(json.load(file))
+
+    total = sum(group.get("count", 1) for group in groups)
+    addresses = _addresses(args, total)
+    templates = {m: _load_templates(Path(args.data_dir) / m) for m in _DEVICE_TYPES}
+    index = 0
+    for group in groups:
+        model = group["model"]
+        faults = Faults(**{**default_faults.__dict__, **group.get("faults", {})})
+        for _ in range(group.get("count", 1)):
+            host, port = next(addresses)
+            port = port or _NATIVE_PORTS[model]
+            device = _DEVICE_TYPES[model](
+                index,
+                host,
+                port,
+                group.get("profile", args.profile),
+                faults,
+                templates[model],
+                simulator.now(),
+            )
+            simulator.devices[(host, port)] = device
+            index += 1
+    return simulator
+
+
+async def start(simulator: Simulator) -> web.AppRunner:
+    """Start one site per device address, the runner stops them."""
+    app = web.Application()
+    app.router.add_route("GET", "/{tail:.*}", simulator.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    for host, port in simulator.devices:
+        await web.TCPSite(runner, host, port, backlog=512).start()
+    return runner
+
+
+async def serve(args) -> None:
+    """Serve the devices of the command line until cancelled."""
+    simulator = build_devices(args)
+    runner = await start(simulator)
+    first = next(iter(simulator.devices.values()), None)
+    _LOGGER.info(
+        "Simulating %s devices, the list is served on http://%s:%s/",
+        len(simulator.devices),
+        first and first.host,
+        first and first.port,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main() -> None:  # pragma: no cover - run as script
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--perla", type=int, default=0, help="number of Perla devices")
+    parser.add_argument("--silk", type=int, default=0, help="number of Silk devices")
+    parser.add_argument("--smartdos", type=int, default=0, help="number of SmartDos devices")
+    parser.add_argument("--profile", choices=(*_PROFILES, "leak"), default="household")
+    parser.add_argument("--scenario", help="JSON file with device groups")
+    parser.add_argument("--data-dir", default="dev/data")
+    parser.add_argument("--bind", choices=("loopback", "ports"), default="loopback")
+    parser.add_argument("--loopback-base", default="127.0.1.1")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port-base", type=int, default=9000)
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--empty-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    if not (args.perla or args.silk or args.smartdos or args.scenario):
+        args.perla = 1
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""Poll BWT devices without Home Assistant and serve their metrics in OpenMetrics.
+
+Usage: python exporter/bwt_exporter.py devices.json [--port 9745] [--concurrency 32]
+with the requirements of exporter/requirements.txt installed.
+
+The device file lists the devices to poll (see devices.example.json):
+`{"devices": [{"name": "basement", "host": "192.168.1.20",
+"model": "PERLA_LOCAL_API", "code": "ABCDE"}, ...]}`. The model is a name of
+bwt_api's BwtModel, the code is only needed by the local API of Perla
+One/Duplex.
+
+Every device is polled like the integration does it: every 30 seconds, every
+second while water flows, SmartDos devices only fetch their counter between
+full updates. The data classes and the polling logic are those of the
+integration. All devices share one connection pool and at most
+`--concurrency` requests run at the same time, so one process handles
+hundreds of devices. GET /metrics returns the last values of all devices.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+from datetime import timedelta
+import importlib
+import json
+import logging
+from pathlib import Path
+import sys
+import time
+import types
+
+import aiohttp
+from aiohttp import web
+from bwt_api.api import BwtApi, BwtSilkApi, BwtSmartDosApi
+from bwt_api.bwt import BwtModel
+from bwt_api.exception import BwtException
+
+_LOGGER = logging.getLogger(__name__)
+
+_INTEGRATION = Path(__file__).resolve().parent.parent / "custom_components" / "bwt_perla"
+_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _load_integration() -> types.ModuleType:
+    """Import the polling module of the integration without Home Assistant.
+
+    Importing custom_components.bwt_perla runs its __init__, which needs Home
+    Assistant. A bare package on the same directory only runs the modules
+    imported from it, and polling and the data classes need nothing but bwt_api.
+    """
+    if "bwt_perla" not in sys.modules:
+        package = types.ModuleType("bwt_perla")
+        package.__path__ = [str(_INTEGRATION)]
+        sys.modules["bwt_perla"] = package
+    return importlib.import_module("bwt_perla.polling")
+
+
+polling = _load_integration()
+
+
+class _SharedSession:
+    """Use a session of the exporter instead of one session per client.
+
+    The constructors of bwt_api open a session per client, so the private
+    attributes they set are set here instead: bwt_api is pinned in
+    requirements.txt for them.
+    """
+
+    def _use_session(self, host: str, session: aiohttp.ClientSession) -> None:
+        self._host = host
+        self._session = session
+        self._logger = _LOGGER.getChild(host)
+
+    async def close(self) -> None:
+        """The exporter closes the shared sessions."""
+
+
+class _LocalApi(_SharedSession, BwtApi):
+    def __init__(self, host: str, session: aiohttp.ClientSession) -> None:
+        self._use_session(host, session)
+
+
+class _SilkApi(_SharedSession, BwtSilkApi):
+    def __init__(self, host: str, session: aiohttp.ClientSession) -> None:
+        self._use_session(host, session)
+
+
+class _SmartDosApi(_SharedSession, BwtSmartDosApi):
+    def __init__(self, host: str, session: aiohttp.ClientSession) -> None:
+        self._use_session(host, session)
+
+
+@dataclass
+class Device:
+    """A polled device and the result of its last poll."""
+
+    name: str
+    model: BwtModel
+    poller: object
+    data: object = None
+    up: bool = False
+    polls: int = 0
+    errors: int = 0
+    duration: float = 0.0
+    interval: timedelta | None = None
+    full_polled: float | None = None
+
+    def full_due(self, now: float) -> bool:
+        """Return if the slow changing values are due, like the slow lane."""
+        return (
+            self.full_polled is None
+            or now - self.full_polled
+            >= polling.UPDATE_INTERVAL_MAX - polling.UPDATE_INTERVAL_MIN
+        )
+
+
+class Exporter:
+    """Polls the devices and renders their metrics."""
+
+    def __init__(self, devices: list[Device], concurrency: int) -> None:
+        self.devices = devices
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def poll(self, device: Device) -> float:
+        """Poll a device once and return the seconds until its next poll."""
+        async with self._semaphore:
+            # After waiting for a free request, like the integration when its poll starts
+            now = started = time.monotonic()
+            full = device.full_due(now)
+            try:
+                # The requests time out on their own, see polling.AdaptiveTimeout
+                device.data = await device.poller.poll(device.data, full, now)
+            except (BwtException, json.JSONDecodeError, TimeoutError, aiohttp.ClientError) as err:
+                _LOGGER.debug("Polling %s failed: %s", device.name, err)
+                device.up = False
+                device.errors += 1
+            except polling.InvalidSample as err:
+                # Like the integration, the last good data stays until the device insists
+                _LOGGER.debug("Polling %s returned an implausible sample: %s", device.name, err)
+                device.up = device.data is not None and not err.persistent
+                if not device.up:
+                    device.errors += 1
+            else:
+                device.up = True
+                if full:
+                    device.full_polled = now
+            finally:
+                device.polls += 1
+                device.duration = time.monotonic() - started
+        if not device.up:
+            return polling.UPDATE_INTERVAL_MAX
+        device.interval = polling.calculate_update_interval(
+            device.interval, device.data.current_flow()
+        )
+        return device.interval.total_seconds()
+
+    async def run_device(self, device: Device) -> None:
+        """Poll a device forever."""
+        while True:
+            await asyncio.sleep(await self.poll(device))
+
+    def render(self) -> str:
+        """Return the metrics of all devices in the OpenMetrics text format."""
+        lines: list[str] = []
+        for name, kind, unit, help_text, extract in _METRICS:
+            samples = []
+            for device in self.devices:
+                try:
+                    value = extract(device)
+                except (AttributeError, TypeError, ValueError, ZeroDivisionError):
+                    # Not available for this model or in this response
+                    value = None
+                if value is not None:
+                    labels = f'device="{_escape(device.name)}",model="{device.model.name}"'
+                    suffix = "_total" if kind == "counter" else ""
+                    samples.append(f"{name}{suffix}{{{labels}}} {float(value):g}")
+            if not samples:
+                continue
+            lines.append(f"# TYPE {name} {kind}")
+            if unit:
+                lines.append(f"# UNIT {name} {unit}")
+            lines.append(f"# HELP {name} {help_text}")
+            lines.extend(samples)
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Serve GET /metrics."""
+        return web.Response(
+            body=self.render().encode("utf-8"), headers={"Content-Type": _CONTENT_TYPE}
+        )
+
+
+def _data(extract):
+    """Apply `extract` to the data of a device that is up."""
+    return lambda device: extract(device.data) if device.up else None
+
+
+# Metric families: name, type, unit, help and the value of a device.
+_METRICS = [
+    ("bwt_up", "gauge", "", "1 if the last poll succeeded.", lambda d: int(d.up)),
+    ("bwt_polls", "counter", "", "Polls of the device.", lambda d: d.polls),
+    ("bwt_poll_errors", "counter", "", "Failed polls of the device.", lambda d: d.errors),
+    ("bwt_poll_duration_seconds", "gauge", "seconds", "Duration of the last poll.", lambda d: d.duration),
+    ("bwt_poll_cadence_seconds", "gauge", "seconds", "Achieved time between polls.", lambda d: d.poller.cadence),
+    ("bwt_request_timeouts", "counter", "", "Requests that timed out.", lambda d: d.poller.timeout_count),
+    ("bwt_rejected_samples", "counter", "", "Samples rejected as implausible.", lambda d: d.poller.validator.rejected_count),
+    ("bwt_current_flow_liters_per_hour", "gauge", "liters_per_hour", "Current flow.", _data(lambda data: data.current_flow())),
+    ("bwt_output_liters", "counter", "liters", "Blended water since the device setup.", _data(lambda data: data.total_output())),
+    ("bwt_day_output_liters", "gauge", "liters", "Blended water of the current day.", _data(lambda data: data.day_output())),
+    ("bwt_regenerativ_level_percent", "gauge", "percent", "Salt or mineral left.", _data(lambda data: data.regenerativ_level())),
+    ("bwt_capacity_liters", "gauge", "liters", "Remaining capacity of column 1.", _data(lambda data: data.capacity_1())),
+    ("bwt_regenerations", "counter", "", "Regenerations since the device setup.", _data(lambda data: data.regenerations())),
+]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def create_devices(config: dict, sessions: dict[str | None, aiohttp.ClientSession]) -> list[Device]:
+    """Create the devices of the config, with one session per Perla code.
+
+    The sessions share one connector; Perla sessions carry the basic auth of
+    their code like the sessions bwt_api creates.
+    """
+    connector = sessions[None].connector
+    devices = []
+    for entry in config["devices"]:
+        model = BwtModel[entry["model"]]
+        host = entry["host"]
+        if model == BwtModel.PERLA_LOCAL_API:
+            code = entry["code"]
+            if code not in sessions:
+                sessions[code] = aiohttp.ClientSession(
+                    connector=connector,
+                    connector_owner=False,
+                    headers={"Authorization": aiohttp.BasicAuth("user", code).encode()},
+                )
+            api = _LocalApi(host, sessions[code])
+        elif model == BwtModel.PERLA_SILK:
+            api = _SilkApi(host, sessions[None])
+        else:
+            api = _SmartDosApi(host, sessions[None])
+        devices.append(Device(entry.get("name", host), model, polling.DevicePoller(api, model)))
+    return devices
+
+
+async def serve(config: dict, port: int, concurrency: int) -> None:  # pragma: no cover - run as script
+    """Poll the devices of the config and serve the metrics until cancelled."""
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    sessions: dict[str | None, aiohttp.ClientSession] = {
+        None: aiohttp.ClientSession(connector=connector)
+    }
+    exporter = Exporter(create_devices(config, sessions), concurrency)
+    app = web.Application()
+    app.router.add_get("/metrics", exporter.handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, port=port).start()
+    _LOGGER.info("Serving the metrics of %d devices on port %d", len(exporter.devices), port)
+    try:
+        await asyncio.gather(*(exporter.run_device(device) for device in exporter.devices))
+    finally:
+        await runner.cleanup()
+        for session in sessions.values():
+            await session.close()
+        await connector.close()
+
+
+def main() -> None:  # pragma: no cover - run as script
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config", type=Path, help="JSON file listing the devices")
+    parser.add_argument("--port", type=int, default=9745, help="port of the metrics endpoint")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests at the same time")
+    args = parser.parse_args()
+    config = json.loads(args.config.read_text(encoding="utf-8"))
+    try:
+        asyncio.run(serve(config, args.port, args.concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
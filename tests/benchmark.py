@@ -0,0 +1,148 @@
+"""Time and allocation measurements of hot paths, compared with stored baselines.
+
+Times are stored in calibrated units, the duration of a tick divided by the
+duration of a fixed pure Python workload on the same machine, so baselines
+recorded on a developer machine hold on CI runners as well. Allocations are
+the peak of the memory allocated during one tick, as traced by tracemalloc.
+
+Run `BWT_BENCHMARK_UPDATE=1 pytest tests/test_benchmarks.py` to record new
+baselines after an intended change, and commit `benchmark_baseline.json`.
+"""
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+import gc
+import inspect
+import json
+import os
+from pathlib import Path
+import statistics
+import time
+import tracemalloc
+
+import pytest
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+UPDATE_BASELINE = os.environ.get("BWT_BENCHMARK_UPDATE") == "1"
+
+# A tick may be this much slower or allocate this much more than its baseline.
+TIME_TOLERANCE = 1.5
+ALLOCATION_TOLERANCE = 1.2
+# Allocation slack [bytes] so tiny baselines don't fail on interpreter noise.
+_ALLOCATION_SLACK = 512
+
+_WARMUP = 10
+_BATCHES = 5
+
+# All measurements of the session, printed in the terminal summary.
+results: dict[str, "Measurement"] = {}
+
+
+@dataclass
+class Measurement:
+    """Cost of one tick of a benchmark."""
+
+    time: float
+    microseconds: float
+    peak_bytes: int
+
+
+def _calibrate() -> float:
+    """Return the seconds of a fixed pure Python workload, best of three."""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        values = {}
+        for i in range(5_000):
+            values[str(i)] = [i, i * 0.5, i % 7]
+        sum(v[1] for v in values.values())
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def _run(tick: Callable[[], Awaitable[None] | None]) -> None:
+    result = tick()
+    if inspect.isawaitable(result):
+        await result
+
+
+async def measure(
+    name: str, tick: Callable[[], Awaitable[None] | None], ticks: int = 200
+) -> Measurement:
+    """Measure the median time and the mean allocation peak of a tick."""
+    for _ in range(_WARMUP):
+        await _run(tick)
+
+    # Each batch is compared with a calibration right after it, and the fastest
+    # batch counts, so a busy machine doesn't fail the check
+    ratios = []
+    microseconds = []
+    # Like timeit, garbage collection pauses are not part of the measurement
+    gc.disable()
+    try:
+        for _ in range(_BATCHES):
+            durations = []
+            for _ in range(ticks // _BATCHES):
+                started = time.perf_counter()
+                await _run(tick)
+                durations.append(time.perf_counter() - started)
+            median = statistics.median(durations)
+            ratios.append(median / _calibrate())
+            microseconds.append(median * 1e6)
+    finally:
+        gc.enable()
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(max(10, ticks // 10)):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await _run(tick)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    measurement = Measurement(
+        time=float(f"{min(ratios):.3g}"),
+        microseconds=round(min(microseconds), 2),
+        peak_bytes=int(statistics.mean(peaks)),
+    )
+    results[name] = measurement
+    return measurement
+
+
+def check(name: str, measurement: Measurement) -> None:
+    """Fail if the measurement regressed against the baseline of `name`."""
+    baselines = {}
+    if BASELINE_PATH.exists():
+        baselines = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    if UPDATE_BASELINE:
+        baselines[name] = {"time": measurement.time, "peak_bytes": measurement.peak_bytes}
+        BASELINE_PATH.write_text(
+            json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+        )
+        return
+    if name not in baselines:
+        pytest.skip(f"No baseline for {name}, record it with BWT_BENCHMARK_UPDATE=1")
+
+    baseline = baselines[name]
+    assert measurement.time <= baseline["time"] * TIME_TOLERANCE, (
+        f"{name} got slower: {measurement.time} units per tick, baseline {baseline['time']}"
+    )
+    allowed = baseline["peak_bytes"] * ALLOCATION_TOLERANCE + _ALLOCATION_SLACK
+    assert measurement.peak_bytes <= allowed, (
+        f"{name} allocates more: {measurement.peak_bytes} bytes per tick, "
+        f"baseline {baseline['peak_bytes']}"
+    )
+
+
+def summary_lines() -> list[str]:
+    """Return the measurements of the session as table rows."""
+    lines = [f"{'benchmark':<48} {'units':>9} {'us':>10} {'peak bytes':>11}"]
+    for name, measurement in sorted(results.items()):
+        values = asdict(measurement)
+        lines.append(
+            f"{name:<48} {values['time']:>9} {values['microseconds']:>10} "
+            f"{values['peak_bytes']:>11}"
+        )
+    return lines
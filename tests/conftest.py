@@ -0,0 +1,18 @@
+"""Fixtures for bwt_perla tests."""
+import pytest
+
+from . import benchmark
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable loading the custom integration in all tests."""
+    yield
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Report the cost per tick of the benchmarks that ran."""
+    if benchmark.results:
+        terminalreporter.section("benchmarks")
+        for line in benchmark.summary_lines():
+            terminalreporter.write_line(line)
@@ -0,0 +1,167 @@
+"""Stand-in devices answering the bwt_api clients without a network."""
+from collections.abc import Callable
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from bwt_api.api import BwtApi, BwtSilkApi, BwtSmartDosApi
+from bwt_api.bwt import BwtModel
+
+_LOGGER = logging.getLogger(__name__)
+
+DEV_DATA = Path(__file__).parent.parent / "dev" / "data"
+_FOLDERS = {
+    BwtModel.PERLA_LOCAL_API: "perla",
+    BwtModel.PERLA_SILK: "silk",
+    BwtModel.SMART_DOS: "smartdos",
+}
+
+
+def fixture_responses(model: BwtModel) -> Callable[[str], Any]:
+    """Return the responses of the recorded fixtures in dev/data by request path."""
+    responses = {}
+    for path in (DEV_DATA / _FOLDERS[model]).glob("*.json"):
+        with path.open(encoding="utf-8") as file:
+            responses[path.stem] = json.load(file)
+
+    def respond(path: str) -> Any:
+        name = path.rsplit("/", 1)[1]
+        return responses[name] if name in responses else responses[f"gatt_{name}"]
+
+    return respond
+
+
+class _StandIn:
+    """Transport replacement counting the requests and bytes of a client.
+
+    The responses are serialized and parsed again, so the JSON decoding of a
+    real response is part of every measurement.
+    """
+
+    def _init_stand_in(self, responses: Callable[[str], Any]) -> None:
+        self._host = "stand-in"
+        self._logger = _LOGGER
+        self._responses = responses
+        self.requests = 0
+        self.bytes = 0
+
+    def _respond(self, path: str) -> Any:
+        body = json.dumps(self._responses(path))
+        self.requests += 1
+        self.bytes += len(body)
+        return json.loads(body)
+
+    async def close(self) -> None:
+        """Nothing to close without a session."""
+
+
+class StandInApi(_StandIn, BwtApi):
+    """Local API client of a stand-in Perla."""
+
+    def __init__(self, responses: Callable[[str], Any]) -> None:
+        self._init_stand_in(responses)
+
+    async def _BwtApi__get_data(self, endpoint: str) -> Any:
+        return self._respond(f"/api/{endpoint}")
+
+
+class StandInSilkApi(_StandIn, BwtSilkApi):
+    """Client of a stand-in Perla Silk."""
+
+    def __init__(self, responses: Callable[[str], Any]) -> None:
+        self._init_stand_in(responses)
+
+    async def get_registers(self) -> list[int]:
+        return self._respond("/silk/registers")["params"]
+
+
+class StandInSmartDosApi(_StandIn, BwtSmartDosApi):
+    """Client of a stand-in SmartDos."""
+
+    def __init__(self, responses: Callable[[str], Any]) -> None:
+        self._init_stand_in(responses)
+
+    async def _get_gatt(self, uuid: str) -> dict[str, Any]:
+        return self._respond(f"/api/v1/gatt/{uuid}")
+
+
+def stand_in_api(model: BwtModel, responses: Callable[[str], Any] | None = None):
+    """Create the client of a stand-in device, answering from the fixtures by default."""
+    responses = responses or fixture_responses(model)
+    if model == BwtModel.PERLA_LOCAL_API:
+        return StandInApi(responses)
+    if model == BwtModel.PERLA_SILK:
+        return StandInSilkApi(responses)
+    return StandInSmartDosApi(responses)
+
+
+def idle_api():
+    """Create the client of a stand-in Perla with the local API without flow."""
+    responses = fixture_responses(BwtModel.PERLA_LOCAL_API)
+
+    def idle(path: str):
+        response = responses(path)
+        return {**response, "CurrentFlowrate_l_h": 0} if path.endswith("GetCurrentData") else response
+
+    return stand_in_api(BwtModel.PERLA_LOCAL_API, idle)
+
+
+class ScriptedDevice:
+    """Stand-in device whose flow and counters follow a usage script.
+
+    The script lists water draws as (start [s], duration [s], flow [l/h]) from
+    the start of the simulation. Responses are the dev/data fixtures with the
+    flow and counters of the simulated time `now()`.
+    """
+
+    def __init__(
+        self,
+        model: BwtModel,
+        usage: list[tuple[float, float, int]],
+        now: Callable[[], float],
+    ) -> None:
+        self._model = model
+        self._usage = usage
+        self._now = now
+        self._start = now()
+        self._fixtures = fixture_responses(model)
+
+    def flow(self) -> int:
+        """Return the current flow [l/h]."""
+        elapsed = self._now() - self._start
+        return sum(
+            flow for start, duration, flow in self._usage
+            if start <= elapsed < start + duration
+        )
+
+    def liters(self) -> float:
+        """Return the water used since the start of the simulation."""
+        elapsed = self._now() - self._start
+        return sum(
+            flow * max(0.0, min(elapsed, start + duration) - start) / 3600
+            for start, duration, flow in self._usage
+        )
+
+    def __call__(self, path: str) -> Any:
+        response = self._fixtures(path)
+        liters = self.liters()
+        if self._model == BwtModel.PERLA_LOCAL_API and path.endswith("GetCurrentData"):
+            response = {
+                **response,
+                "CurrentFlowrate_l_h": self.flow(),
+                "BlendedWaterSinceSetup_l": response["BlendedWaterSinceSetup_l"] + int(liters),
+                "WaterTreatedCurrentDay_l": int(liters * 0.9),
+            }
+        elif self._model == BwtModel.PERLA_SILK:
+            registers = list(response["params"])
+            registers[15] += int(liters / 100)
+            registers[16] = self.flow() // 60
+            registers[42] = int(liters)
+            response = {"params": registers}
+        elif path.endswith("0503"):
+            response = {"flow": {"1": {"totFlow": int(liters * 1000)}}}
+        elif path.endswith("0201"):
+            state = 2002 if self.flow() else 2001
+            response = {**response, "devState": state, "activeStates": [state]}
+        return response
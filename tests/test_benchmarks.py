@@ -0,0 +1,111 @@
+"""Benchmarks of the refresh and entity update paths against the dev/data fixtures."""
+import inspect
+
+from bwt_api.bwt import BwtModel
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.bwt_perla import sensor
+from custom_components.bwt_perla.const import DOMAIN
+from custom_components.bwt_perla.coordinator import BwtCoordinator
+from custom_components.bwt_perla.data import (
+    ApiData,
+    LocalApiData,
+    SilkApiData,
+    SmartDosApiData,
+)
+
+from .benchmark import check, measure
+from .stand_in import stand_in_api
+
+MODELS = pytest.mark.parametrize("model", list(BwtModel), ids=lambda m: m.name.lower())
+
+
+def _accessors(data_class: type[ApiData]) -> list:
+    """Return the value methods of a data class, as read by the entities."""
+    return [
+        function
+        for name, function in inspect.getmembers(data_class, inspect.isfunction)
+        if not name.startswith("_")
+        and len(inspect.signature(function).parameters) == 1
+    ]
+
+
+async def _coordinator(hass: HomeAssistant, model: BwtModel) -> BwtCoordinator:
+    coordinator = BwtCoordinator(hass, stand_in_api(model), model)
+    await coordinator.async_refresh()
+    return coordinator
+
+
+@MODELS
+async def test_update_data(hass: HomeAssistant, model: BwtModel) -> None:
+    """Benchmark a refresh of the coordinator, including parsing the responses."""
+    coordinator = await _coordinator(hass, model)
+    name = f"update_data[{model.name.lower()}]"
+    check(name, await measure(name, coordinator._async_update_data))
+
+
+@MODELS
+async def test_data_construction(hass: HomeAssistant, model: BwtModel) -> None:
+    """Benchmark creating the data of a refresh and reading all its values."""
+    api = stand_in_api(model)
+    if model == BwtModel.PERLA_LOCAL_API:
+        data_class, responses = LocalApiData, (await api.get_current_data(),)
+    elif model == BwtModel.PERLA_SILK:
+        data_class, responses = SilkApiData, (await api.get_registers(),)
+    else:
+        data_class, responses = SmartDosApiData, (
+            await api.get_device_info(),
+            await api.get_configuration(),
+            await api.get_remaining_capacity(),
+            await api.get_treated_water(),
+            await api.get_substance_dosage(),
+            await api.get_wifi_info(),
+        )
+    accessors = _accessors(data_class)
+
+    def tick() -> None:
+        data = data_class(*responses)
+        for accessor in accessors:
+            accessor(data)
+
+    name = f"data_construction[{model.name.lower()}]"
+    check(name, await measure(name, tick))
+
+
+@MODELS
+async def test_entity_fan_out(hass: HomeAssistant, model: BwtModel) -> None:
+    """Benchmark the coordinator update handlers of all entities of a device.
+
+    State writes are replaced, this measures the integration's own work.
+    """
+    coordinator = await _coordinator(hass, model)
+    entry = MockConfigEntry(domain=DOMAIN, data={"model": model.name})
+    hass.data[DOMAIN] = {entry.entry_id: coordinator}
+    entities = []
+    await sensor.async_setup_entry(hass, entry, entities.extend)
+    for entity in entities:
+        entity.async_write_ha_state = lambda: None
+
+    def tick() -> None:
+        for entity in entities:
+            entity._handle_coordinator_update()
+
+    name = f"entity_fan_out[{model.name.lower()}]"
+    check(name, await measure(name, tick))
+
+
+@MODELS
+async def test_entity_construction(hass: HomeAssistant, model: BwtModel) -> None:
+    """Benchmark creating all entities of a device, as on a start of Home Assistant."""
+    coordinator = await _coordinator(hass, model)
+    entry = MockConfigEntry(domain=DOMAIN, data={"model": model.name})
+    hass.data[DOMAIN] = {entry.entry_id: coordinator}
+
+    async def tick() -> None:
+        await sensor.async_setup_entry(hass, entry, lambda entities: None)
+
+    name = f"entity_construction[{model.name.lower()}]"
+    check(name, await measure(name, tick, ticks=50))
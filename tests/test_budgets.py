@@ -0,0 +1,136 @@
+"""Request and state write budgets of one simulated day of usage.
+
+The coordinator and the sensors of each model run against a scripted stand-in
+device on a simulated clock: every refresh answers with the device state of
+the simulated time, then the clock advances by the interval the coordinator
+chose. The device requests, response bytes and state writes per entity of the
+day are compared with the budgets below, so a change of the polling or the
+entity logic shows its cost before it ships.
+"""
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+
+from bwt_api.bwt import BwtModel
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.bwt_perla import sensor
+from custom_components.bwt_perla.const import DOMAIN
+from custom_components.bwt_perla.coordinator import BwtCoordinator
+
+from .stand_in import ScriptedDevice, stand_in_api
+
+_DAY = 24 * 3600
+_HOUR = 3600
+
+# Water draws of a household day as (start [s], duration [s], flow [l/h]).
+USAGE = [
+    (6.5 * _HOUR, 600, 600),  # shower
+    (7 * _HOUR, 300, 300),  # kitchen
+    (7.25 * _HOUR, 30, 360),  # toilet
+    *((h * _HOUR, 30, 360) for h in range(9, 22, 2)),  # toilet and hand washing
+    (12 * _HOUR, 120, 480),  # cooking
+    *((18.5 * _HOUR + 900 * i, 120, 480) for i in range(3)),  # washing machine
+    (21 * _HOUR, 180, 300),  # dishwasher
+    (22 * _HOUR, 480, 720),  # bath
+]
+
+# Budgets of the day per model: device requests, response bytes and the state
+# writes per entity (translation key), `None` for all entities without their own.
+BUDGETS = {
+    BwtModel.PERLA_LOCAL_API: {
+        "requests": 5300,
+        "bytes": 5_000_000,
+        "writes": {"total_output": 5300, "day_output": 320, "current_flow": 40, None: 3000},
+    },
+    BwtModel.PERLA_SILK: {
+        "requests": 5300,
+        "bytes": 950_000,
+        "writes": {"total_output": 5300, "day_output": 350, "current_flow": 330, None: 3000},
+    },
+    BwtModel.SMART_DOS: {
+        "requests": 20_000,
+        "bytes": 1_350_000,
+        "writes": {"current_flow": 1350, None: 3000},
+    },
+}
+
+
+class SimulatedClock:
+    """Clock that only moves when advanced."""
+
+    def __init__(self, start: float) -> None:
+        self.time = start
+
+    def monotonic(self) -> float:
+        return self.time
+
+    def now(self) -> datetime:
+        return dt_util.as_local(dt_util.utc_from_timestamp(self.time))
+
+
+async def simulate_day(
+    hass: HomeAssistant, model: BwtModel, options: dict | None = None
+) -> dict:
+    """Run one simulated day and return the requests, bytes and writes."""
+    start = dt_util.start_of_local_day(datetime(2026, 3, 2)).timestamp()
+    clock = SimulatedClock(start)
+    api = stand_in_api(model, ScriptedDevice(model, USAGE, lambda: clock.time))
+    coordinator = BwtCoordinator(hass, api, model)
+    coordinator.monotonic = clock.monotonic
+    coordinator.now = clock.now
+    await coordinator.async_refresh()
+
+    entry = SimpleNamespace(entry_id="budget", title="Budget", data={}, options=options or {})
+    hass.data[DOMAIN] = {entry.entry_id: coordinator}
+    entities = []
+    await sensor.async_setup_entry(hass, entry, entities.extend)
+    writes: Counter[str] = Counter()
+    for entity in entities:
+        entity.async_write_ha_state = (
+            lambda key=entity.translation_key: writes.update((key,))
+        )
+        coordinator.async_add_listener(
+            entity._handle_coordinator_update, entity.coordinator_context
+        )
+
+    refreshes = 0
+    while clock.time < start + _DAY:
+        await coordinator.async_refresh()
+        # The clock advances here, not with the timer of the coordinator
+        coordinator._unschedule_refresh()
+        refreshes += 1
+        clock.time += coordinator.update_interval.total_seconds()
+    await coordinator.async_shutdown()
+
+    return {
+        "refreshes": refreshes,
+        "requests": api.requests,
+        "bytes": api.bytes,
+        "writes": writes,
+    }
+
+
+@pytest.mark.parametrize("model", list(BwtModel), ids=lambda m: m.name.lower())
+async def test_daily_budget(hass: HomeAssistant, model: BwtModel) -> None:
+    """Test that a day of usage stays within the request and write budgets."""
+    report = await simulate_day(hass, model)
+    budget = BUDGETS[model]
+
+    assert report["requests"] <= budget["requests"]
+    assert report["bytes"] <= budget["bytes"]
+    for key, count in report["writes"].items():
+        assert count <= budget["writes"].get(key, budget["writes"][None]), key
+
+
+async def test_polling_follows_the_flow(hass: HomeAssistant) -> None:
+    """Test that the day is polled at the ceiling except while water flows."""
+    report = await simulate_day(hass, BwtModel.PERLA_LOCAL_API)
+    flowing = sum(duration for _, duration, _ in USAGE)
+    idle_refreshes = (_DAY - flowing) / 30
+
+    # One refresh per second while flowing, plus the back-off after each draw
+    assert report["refreshes"] <= idle_refreshes + flowing + 5 * len(USAGE)
@@ -0,0 +1,42 @@
+"""Test the write filter of high-churn sensors."""
+from custom_components.bwt_perla.deadband import WriteFilter
+
+
+def test_unchanged_values_are_not_written():
+    """Test that only changed values are written without thresholds."""
+    write_filter = WriteFilter()
+    assert write_filter.should_write(100, True, 0)
+    assert not write_filter.should_write(100, True, 1)
+    assert write_filter.should_write(101, True, 2)
+
+
+def test_deadband_and_interval_suppress_jitter():
+    """Test that small changes and fast changes are suppressed."""
+    write_filter = WriteFilter(deadband=20, deadband_percent=10, min_interval=5)
+    assert write_filter.should_write(300, True, 0)
+    # Within the 30 l/h relative deadband
+    assert not write_filter.should_write(320, True, 10)
+    # Outside of the deadband, but too early
+    assert not write_filter.should_write(400, True, 3)
+    assert write_filter.should_write(400, True, 11)
+
+
+def test_flow_transitions_are_always_written():
+    """Test that water starting and stopping is written immediately."""
+    write_filter = WriteFilter(deadband=1000, min_interval=60)
+    assert write_filter.should_write(0, False, 0)
+    assert write_filter.should_write(50, True, 1)
+    assert not write_filter.should_write(60, True, 2)
+    assert write_filter.should_write(0, False, 3)
+
+
+def test_catching_up_after_the_flow_stopped():
+    """Test that a change within the deadband after the flow stopped is written when idle."""
+    write_filter = WriteFilter(deadband=5, min_interval=10)
+    assert write_filter.should_write(100, True, 0)
+    # The counter of the last poll with flow, then one catching up
+    assert write_filter.should_write(120, False, 20)
+    assert not write_filter.should_write(122, False, 21)
+    assert not write_filter.should_write(122, False, 25)
+    assert write_filter.should_write(122, False, 31)
+    assert not write_filter.should_write(122, False, 60)
@@ -0,0 +1,97 @@
+"""Test that a device added by several entries is polled once."""
+from bwt_api.bwt import BwtModel
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.setup import async_setup_component
+
+import custom_components.bwt_perla as integration
+from custom_components.bwt_perla.const import DOMAIN
+from custom_components.bwt_perla.data import SilkApiData
+from custom_components.bwt_perla.fingerprint import same_device
+
+from .stand_in import fixture_responses, stand_in_api
+
+_TOTAL_WATER_SERVED = 15
+
+_REGISTERS = fixture_responses(BwtModel.PERLA_SILK)("/silk/registers")["params"]
+
+
+def _other_device() -> list[int]:
+    """Return the registers of another Silk, with the same settings but 1000 l more."""
+    registers = list(_REGISTERS)
+    registers[_TOTAL_WATER_SERVED] += 10
+    return registers
+
+
+@pytest.fixture
+def devices(monkeypatch: pytest.MonkeyPatch) -> dict:
+    """Answer every host with the registers of its device, keeping the clients by host."""
+    registers = {"192.168.1.5": _REGISTERS, "perla.local": _REGISTERS, "192.168.1.6": _other_device()}
+    clients = {}
+
+    def client(host, logger):
+        clients[host] = stand_in_api(
+            BwtModel.PERLA_SILK, lambda path: {"params": registers[host]}
+        )
+        return clients[host]
+
+    monkeypatch.setattr(integration, "BwtSilkApi", client)
+    return clients
+
+
+async def _add(hass: HomeAssistant, host: str) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN, version=4, title=host, data={"host": host, "model": "PERLA_SILK"}
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+def test_same_device():
+    """Test that identity and counters must match, within the step of the Silk counter."""
+    data = SilkApiData(list(_REGISTERS))
+    later = list(_REGISTERS)
+    later[_TOTAL_WATER_SERVED] += 1
+    assert same_device(data, SilkApiData(later))
+    assert not same_device(data, SilkApiData(_other_device()))
+
+
+async def test_duplicate_shares_the_coordinator(hass: HomeAssistant, devices: dict) -> None:
+    """Test that the second entry of a device follows the first one and raises an issue."""
+    assert await async_setup_component(hass, DOMAIN, {})
+    first = await _add(hass, "192.168.1.5")
+    second = await _add(hass, "perla.local")
+    other = await _add(hass, "192.168.1.6")
+
+    coordinators = hass.data[DOMAIN]
+    assert coordinators[second.entry_id] is coordinators[first.entry_id]
+    assert coordinators[other.entry_id] is not coordinators[first.entry_id]
+    issues = ir.async_get(hass)
+    assert issues.async_get_issue(DOMAIN, f"duplicate_device_{second.entry_id}")
+    assert not issues.async_get_issue(DOMAIN, f"duplicate_device_{other.entry_id}")
+
+    # Only the first client keeps polling the device
+    requests = devices["perla.local"].requests
+    await coordinators[second.entry_id].async_refresh()
+    assert devices["perla.local"].requests == requests
+    assert hass.states.get("sensor.bwt_perla_total_output") is not None
+
+    # Without the first entry, the second one polls the device itself
+    assert await hass.config_entries.async_remove(first.entry_id)
+    await hass.async_block_till_done()
+    assert second.state is ConfigEntryState.LOADED
+    coordinator = hass.data[DOMAIN][second.entry_id]
+    assert coordinator.config_entry is second
+    assert not issues.async_get_issue(DOMAIN, f"duplicate_device_{second.entry_id}")
+    requests = devices["perla.local"].requests
+    await coordinator.async_refresh()
+    assert devices["perla.local"].requests == requests + 1
+
+    for entry in (second, other):
+        assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,109 @@
+"""Test the CSV export of the consumption buckets."""
+import csv
+from datetime import datetime
+import io
+
+from aiohttp import ClientPayloadError
+from bwt_api.api import treated_to_blended
+from bwt_api.bwt import BwtModel
+from bwt_api.exception import BwtException
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+
+from custom_components.bwt_perla.const import DOMAIN
+from custom_components.bwt_perla.coordinator import BwtCoordinator
+from custom_components.bwt_perla.export import ConsumptionView
+
+from .stand_in import fixture_responses, stand_in_api
+
+
+async def _coordinator(hass: HomeAssistant, model: BwtModel, responses=None) -> BwtCoordinator:
+    coordinator = BwtCoordinator(hass, stand_in_api(model, responses or fixture_responses(model)), model)
+    await coordinator.async_refresh()
+    # In the fourth half hour of the third of March
+    coordinator.now = lambda: datetime(2025, 3, 3, 1, 40, tzinfo=dt_util.get_default_time_zone())
+    return coordinator
+
+
+async def _client(hass: HomeAssistant, hass_client, coordinators: dict[str, BwtCoordinator]):
+    hass.data[DOMAIN] = coordinators
+    assert await async_setup_component(hass, "http", {})
+    hass.http.register_view(ConsumptionView)
+    return await hass_client()
+
+
+async def test_export_entry(hass: HomeAssistant, hass_client) -> None:
+    """Test that the begun buckets of an entry are exported with their blended water."""
+    coordinator = await _coordinator(hass, BwtModel.PERLA_LOCAL_API)
+    client = await _client(hass, hass_client, {"one": coordinator})
+    data = coordinator.data
+
+    response = await client.get(f"/api/{DOMAIN}/consumption/daily?entry_id=one")
+    assert response.status == 200
+    assert response.content_type == "text/csv"
+    header, *rows = list(csv.reader(io.StringIO(await response.text())))
+    assert header == ["entry_id", "start", "treated_l", "blended_l"]
+    assert [row[1][11:16] for row in rows] == ["00:00", "00:30", "01:00", "01:30"]
+    assert rows[1][2] == "1"
+    assert float(rows[1][3]) == round(treated_to_blended(1, data.hardness_in(), data.hardness_out()), 1)
+
+    response = await client.get(f"/api/{DOMAIN}/consumption/monthly?entry_id=one")
+    assert len((await response.text()).splitlines()) == 1 + 3
+    response = await client.get(f"/api/{DOMAIN}/consumption/yearly?entry_id=one")
+    assert len((await response.text()).splitlines()) == 1 + 3
+    await coordinator.async_shutdown()
+
+
+async def test_export_all(hass: HomeAssistant, hass_client) -> None:
+    """Test that all entries with buckets are exported, other models are left out."""
+    coordinators = {
+        "one": await _coordinator(hass, BwtModel.PERLA_LOCAL_API),
+        "two": await _coordinator(hass, BwtModel.PERLA_LOCAL_API),
+        "silk": await _coordinator(hass, BwtModel.PERLA_SILK),
+    }
+    client = await _client(hass, hass_client, coordinators)
+
+    response = await client.get(f"/api/{DOMAIN}/consumption/yearly")
+    _header, *rows = list(csv.reader(io.StringIO(await response.text())))
+    assert [row[0] for row in rows] == ["one"] * 3 + ["two"] * 3
+
+    assert (await client.get(f"/api/{DOMAIN}/consumption/yearly?entry_id=silk")).status == 400
+    assert (await client.get(f"/api/{DOMAIN}/consumption/yearly?entry_id=gone")).status == 404
+    assert (await client.get(f"/api/{DOMAIN}/consumption/weekly")).status == 404
+    for coordinator in coordinators.values():
+        await coordinator.async_shutdown()
+
+
+async def test_export_requires_auth(hass: HomeAssistant, hass_client_no_auth) -> None:
+    """Test that the export needs an authenticated user."""
+    hass.data[DOMAIN] = {}
+    assert await async_setup_component(hass, "http", {})
+    hass.http.register_view(ConsumptionView)
+    client = await hass_client_no_auth()
+    assert (await client.get(f"/api/{DOMAIN}/consumption/daily")).status == 401
+
+
+async def test_export_failing_device(hass: HomeAssistant, hass_client) -> None:
+    """Test that an export isn't ended as complete when a device doesn't respond."""
+    responses = fixture_responses(BwtModel.PERLA_LOCAL_API)
+
+    def failing(path: str):
+        if path.endswith("GetYearlyData"):
+            raise BwtException("no buckets")
+        return responses(path)
+
+    coordinators = {
+        "one": await _coordinator(hass, BwtModel.PERLA_LOCAL_API),
+        "two": await _coordinator(hass, BwtModel.PERLA_LOCAL_API, failing),
+    }
+    client = await _client(hass, hass_client, coordinators)
+    response = await client.get(f"/api/{DOMAIN}/consumption/yearly")
+    assert response.status == 200
+    # The connection is closed without the last chunk
+    with pytest.raises(ClientPayloadError):
+        await response.text()
+    for coordinator in coordinators.values():
+        await coordinator.async_shutdown()
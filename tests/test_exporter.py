@@ -0,0 +1,78 @@
+"""Test the standalone exporter and that the polling works without Home Assistant."""
+import importlib.util
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+from bwt_api.bwt import BwtModel
+
+from .stand_in import stand_in_api
+
+EXPORTER = Path(__file__).parent.parent / "exporter" / "bwt_exporter.py"
+
+# Fails every import of homeassistant before loading the exporter.
+_WITHOUT_HOME_ASSISTANT = f"""
+import importlib.abc, importlib.util, sys
+
+class Block(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path, target=None):
+        if name.split(".")[0] == "homeassistant":
+            raise ImportError(name)
+
+sys.meta_path.insert(0, Block())
+spec = importlib.util.spec_from_file_location("bwt_exporter", {str(EXPORTER)!r})
+sys.modules["bwt_exporter"] = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sys.modules["bwt_exporter"])
+import bwt_perla.data
+"""
+
+
+def _load_exporter():
+    spec = importlib.util.spec_from_file_location("bwt_exporter", EXPORTER)
+    module = importlib.util.module_from_spec(spec)
+    # The dataclasses look up their module
+    sys.modules["bwt_exporter"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_requirements_pinned_like_the_integration():
+    """Test that the exporter pins the bwt_api version the integration requires."""
+    manifest = EXPORTER.parent.parent / "custom_components" / "bwt_perla" / "manifest.json"
+    requirements = (EXPORTER.parent / "requirements.txt").read_text(encoding="utf-8")
+    pins = [line for line in requirements.splitlines() if line and not line.startswith("#")]
+    assert pins == json.loads(manifest.read_text(encoding="utf-8"))["requirements"]
+
+
+def test_polling_without_home_assistant():
+    """Test that the exporter, the polling and the data classes don't need Home Assistant."""
+    result = subprocess.run(
+        [sys.executable, "-c", _WITHOUT_HOME_ASSISTANT], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+async def test_metrics_of_all_models():
+    """Test that stand-in devices of every model are polled and rendered."""
+    exporter_module = _load_exporter()
+    devices = [
+        exporter_module.Device(
+            model.name.lower(),
+            model,
+            exporter_module.polling.DevicePoller(stand_in_api(model), model),
+        )
+        for model in BwtModel
+    ]
+    exporter = exporter_module.Exporter(devices, concurrency=2)
+    for device in devices:
+        # Flow on the Perla fixture, the others only estimate it
+        assert await exporter.poll(device) == (1 if device.model == BwtModel.PERLA_LOCAL_API else 30)
+
+    metrics = exporter.render()
+    assert metrics.endswith("# EOF\n")
+    assert 'bwt_up{device="perla_local_api",model="PERLA_LOCAL_API"} 1' in metrics
+    assert 'bwt_current_flow_liters_per_hour{device="perla_local_api",model="PERLA_LOCAL_API"} 100' in metrics
+    assert 'bwt_output_liters_total{device="perla_local_api",model="PERLA_LOCAL_API"} 123456' in metrics
+    assert 'bwt_polls_total{device="smart_dos",model="SMART_DOS"} 1' in metrics
+    assert "# UNIT bwt_output_liters liters" in metrics
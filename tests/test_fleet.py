@@ -0,0 +1,119 @@
+"""Test the site totals of all softeners."""
+from dataclasses import dataclass
+import time
+
+from bwt_api.bwt import BwtModel
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.setup import async_setup_component
+
+from custom_components.bwt_perla.const import DATA_SITE, DOMAIN
+from custom_components.bwt_perla.coordinator import BwtCoordinator
+from custom_components.bwt_perla.fleet import SiteAggregate
+
+from .stand_in import stand_in_api
+
+
+@dataclass
+class _Data:
+    flow: int
+    total: int
+    day: int
+    level: int
+
+    def current_flow(self) -> int:
+        return self.flow
+
+    def total_output(self) -> int:
+        return self.total
+
+    def day_output(self) -> int:
+        return self.day
+
+    def regenerativ_level(self) -> int:
+        return self.level
+
+
+def test_totals_follow_the_members():
+    """Test that sums and the lowest level follow updates and removals of members."""
+    site = SiteAggregate()
+    site.update("a", _Data(100, 1000, 10, 40))
+    site.update("b", _Data(50, 2000, 20, 70))
+    assert (site.current_flow, site.total_output, site.day_output, site.min_level) == (150, 3000, 30, 40)
+
+    # Refilled, the other softener is the lowest now
+    site.update("a", _Data(0, 1010, 20, 95))
+    assert (site.current_flow, site.total_output, site.day_output, site.min_level) == (50, 3010, 40, 70)
+    site.update("b", _Data(0, 2000, 20, 30))
+    assert site.min_level == 30
+
+    site.async_remove_member("b")
+    assert (site.total_output, site.min_level, site.members) == (1010, 95, 1)
+    site.async_remove_member("a")
+    assert (site.total_output, site.min_level, site.members) == (0, None, 0)
+
+
+def test_update_cost_doesnt_grow_with_the_site():
+    """Test that an update of one member takes as long among 10 as among 10000 members."""
+
+    def update_time(members: int) -> float:
+        site = SiteAggregate()
+        for member in range(members):
+            site.update(str(member), _Data(0, member, 0, 50 + member % 50))
+        started = time.perf_counter()
+        for tick in range(2000):
+            site.update("0", _Data(tick % 2, tick, tick, 40 + tick % 20))
+        return time.perf_counter() - started
+
+    small = min(update_time(10) for _ in range(3))
+    large = min(update_time(10000) for _ in range(3))
+    assert large < small * 3, f"{large:.4f} s among 10000 members, {small:.4f} s among 10"
+
+
+async def test_members_are_followed(hass: HomeAssistant) -> None:
+    """Test that the refreshes of member coordinators update the site."""
+    site = SiteAggregate()
+    coordinators = []
+    for entry_id in ("one", "two"):
+        coordinator = BwtCoordinator(hass, stand_in_api(BwtModel.PERLA_LOCAL_API), BwtModel.PERLA_LOCAL_API)
+        await coordinator.async_refresh()
+        site.async_add_member(entry_id, coordinator)
+        coordinators.append(coordinator)
+    data = coordinators[0].data
+    assert site.total_output == 2 * data.total_output()
+    assert site.current_flow == 2 * data.current_flow()
+
+    updates = []
+    site.async_add_listener(lambda: updates.append(site.current_flow))
+    site.async_remove_member("two")
+    assert updates == [data.current_flow()]
+    for coordinator in coordinators:
+        await coordinator.async_shutdown()
+
+
+async def test_site_entry(hass: HomeAssistant) -> None:
+    """Test that the site is added from the menu once and shows the totals of its members."""
+    assert await async_setup_component(hass, DOMAIN, {})
+    MockConfigEntry(domain=DOMAIN, version=4, data={"host": "device", "model": "PERLA_SILK"}).add_to_hass(hass)
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+    assert result["type"] is FlowResultType.MENU
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {"next_step_id": "site"})
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.bwt_perla_site_total_output").state == "unknown"
+
+    coordinator = BwtCoordinator(hass, stand_in_api(BwtModel.PERLA_LOCAL_API), BwtModel.PERLA_LOCAL_API)
+    await coordinator.async_refresh()
+    hass.data[DATA_SITE].async_add_member("device", coordinator)
+    assert hass.states.get("sensor.bwt_perla_site_total_output").state == str(coordinator.data.total_output())
+    assert hass.states.get("sensor.bwt_perla_site_regenerativ_level").state == str(
+        coordinator.data.regenerativ_level()
+    )
+
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {"next_step_id": "site"})
+    assert result["type"] is FlowResultType.ABORT
+    await coordinator.async_shutdown()
@@ -0,0 +1,33 @@
+"""Test the flow estimation from water counters."""
+from custom_components.bwt_perla.flow_estimator import FlowEstimator
+
+
+def test_fine_counter_follows_the_flow():
+    """Test that a ml counter gives the flow and drops to zero when it stops."""
+    estimator = FlowEstimator(0.001)
+    assert estimator.update(100.0, 0) == 0
+    # 5 l in the 30 s since the last reading
+    assert estimator.update(105.0, 30) == 600
+    assert round(estimator.update(105.1667, 31)) == 600
+    assert estimator.update(105.1667, 32) == 0
+
+
+def test_coarse_counter_is_smoothed():
+    """Test that a counter stepping every few readings gives a steady flow."""
+    estimator = FlowEstimator(1.0)
+    estimator.update(10, 0)
+    estimator.update(11, 1)
+    flows = []
+    for second in range(2, 60):
+        # 360 l/h steps the counter once every 10 s
+        flows.append(estimator.update(11 + (second - 1) // 10, second))
+    assert all(300 <= flow <= 3600 for flow in flows[:10])
+    assert all(330 <= flow <= 400 for flow in flows[-20:])
+
+
+def test_counter_reset_restarts():
+    """Test that a daily counter starting over is no negative flow."""
+    estimator = FlowEstimator(1.0)
+    estimator.update(500, 0)
+    assert estimator.update(0, 30) == 0
+    assert estimator.update(1, 60) == 120
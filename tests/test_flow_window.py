@@ -0,0 +1,62 @@
+"""Test the rolling flow statistics."""
+import time
+
+import pytest
+
+from custom_components.bwt_perla.flow_window import FlowStatistics, FlowWindow
+
+
+def test_time_weighted_mean_and_volume():
+    """Test that flows count for the time they were held, the oldest only within the window."""
+    window = FlowWindow(60)
+    # 600 l/h for 30 s, then 0 l/h for 10 s
+    window.add(0, 30, 600)
+    window.add(30, 40, 0)
+    assert window.volume(40) == pytest.approx(5)
+    assert window.mean(40) == pytest.approx(450)
+
+    # 40 s later, only 10 s of the 600 l/h are left in the window
+    window.add(40, 80, 1200)
+    assert window.volume(80) == pytest.approx(600 * 10 / 3600 + 1200 * 40 / 3600)
+    assert window.mean(80) == pytest.approx((600 * 10 + 1200 * 40) / 60)
+
+    # Segments ending before the window are gone
+    window.add(80, 200, 0)
+    assert window.volume(200) == 0
+    assert window.peak() == 0
+
+
+def test_peak_leaves_with_its_segment():
+    """Test that the peak drops once its segment ended before the window."""
+    statistics = FlowStatistics()
+    for now, flow in ((0, 100), (10, 900), (20, 300), (30, 200), (40, 0)):
+        statistics.update(flow, now)
+    assert statistics.peak(statistics.minute) == 900
+    statistics.update(0, 75)
+    # 900 l/h was held from 10 to 20 s
+    assert statistics.peak(statistics.minute) == 900
+    statistics.update(0, 81)
+    assert statistics.peak(statistics.minute) == 300
+    statistics.update(500, 82)
+    assert statistics.peak(statistics.minute) == 500
+    assert statistics.hour.mean(82) == pytest.approx(
+        (100 * 10 + 900 * 10 + 300 * 10 + 200 * 10) / 82
+    )
+
+
+def test_update_cost_doesnt_grow_with_the_window():
+    """Test that a sample costs the same with 60 or 3600 samples in the window."""
+
+    def update_time(interval: float) -> float:
+        statistics = FlowStatistics()
+        started = time.perf_counter()
+        for tick in range(20000):
+            # Rising flows would keep all of them in the peak deques
+            statistics.update(tick % 500, tick * interval)
+            statistics.hour.mean(tick * interval)
+            statistics.peak(statistics.hour)
+        return time.perf_counter() - started
+
+    sparse = min(update_time(60) for _ in range(3))
+    dense = min(update_time(1) for _ in range(3))
+    assert dense < sparse * 3, f"{dense:.4f} s with 3600 samples per hour, {sparse:.4f} s with 60"
@@ -0,0 +1,98 @@
+"""Import time budget of the platforms, per model.
+
+Each platform is imported cold in a fresh interpreter, with the parts of Home
+Assistant that are loaded before any integration and the entity component of
+the platform already imported. The time to import the platform, and for the
+sensor platform the entity module of the model, in the calibrated units of the
+benchmarks, must stay within the budget. The sensor platform must not import
+the entity modules of the other models nor the binary sensor component, and
+the binary sensor platform none of the entity modules of the models.
+"""
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+from bwt_api.bwt import BwtModel
+import pytest
+
+from custom_components.bwt_perla.sensor import _MODEL_MODULES
+
+from . import benchmark
+
+# Calibrated units to import a platform with bwt_api and the module of a model
+IMPORT_BUDGET = 50
+# Fresh interpreters are noisy, the best of some attempts counts
+_ATTEMPTS = 3
+
+_PACKAGE = "custom_components.bwt_perla"
+_ROOT = Path(__file__).parent.parent
+
+_SCRIPT = """
+import importlib, json, sys, time
+import homeassistant.components.{platform}
+import homeassistant.config_entries
+import homeassistant.helpers.entity_platform
+import homeassistant.helpers.update_coordinator
+from tests.benchmark import _calibrate
+
+started = time.perf_counter()
+for module in {modules!r}:
+    importlib.import_module(module)
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "calibration": _calibrate(), "modules": list(sys.modules)}}))
+"""
+
+
+def _cold_import(platform: str, modules: list[str]) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _SCRIPT.format(platform=platform, modules=modules)],
+        cwd=_ROOT,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+def _measure(name: str, platform: str, modules: list[str]) -> set[str]:
+    """Check the budget of the cold import and return the imported modules."""
+    best = None
+    for _ in range(_ATTEMPTS):
+        result = _cold_import(platform, modules)
+        units = result["seconds"] / result["calibration"]
+        if best is None or units < best[0]:
+            best = (units, result)
+        if units <= IMPORT_BUDGET:
+            break
+    units, result = best
+
+    benchmark.results[name] = benchmark.Measurement(
+        time=float(f"{units:.3g}"),
+        microseconds=round(result["seconds"] * 1e6, 2),
+        peak_bytes=0,
+    )
+    assert units <= IMPORT_BUDGET, f"{name} took {units:.3g} units, budget {IMPORT_BUDGET}"
+    return set(result["modules"])
+
+
+def _model_modules() -> set[str]:
+    return {f"{_PACKAGE}.sensors.{module}" for module in _MODEL_MODULES.values()}
+
+
+@pytest.mark.parametrize("model", list(BwtModel), ids=lambda m: m.name.lower())
+def test_sensor_import_budget(model: BwtModel) -> None:
+    """Test that the sensors of a model import within the budget and without the other models."""
+    module = f"{_PACKAGE}.sensors.{_MODEL_MODULES[model]}"
+    modules = _measure(
+        f"import[sensor-{model.name.lower()}]", "sensor", [f"{_PACKAGE}.sensor", module]
+    )
+    assert not (_model_modules() - {module}) & modules
+    # The binary sensors have their own platform
+    assert "homeassistant.components.binary_sensor" not in modules
+
+
+def test_binary_sensor_import_budget() -> None:
+    """Test that the binary sensors import within the budget and without the models."""
+    modules = _measure("import[binary_sensor]", "binary_sensor", [f"{_PACKAGE}.binary_sensor"])
+    assert not _model_modules() & modules
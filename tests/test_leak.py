@@ -0,0 +1,39 @@
+"""Test the leak detection."""
+from custom_components.bwt_perla.leak import LeakDetector
+
+
+def test_continuous_flow_is_suspected_once():
+    """Test that a long flow raises the suspicion once and a break clears it."""
+    detector = LeakDetector(duration=3600)
+    for second in range(0, 3600, 30):
+        assert not detector.update(20, second)
+    assert detector.update(20, 3600)
+    assert not detector.update(20, 3630)
+    assert detector.suspected
+    assert round(detector.volume) == 20
+    assert not detector.update(0, 3660)
+    assert not detector.suspected
+
+
+def test_volume_limit_and_minimum_flow():
+    """Test the volume limit and the minimum flow of the window."""
+    detector = LeakDetector(duration=3600, volume=100)
+    detector.update(600, 0)
+    detector.update(1200, 60)
+    assert detector.minimum_flow == 600
+    assert not detector.suspected
+    # 100 l more in the next 5 minutes
+    assert detector.update(1200, 360)
+    assert detector.volume >= 100
+
+
+def test_gaps_and_small_flows():
+    """Test that short gaps don't end a flow, long gaps and small flows do."""
+    detector = LeakDetector(duration=1800, min_flow=10)
+    detector.update(20, 0)
+    detector.update(20, 500)
+    assert detector.duration(500) == 500
+    detector.update(20, 1200)
+    assert detector.duration(1200) == 0
+    detector.update(5, 1230)
+    assert detector.duration(1230) == 0
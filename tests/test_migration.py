@@ -0,0 +1,99 @@
+"""Test the config entry migrations on a large entity registry."""
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.bwt_perla import async_migrate_entry
+from custom_components.bwt_perla.const import DOMAIN
+
+_KEYS = ("total_output", "current_flow", "day_output", "regenerativ_level")
+
+
+def _populate(
+    hass: HomeAssistant, bwt_entries: int, other_entities: int, version: int, first: int = 0
+) -> list[MockConfigEntry]:
+    """Fill the registry with BWT entities of an old version and entities of other integrations."""
+    registry = er.async_get(hass)
+    for index in range(other_entities):
+        registry.entities[f"sensor.other_{index}"] = er.RegistryEntry(
+            entity_id=f"sensor.other_{index}", unique_id=str(index), platform="other"
+        )
+    entries = []
+    for index in range(first, first + bwt_entries):
+        entry = MockConfigEntry(domain=DOMAIN, version=version, data={"host": f"10.0.0.{index}"})
+        entry.add_to_hass(hass)
+        entries.append(entry)
+        for key in _KEYS:
+            # Entity ids of old versions could contain dollar signs
+            entity_id = f"sensor.bwt_perla_{index}_${key}"
+            # Version 1 had a single entry and unique ids without its entry id
+            unique_id = key if version == 1 else f"{entry.entry_id}_{key}"
+            registry.entities[entity_id] = er.RegistryEntry(
+                entity_id=entity_id, unique_id=unique_id, platform=DOMAIN, config_entry_id=entry.entry_id
+            )
+    return entries
+
+
+async def _migrate(hass: HomeAssistant, entries: list[MockConfigEntry]) -> None:
+    """Migrate all entries."""
+    for entry in entries:
+        assert await async_migrate_entry(hass, entry)
+
+
+async def test_migration_renames_once(hass: HomeAssistant) -> None:
+    """Test that unique and entity ids are migrated, and a repeated migration changes nothing."""
+    (entry,) = _populate(hass, 1, 10, version=1)
+    await _migrate(hass, [entry])
+    registry = er.async_get(hass)
+    entity = registry.async_get("sensor.bwt_perla_0_total_output")
+    assert entity.unique_id == f"{entry.entry_id}_total_output"
+    assert entry.version == 4
+    assert registry.async_get("sensor.other_0").unique_id == "0"
+
+    # An interrupted migration runs again from the old version
+    hass.config_entries.async_update_entry(entry, version=1)
+    await _migrate(hass, [entry])
+    assert registry.async_get(entity.entity_id).unique_id == f"{entry.entry_id}_total_output"
+
+
+async def test_migration_moves_the_holiday_mode(hass: HomeAssistant) -> None:
+    """Test that the holiday mode of the sensor platform is removed for the binary sensor."""
+    (entry,) = _populate(hass, 1, 0, version=3)
+    registry = er.async_get(hass)
+    holiday_mode = registry.async_get_or_create(
+        "sensor", DOMAIN, f"{entry.entry_id}_holiday_mode", config_entry=entry
+    )
+    await _migrate(hass, [entry])
+    assert registry.async_get(holiday_mode.entity_id) is None
+    assert registry.async_get("sensor.bwt_perla_0_$total_output") is not None
+    assert entry.version == 4
+
+
+async def test_migration_doesnt_scan_the_registry(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the migration reads the entities of its entry, not the whole registry."""
+    entries = _populate(hass, 20, 1000, version=2)
+    registry = er.async_get(hass)
+
+    def scan(*args, **kwargs):
+        raise AssertionError("The migration scanned the whole entity registry")
+
+    lookups = []
+    async_entries_for_config_entry = er.async_entries_for_config_entry
+
+    def entries_for_config_entry(registry, config_entry_id):
+        lookups.append(config_entry_id)
+        return async_entries_for_config_entry(registry, config_entry_id)
+
+    monkeypatch.setattr(er, "async_entries_for_config_entry", entries_for_config_entry)
+
+    with monkeypatch.context() as patch:
+        # Saving the registry later reads all entities
+        for method in ("values", "items", "keys"):
+            patch.setattr(registry.entities, method, scan)
+        await _migrate(hass, entries)
+    assert lookups == [entry.entry_id for entry in entries]
+    assert registry.async_get("sensor.bwt_perla_0_total_output") is not None
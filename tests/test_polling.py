@@ -0,0 +1,98 @@
+"""Test the adaptive request timeouts, that polls don't overlap and the update lanes."""
+import asyncio
+
+from bwt_api.bwt import BwtModel
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.bwt_perla.coordinator import BwtCoordinator, UpdateLane
+from custom_components.bwt_perla.polling import AdaptiveTimeout, DevicePoller
+
+from .stand_in import stand_in_api
+
+
+def test_timeout_follows_the_latency():
+    """Test that the timeout stays at the ceiling until enough latencies are seen, then adapts within its bounds."""
+    timeout = AdaptiveTimeout()
+    for _ in range(9):
+        timeout.record(0.05)
+    assert timeout.timeout == 10
+    timeout.record(0.05)
+    assert timeout.timeout == 2
+    for _ in range(50):
+        timeout.record(1.0)
+    assert timeout.timeout == 3
+    for _ in range(50):
+        timeout.record(8.0)
+    assert timeout.timeout == 10
+
+
+async def test_hung_request_times_out_early():
+    """Test that a request hanging on a fast device fails after the floor and is counted."""
+    api = stand_in_api(BwtModel.PERLA_LOCAL_API)
+    poller = DevicePoller(api, BwtModel.PERLA_LOCAL_API)
+    for second in range(10):
+        await poller.poll(None, True, second)
+    assert poller.timeouts["get_current_data"].timeout == 2
+    assert poller.cadence == 1
+
+    hang = asyncio.Event()
+
+    async def hung():
+        await hang.wait()
+
+    api.get_current_data = hung
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(TimeoutError):
+        await poller.poll(None, True, 10)
+    assert 2 <= loop.time() - started < 3
+    assert poller.timeout_count == 1
+
+
+async def test_polls_do_not_overlap():
+    """Test that a poll requested while another one runs gets its data without a request."""
+    api = stand_in_api(BwtModel.PERLA_LOCAL_API)
+    poller = DevicePoller(api, BwtModel.PERLA_LOCAL_API)
+    release = asyncio.Event()
+    get_current_data = api.get_current_data
+
+    async def slow():
+        await release.wait()
+        return await get_current_data()
+
+    api.get_current_data = slow
+    first = asyncio.create_task(poller.poll(None, True, 0))
+    second = asyncio.create_task(poller.poll(None, True, 1))
+    await asyncio.sleep(0)
+    release.set()
+    assert await first is await second
+    assert api.requests == 1
+
+
+async def test_slow_lane_follows_its_poll(hass: HomeAssistant):
+    """Test that the slow lane is updated exactly by the refreshes polling its values."""
+    coordinator = BwtCoordinator(
+        hass, stand_in_api(BwtModel.PERLA_LOCAL_API), BwtModel.PERLA_LOCAL_API
+    )
+    now = [1000.0]
+    coordinator.monotonic = lambda: now[0]
+    poll = coordinator.poller.poll
+    full_polls = []
+
+    async def slow_poll(previous, full, monotonic):
+        full_polls.append(full)
+        # The lane becomes due while the device answers
+        now[0] += 1
+        return await poll(previous, full, monotonic)
+
+    coordinator.poller.poll = slow_poll
+    updates = []
+    coordinator.async_add_listener(lambda: updates.append(full_polls[-1]), UpdateLane.SLOW)
+    for _ in range(40):
+        await coordinator.async_refresh()
+        coordinator._unschedule_refresh()
+    assert full_polls.count(True) == 2
+    assert updates == [True, True]
+    await coordinator.async_shutdown()
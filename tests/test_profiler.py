@@ -0,0 +1,31 @@
+"""Test the sampling profiler."""
+import sys
+
+from custom_components.bwt_perla.profiler import SamplingProfiler
+
+
+def _leaf(profiler: SamplingProfiler) -> None:
+    profiler.sample(sys._getframe())
+
+
+def _scope(profiler: SamplingProfiler) -> None:
+    _leaf(profiler)
+
+
+def test_only_samples_in_scope_count():
+    """Test that samples outside the scope functions are dropped and the others aggregated."""
+    profiler = SamplingProfiler([_scope.__code__], 0.001)
+    _leaf(profiler)
+    _scope(profiler)
+    _scope(profiler)
+
+    assert profiler.samples == 3
+    assert sum(profiler.scope_samples.values()) == 2
+    self_samples = {key[2]: count for key, count in profiler.self_samples.items()}
+    total_samples = {key[2]: count for key, count in profiler.total_samples.items()}
+    assert self_samples == {"_leaf": 2}
+    # The test function calling the scope is not part of it
+    assert total_samples == {"_leaf": 2, "_scope": 2}
+    report = profiler.report(1)
+    assert "2 of 3 samples" in report
+    assert report.splitlines()[4].startswith("_scope")
@@ -0,0 +1,67 @@
+"""Test the prediction of the next regeneration of the columns."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.bwt_perla.regeneration import RegenerationPredictor
+
+_START = datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+
+def _close(predicted: datetime | None, expected: datetime) -> bool:
+    return predicted is not None and abs((predicted - expected).total_seconds()) < 60
+
+
+def _feed(predictor, hours, rate, capacities, drains, now=_START, total=0.0, step=timedelta(minutes=10)):
+    """Feed samples of a constant consumption [l/h], the columns draining their share of it."""
+    capacities = list(capacities)
+    for _ in range(int(hours * 3600 / step.total_seconds())):
+        predictor.update(now, total, capacities)
+        used = rate * step.total_seconds() / 3600
+        total += used
+        capacities = [capacity - used * drain for capacity, drain in zip(capacities, drains)]
+        now += step
+    predictor.update(now, total, capacities)
+    return now, total, capacities
+
+
+def test_single_column():
+    """Test that a column regenerates when the consumption used up its capacity."""
+    predictor = RegenerationPredictor()
+    now, total, capacities = _feed(predictor, 12, 20, [5000], [1])
+    # Not predicted before a day was observed
+    assert predictor.next_regeneration(0) is None
+
+    now, _total, (capacity,) = _feed(predictor, 24, 20, capacities, [1], now, total)
+    assert predictor.consumption_rate == pytest.approx(20)
+    assert _close(predictor.next_regeneration(0), now + timedelta(hours=capacity / 20))
+    assert predictor.next_regeneration(1) is None
+
+
+def test_alternating_columns():
+    """Test that a column on standby regenerates after the column in service."""
+    predictor = RegenerationPredictor()
+    now, _total, (first, second) = _feed(predictor, 48, 40, [8000, 6000], [1, 0])
+    first_regeneration = now + timedelta(hours=first / 40)
+    assert _close(predictor.next_regeneration(0), first_regeneration)
+    assert _close(predictor.next_regeneration(1), first_regeneration + timedelta(hours=second / 40))
+
+
+def test_parallel_columns_and_storage():
+    """Test that columns sharing the consumption drain at their share, also after a restore."""
+    predictor = RegenerationPredictor()
+    now, _total, (first, second) = _feed(predictor, 48, 40, [8000, 8000], [0.5, 0.5])
+    restored = RegenerationPredictor.from_dict(predictor.as_dict())
+    for column, capacity in enumerate((first, second)):
+        assert _close(restored.next_regeneration(column), now + timedelta(hours=capacity / 20))
+    assert RegenerationPredictor.from_dict({"rate": "x"}).consumption_rate is None
+
+
+def test_regeneration_doesnt_count_as_consumption():
+    """Test that a refilled capacity doesn't change the shares."""
+    predictor = RegenerationPredictor()
+    _feed(predictor, 48, 40, [8000, 6000], [1, 0])
+    shares = list(predictor.shares)
+    later = _START + timedelta(days=3)
+    predictor.update(later, 10000, [9000, 6000])
+    assert predictor.shares == shares
@@ -0,0 +1,80 @@
+"""Smoke test of the replay of captured traces in dev/replay.py."""
+import importlib.util
+import json
+from pathlib import Path
+
+from bwt_api.bwt import BwtModel
+import pytest
+
+from custom_components.bwt_perla.trace import encode
+
+from .stand_in import stand_in_api
+
+_REPLAY = Path(__file__).parent.parent / "dev" / "replay.py"
+_METHODS = {
+    BwtModel.PERLA_LOCAL_API: "get_current_data",
+    BwtModel.PERLA_SILK: "get_registers",
+}
+
+
+def _load_replay():
+    spec = importlib.util.spec_from_file_location("replay", _REPLAY)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("model", list(_METHODS), ids=lambda m: m.name.lower())
+async def test_replay_of_a_short_trace(tmp_path: Path, model: BwtModel) -> None:
+    """Test that a trace of the dev/data responses replays without failures."""
+    method = _METHODS[model]
+    response = encode(await getattr(stand_in_api(model), method)())
+    trace = tmp_path / "trace.jsonl"
+    trace.write_text(
+        "".join(
+            json.dumps({"t": 1_700_000_000 + second, "m": method, "r": response, "d": 0.05}) + "\n"
+            for second in range(0, 120, 30)
+        ),
+        encoding="utf-8",
+    )
+
+    report = await _load_replay().replay(str(trace), 0, {}, None)
+    assert report["model"] == model.name
+    assert report["refreshes"] > 0
+    assert report["failed_refreshes"] == 0
+    assert report["state_writes"]
+
+
+async def test_replay_with_options(tmp_path: Path) -> None:
+    """Test that the options reach the coordinator and predictive polling learns."""
+    api = stand_in_api(BwtModel.PERLA_LOCAL_API)
+    responses = {
+        method: encode(await getattr(api, method)())
+        for method in ("get_current_data", "get_daily_data")
+    }
+    trace = tmp_path / "trace.jsonl"
+    trace.write_text(
+        "".join(
+            json.dumps({"t": 1_700_000_000 + second, "m": method, "r": response}) + "\n"
+            for second in range(0, 120, 30)
+            for method, response in responses.items()
+        ),
+        encoding="utf-8",
+    )
+    replay = _load_replay()
+    coordinators = []
+
+    class RecordingCoordinator(replay.BwtCoordinator):
+        def __init__(self, *args) -> None:
+            super().__init__(*args)
+            coordinators.append(self)
+
+    replay.BwtCoordinator = RecordingCoordinator
+    report = await replay.replay(
+        str(trace), 0, {"predictive_polling": True, "leak_duration": 5}, None
+    )
+    assert report["failed_refreshes"] == 0
+    (coordinator,) = coordinators
+    assert coordinator.config_entry.entry_id == "replay"
+    assert coordinator.leak_detector._duration == 300
+    assert coordinator._profile is not None
@@ -0,0 +1,46 @@
+"""Test the salt account."""
+from datetime import datetime, timedelta
+
+from custom_components.bwt_perla.salt import SaltAccount
+
+_START = datetime(2026, 3, 2, 12, 0)
+
+
+def test_usage_from_the_mass_counter():
+    """Test the salt per regeneration and m³ and the learned mass of a percent."""
+    account = SaltAccount()
+    account.update(80, 100, 50_000, 12_000, _START)
+    # Ten regenerations of 300 g each for 4 m³, the tank drops by 20 %
+    for i in range(1, 11):
+        account.update(80 - 2 * i, 100 + i, 50_000 + 400 * i, 12_000 + 300 * i, _START)
+    assert account.salt_per_regeneration == 300
+    assert account.salt_per_cubic_meter == 750
+    assert account.grams_per_percent == 150
+
+
+def test_refill_is_detected_and_merged():
+    """Test that a level jump is one refill, with the rises of the next hour merged."""
+    account = SaltAccount(capacity=25)
+    account.update(30, 0, 0, None, _START)
+    account.update(24, 1, 100, None, _START + timedelta(days=1))
+    assert account.salt_used == 6 * 250
+    account.update(26, 1, 100, None, _START + timedelta(days=1, hours=1))
+    assert account.refill_count == 0
+    assert account.update(60, 1, 100, None, _START + timedelta(days=1, hours=2))
+    account.update(90, 1, 100, None, _START + timedelta(days=1, hours=2, minutes=20))
+    assert account.refill_count == 1
+    refill = account.refills[-1]
+    assert (refill.level_before, refill.level_after, refill.mass) == (24, 90, 16.5)
+
+
+def test_restored_account_continues():
+    """Test that a stored account keeps counting from the stored counters."""
+    account = SaltAccount()
+    account.update(50, 10, 1000, 5000, _START)
+    account.update(80, 11, 1200, 5300, _START + timedelta(hours=1))
+    restored = SaltAccount.from_dict(account.as_dict())
+    restored.update(79, 12, 1400, 5600, _START + timedelta(hours=2))
+    assert restored.salt_per_regeneration == 300
+    assert restored.refill_count == 1
+    assert restored.refills[0].time == _START + timedelta(hours=1)
+    assert SaltAccount.from_dict({"salt_used": 1}).regenerations == 0
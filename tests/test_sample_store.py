@@ -0,0 +1,170 @@
+"""Test the append-only sample store."""
+from dataclasses import dataclass
+import mmap
+
+from bwt_api.bwt import BwtModel
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.bwt_perla import async_remove_entry
+from custom_components.bwt_perla.const import CONF_PREDICTIVE_POLLING, CONF_SAMPLE_STORE, DOMAIN
+from custom_components.bwt_perla.coordinator import BwtCoordinator
+from custom_components.bwt_perla.data import SilkApiData
+from custom_components.bwt_perla.sample_store import (
+    LAYOUT_REGISTERS,
+    LAYOUT_SUMMARY,
+    SILK_REGISTERS,
+    SUMMARY,
+    SampleStore,
+    iter_records,
+)
+
+from .stand_in import stand_in_api
+
+
+@dataclass
+class _Data:
+    flow: int
+    total: int
+
+    def current_flow(self) -> int:
+        return self.flow
+
+    def total_output(self) -> int:
+        return self.total
+
+    def day_output(self) -> int:
+        return self.total % 1000
+
+    def regenerativ_level(self) -> int:
+        return 80
+
+    def state_code(self) -> None:
+        return None
+
+
+async def _run(function, *args):
+    return function(*args)
+
+
+def _store(path, segment_bytes=1 << 20, retention=86400.0, layout=LAYOUT_SUMMARY) -> SampleStore:
+    store = SampleStore(path, layout, segment_bytes, retention, _run)
+    store.open()
+    return store
+
+
+async def test_time_range_read(tmp_path) -> None:
+    """Test that a time range is read as views of the mapped segments."""
+    store = _store(tmp_path)
+    for second in range(100):
+        store.append(1000.0 + second, _Data(second, 5000 + second))
+    await store.async_close()
+
+    ((layout, records),) = store.read(1010, 1020)
+    assert layout == LAYOUT_SUMMARY
+    assert isinstance(records.obj, mmap.mmap)
+    assert len(records) == 10 * SUMMARY.size
+    rows = list(iter_records(layout, records))
+    assert [row[0] for row in rows] == [1010.0 + second for second in range(10)]
+    assert rows[0][1:] == (10.0, 5010.0, 10.0, 80, 0xFFFF)
+    assert store.read(2000, 3000) == []
+    del records
+
+
+async def test_rotation_and_retention(tmp_path) -> None:
+    """Test that full segments are rotated and expired ones deleted as a whole."""
+    # 10 records per segment
+    store = _store(tmp_path, segment_bytes=16 + 10 * SUMMARY.size, retention=50)
+    for second in range(40):
+        store.append(float(second), _Data(0, second))
+        await store.async_flush()
+    assert len(list(tmp_path.iterdir())) == 4
+    assert sum(len(records) for _, records in store.read(0, 40)) == 40 * SUMMARY.size
+
+    # A clock set back repeats the last timestamp
+    store.append(10.0, _Data(0, 40))
+    for second in range(41, 100):
+        store.append(float(second), _Data(0, second))
+        await store.async_flush()
+    views = store.read(0, 100)
+    timestamps = [row[0] for layout, records in views for row in iter_records(layout, records)]
+    # The segment of 39 to 49 still has records within 50 s of the last segment start 90
+    assert timestamps[0] == 39
+    assert timestamps == sorted(timestamps)
+    assert len(list(tmp_path.iterdir())) == len(views) == 6
+    del views
+
+
+async def test_reopen_continues(tmp_path) -> None:
+    """Test that a reopened store appends to its last segment, after its last record."""
+    store = _store(tmp_path)
+    for second in range(5):
+        store.append(100.0 + second, _Data(0, second))
+    await store.async_close()
+
+    store = _store(tmp_path)
+    store.append(50.0, _Data(0, 5))
+    await store.async_close()
+    assert len(list(tmp_path.iterdir())) == 1
+    ((layout, records),) = store.read(0, 200)
+    assert [row[0] for row in iter_records(layout, records)] == [100, 101, 102, 103, 104, 104]
+    del records
+
+    # Another layout starts a new segment
+    store = _store(tmp_path, layout=LAYOUT_REGISTERS)
+    store.append(200.0, SilkApiData(list(range(50))))
+    await store.async_close()
+    (_summary, (layout, records)) = store.read(0, 300)
+    assert layout == LAYOUT_REGISTERS
+    ((timestamp, *registers),) = iter_records(layout, records)
+    assert (timestamp, registers) == (200.0, list(range(SILK_REGISTERS)))
+    del records
+
+
+async def test_coordinator_stores_samples(hass: HomeAssistant, tmp_path) -> None:
+    """Test that the coordinator appends a record for every refresh when enabled."""
+    hass.config.config_dir = str(tmp_path)
+    entry = MockConfigEntry(domain=DOMAIN, options={CONF_SAMPLE_STORE: True})
+    entry.add_to_hass(hass)
+    coordinator = BwtCoordinator(hass, stand_in_api(BwtModel.PERLA_LOCAL_API), BwtModel.PERLA_LOCAL_API, entry)
+    await coordinator.async_open_sample_store()
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    await coordinator.async_shutdown()
+
+    store = coordinator.sample_store
+    rows = [
+        row
+        for layout, records in await hass.async_add_executor_job(store.read, 0, float("inf"))
+        for row in iter_records(layout, records)
+    ]
+    assert len(rows) == 2
+    assert rows[0][1:3] == (coordinator.data.current_flow(), coordinator.data.total_output())
+    assert (tmp_path / f"{DOMAIN}_samples" / entry.entry_id).is_dir()
+
+
+async def test_removed_entry_leaves_no_data(
+    hass: HomeAssistant, hass_storage: dict, tmp_path
+) -> None:
+    """Test that removing an entry deletes its samples and its learned state."""
+    hass.config.config_dir = str(tmp_path)
+    entry = MockConfigEntry(
+        domain=DOMAIN, options={CONF_SAMPLE_STORE: True, CONF_PREDICTIVE_POLLING: True}
+    )
+    entry.add_to_hass(hass)
+    coordinator = BwtCoordinator(hass, stand_in_api(BwtModel.PERLA_LOCAL_API), BwtModel.PERLA_LOCAL_API, entry)
+    await coordinator.async_refresh()
+    await coordinator.async_load_profile()
+    await coordinator.async_load_baseline()
+    await coordinator.async_load_salt_account()
+    await coordinator.async_load_regeneration()
+    await coordinator.async_open_sample_store()
+    await coordinator.async_refresh()
+    await coordinator.async_shutdown()
+    stores = {key for key in hass_storage if key.startswith(f"{DOMAIN}.{entry.entry_id}.")}
+    assert len(stores) == 4
+
+    await async_remove_entry(hass, entry)
+    assert not stores & set(hass_storage)
+    assert not (tmp_path / f"{DOMAIN}_samples" / entry.entry_id).exists()
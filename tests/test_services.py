@@ -0,0 +1,143 @@
+"""Test the refresh and burst services."""
+import asyncio
+from datetime import timedelta
+from pathlib import Path
+
+from bwt_api.bwt import BwtModel
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.util import dt as dt_util
+
+from custom_components.bwt_perla import services
+from custom_components.bwt_perla.const import DOMAIN
+from custom_components.bwt_perla.coordinator import BwtCoordinator
+
+from .stand_in import idle_api
+
+
+async def _setup(hass: HomeAssistant, count: int) -> list[BwtCoordinator]:
+    coordinators = []
+    for _ in range(count):
+        coordinator = BwtCoordinator(hass, idle_api(), BwtModel.PERLA_LOCAL_API)
+        await coordinator.async_refresh()
+        coordinators.append(coordinator)
+    hass.data[DOMAIN] = {f"entry_{i}": c for i, c in enumerate(coordinators)}
+    services.async_setup(hass)
+    return coordinators
+
+
+async def test_refresh_coalesces(hass: HomeAssistant) -> None:
+    """Test that concurrent refreshes share one poll and polls within a second are skipped."""
+    (coordinator,) = await _setup(hass, 1)
+    api = coordinator.my_api
+    now = [1000.0]
+    coordinator.monotonic = lambda: now[0]
+    await coordinator.async_refresh()
+    requests = api.requests
+
+    # Polled just now, the data is fresh enough
+    await hass.services.async_call(DOMAIN, services.SERVICE_REFRESH, {}, blocking=True)
+    assert api.requests == requests
+
+    now[0] += 5
+    await asyncio.gather(
+        *(
+            hass.services.async_call(
+                DOMAIN, services.SERVICE_REFRESH, {"config_entry_id": "entry_0"}, blocking=True
+            )
+            for _ in range(3)
+        )
+    )
+    assert api.requests == requests + 1
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN, services.SERVICE_REFRESH, {"config_entry_id": "missing"}, blocking=True
+        )
+    await coordinator.async_shutdown()
+
+
+async def test_burst_ends(hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a burst polls at its interval and the usual schedule returns after it."""
+    monkeypatch.setattr(services, "_MAX_BURST_RATE", 1)
+    coordinators = await _setup(hass, 2)
+    coordinator = coordinators[0]
+    assert coordinator.update_interval == timedelta(seconds=30)
+
+    await hass.services.async_call(
+        DOMAIN,
+        services.SERVICE_BURST,
+        {"config_entry_id": "entry_0", "interval": 2, "duration": 5},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+    assert coordinator.update_interval == timedelta(seconds=2)
+    assert coordinators[1].update_interval == timedelta(seconds=30)
+
+    # The interval of all bursts together is limited
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN, services.SERVICE_BURST, {"config_entry_id": "entry_1"}, blocking=True
+        )
+    assert coordinators[1].burst_interval is None
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=6))
+    await hass.async_block_till_done()
+    assert coordinator.burst_interval is None
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=4)
+    for coordinator in coordinators:
+        await coordinator.async_shutdown()
+
+
+async def test_entries_of_one_device(hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that two entries sharing the coordinator of a device poll it once."""
+    monkeypatch.setattr(services, "_MAX_BURST_RATE", 1)
+    (coordinator,) = await _setup(hass, 1)
+    hass.data[DOMAIN]["entry_1"] = coordinator
+    api = coordinator.my_api
+    now = [1000.0]
+    coordinator.monotonic = lambda: now[0]
+    await coordinator.async_refresh()
+    requests = api.requests
+
+    now[0] += 5
+    await hass.services.async_call(DOMAIN, services.SERVICE_REFRESH, {}, blocking=True)
+    assert api.requests == requests + 1
+
+    # One device bursting once a second, whichever entries target it
+    await hass.services.async_call(
+        DOMAIN, services.SERVICE_BURST, {"interval": 1, "duration": 1}, blocking=True
+    )
+    await hass.services.async_call(
+        DOMAIN,
+        services.SERVICE_BURST,
+        {"config_entry_id": "entry_1", "interval": 1, "duration": 1},
+        blocking=True,
+    )
+    assert coordinator.burst_interval == 1
+    await coordinator.async_shutdown()
+
+
+async def test_profile_writes_timings(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that the refreshes during a profile are sampled and written to a file."""
+    (coordinator,) = await _setup(hass, 1)
+    hass.config.config_dir = str(tmp_path)
+    profile = asyncio.ensure_future(
+        hass.services.async_call(
+            DOMAIN, services.SERVICE_PROFILE, {"duration": 1}, blocking=True, return_response=True
+        )
+    )
+    while not profile.done():
+        for _ in range(20):
+            await coordinator._async_update_data()
+            coordinator.async_update_listeners()
+        await asyncio.sleep(0)
+
+    report = Path((await profile)["path"]).read_text(encoding="utf-8")
+    assert "BwtCoordinator._async_update_data" in report
+    assert "DevicePoller.request" in report
+    await coordinator.async_shutdown()
@@ -0,0 +1,66 @@
+"""Smoke test of the device simulator in dev/simulator.py."""
+import importlib.util
+from pathlib import Path
+import socket
+import sys
+from types import SimpleNamespace
+
+import aiohttp
+
+_DEV = Path(__file__).parent.parent / "dev"
+
+
+def _load_simulator():
+    spec = importlib.util.spec_from_file_location("simulator", _DEV / "simulator.py")
+    module = importlib.util.module_from_spec(spec)
+    # The dataclasses look up their module
+    sys.modules["simulator"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def test_devices_on_ports_of_all_addresses(socket_enabled: None) -> None:
+    """Test that devices bound to all addresses answer on their port."""
+    simulator = _load_simulator()
+    args = SimpleNamespace(
+        perla=1,
+        silk=1,
+        smartdos=1,
+        profile="household",
+        scenario=None,
+        data_dir=str(_DEV / "data"),
+        bind="ports",
+        loopback_base="127.0.1.1",
+        host="0.0.0.0",
+        port_base=_free_port(),
+        time_scale=1.0,
+        latency=0.0,
+        jitter=0.0,
+        timeout_rate=0.0,
+        empty_rate=0.0,
+        error_rate=0.0,
+    )
+    devices = simulator.build_devices(args)
+    runner = await simulator.start(devices)
+    base = f"http://127.0.0.1:{args.port_base}"
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base}/") as response:
+                assert len(await response.json()) == 3
+            async with session.get(
+                f"{base}/api/GetCurrentData", auth=aiohttp.BasicAuth("user", "perla")
+            ) as response:
+                assert response.status == 200
+                assert "CurrentFlowrate_l_h" in await response.json()
+            silk = f"http://127.0.0.1:{args.port_base + 1}"
+            async with session.get(f"{silk}/silk/registers") as response:
+                assert response.status == 200
+                assert (await response.json())["params"]
+    finally:
+        await runner.cleanup()
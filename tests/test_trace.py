@@ -0,0 +1,59 @@
+"""Test that traced calls replay like the device answered them."""
+import asyncio
+import json
+from pathlib import Path
+
+from bwt_api.bwt import BwtModel
+from bwt_api.exception import ConnectException
+import pytest
+
+from custom_components.bwt_perla.trace import ReplayApi, TracingApi
+
+from .stand_in import stand_in_api
+
+
+async def _run(func, *args):
+    return func(*args)
+
+
+async def test_replay_of_results_errors_and_timeouts(tmp_path: Path) -> None:
+    """Test that a result, an error and a timed out call come back from the trace."""
+    api = stand_in_api(BwtModel.PERLA_LOCAL_API)
+    get_current_data = api.get_current_data
+    path = tmp_path / "trace.jsonl"
+    tracing = TracingApi(api, str(path), _run)
+
+    result = await tracing.get_current_data()
+
+    async def unreachable():
+        raise ConnectException("unreachable")
+
+    api.get_current_data = unreachable
+    with pytest.raises(ConnectException):
+        await tracing.get_current_data()
+
+    async def hanging():
+        await asyncio.sleep(1)
+        return await get_current_data()
+
+    api.get_current_data = hanging
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.01):
+            await tracing.get_current_data()
+    await tracing.close()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [record["m"] for record in records] == ["get_current_data"] * 3
+    # Within a millisecond the calls could share their time
+    for second, record in enumerate(records):
+        record["t"] = second
+
+    now = [0]
+    replay = ReplayApi(records, lambda: now[0])
+    assert await replay.get_current_data() == result
+    now[0] = 1
+    with pytest.raises(ConnectException):
+        await replay.get_current_data()
+    now[0] = 2
+    with pytest.raises(TimeoutError):
+        await replay.get_current_data()
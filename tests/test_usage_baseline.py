@@ -0,0 +1,65 @@
+"""Test the hour-of-week usage baseline."""
+from datetime import datetime, timedelta
+
+from custom_components.bwt_perla.usage_baseline import QuantileSketch, UsageBaseline
+
+_MONDAY = datetime(2026, 3, 2)
+
+
+def _poll_hour(baseline: UsageBaseline, start: datetime, counter: float, liters: float) -> float:
+    """Poll the hour from just before `start` every 30 s, using `liters` evenly."""
+    baseline.update(counter, start - timedelta(seconds=30))
+    for step in range(120):
+        baseline.update(counter + liters * step / 120, start + timedelta(seconds=30 * step))
+    return counter + liters
+
+
+def test_sketch_quantiles():
+    """Test that the quantiles are within the bucket error and old values fade."""
+    sketch = QuantileSketch()
+    for value in range(1, 101):
+        sketch.add(value)
+    # Only the last ~10 observations carry weight
+    assert 80 <= sketch.quantile(0.5) <= 110
+    assert sketch.rank(1000) > 0.9
+    assert sketch.rank(0) < 0.01
+    restored = QuantileSketch.from_dict(sketch.as_dict())
+    assert restored.quantile(0.5) == sketch.quantile(0.5)
+    assert restored.observations == 100
+
+
+def test_learns_complete_hours_per_slot():
+    """Test that usage is compared with the same hour of earlier weeks."""
+    baseline = UsageBaseline()
+    counter = 1000.0
+    for week in range(4):
+        monday_seven = _MONDAY + timedelta(weeks=week, hours=7)
+        counter = _poll_hour(baseline, monday_seven, counter, 100)
+        # The first sample of the next hour completes the hour
+        assert baseline.update(counter, monday_seven + timedelta(hours=1))
+
+    next_week = _MONDAY + timedelta(weeks=4, hours=7)
+    baseline.update(counter, next_week - timedelta(seconds=30))
+    baseline.update(counter + 20, next_week)
+    baseline.update(counter + 30, next_week + timedelta(seconds=30))
+    assert baseline.percentile() < 50
+    assert baseline.anomaly_score() == 0
+    baseline.update(counter + 400, next_week + timedelta(seconds=60))
+    assert baseline.percentile() > 90
+    assert baseline.anomaly_score() > 10
+
+
+def test_gaps_and_counter_resets():
+    """Test that hours with gaps are not learned and a restarting counter counts."""
+    baseline = UsageBaseline()
+    baseline.update(0, _MONDAY)
+    # Polling stopped for 10 minutes
+    baseline.update(10, _MONDAY + timedelta(minutes=10))
+    assert baseline.used is None
+    assert not baseline.update(20, _MONDAY + timedelta(hours=1))
+
+    baseline.update(500, _MONDAY + timedelta(hours=1, minutes=59, seconds=40))
+    baseline.update(5, _MONDAY + timedelta(hours=2))
+    assert baseline.used == 0
+    baseline.update(8, _MONDAY + timedelta(hours=2, seconds=30))
+    assert baseline.used == 3
@@ -0,0 +1,51 @@
+"""Test that the usage profile learns every half hour of the daily buckets."""
+from datetime import datetime, timedelta
+
+from bwt_api.bwt import BwtModel
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from custom_components.bwt_perla.coordinator import BwtCoordinator
+from custom_components.bwt_perla.polling import PREDICTIVE_INTERVAL_MAX
+from custom_components.bwt_perla.usage_profile import UsageProfile
+
+from .stand_in import stand_in_api
+
+
+@pytest.mark.parametrize("offset", [0, 30, 59])
+async def test_rest_of_the_day_before_midnight(hass: HomeAssistant, offset: int) -> None:
+    """Test that the last buckets of a day are learned before the device starts over."""
+    api = stand_in_api(BwtModel.PERLA_LOCAL_API)
+    coordinator = BwtCoordinator(hass, api, BwtModel.PERLA_LOCAL_API)
+    await coordinator.async_refresh()
+    coordinator._profile = profile = UsageProfile()
+    coordinator._profile_store = Store(hass, 1, "bwt_perla.test.profile")
+    evening = datetime(2026, 3, 2, 22, 50, tzinfo=dt_util.get_default_time_zone())
+    now = [evening]
+    coordinator.now = lambda: now[0]
+    coordinator._profile_cursor = (evening.date(), 45)
+
+    await coordinator._async_learn_profile(coordinator.data)
+    assert coordinator._profile_cursor == (evening.date(), 45)
+
+    # Idling at the predictive ceiling, a refresh close to midnight fetches
+    # the rest of the day, whenever the refreshes fall
+    now[0] = evening.replace(hour=23, minute=50, second=offset)
+    while now[0].date() == evening.date():
+        await coordinator._async_learn_profile(coordinator.data)
+        last_of_the_day = now[0]
+        now[0] += timedelta(seconds=PREDICTIVE_INTERVAL_MAX)
+    assert coordinator._profile_cursor == (evening.date(), 48)
+    assert profile.as_dict()["observations"][profile.slot(last_of_the_day)] == 2
+
+    # After midnight nothing of the previous day is left to fetch
+    requests = api.requests
+    await coordinator._async_learn_profile(coordinator.data)
+    assert api.requests == requests
+    now[0] += timedelta(minutes=30)
+    await coordinator._async_learn_profile(coordinator.data)
+    assert coordinator._profile_cursor == (now[0].date(), 1)
+    await coordinator.async_shutdown()
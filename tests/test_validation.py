@@ -0,0 +1,166 @@
+"""Test that implausible samples are rejected before the entities see them."""
+from bwt_api.bwt import BwtModel
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.bwt_perla.coordinator import BwtCoordinator, UpdateLane
+from custom_components.bwt_perla.data import LocalApiData, SilkApiData
+from custom_components.bwt_perla.polling import DevicePoller
+from custom_components.bwt_perla.validation import (
+    REJECT_COUNTER,
+    REJECT_FLOW,
+    REJECT_HARDNESS,
+    REJECT_MALFORMED,
+    InvalidSample,
+    SampleValidator,
+)
+
+from .stand_in import fixture_responses, stand_in_api
+
+_TOTAL_WATER_SERVED = 15
+_CURRENT_FLOW_RATE = 16
+_REGENERATIV_CAPACITY = 30
+
+
+def _silk(registers: dict[int, int] | None = None) -> SilkApiData:
+    """Return the data of the Silk fixture with some registers replaced."""
+    values = list(fixture_responses(BwtModel.PERLA_SILK)("/silk/registers")["params"])
+    for index, value in (registers or {}).items():
+        values[index] = value
+    return SilkApiData(values)
+
+
+def test_counter_going_backwards_until_confirmed():
+    """Test that a decreasing counter is rejected, unless the device insists on it."""
+    validator = SampleValidator()
+    good = _silk()
+    validator.validate(None, good)
+    validator.validate(good, _silk({_TOTAL_WATER_SERVED: 1235}))
+
+    reset = _silk({_TOTAL_WATER_SERVED: 3})
+    for _ in range(2):
+        with pytest.raises(InvalidSample) as err:
+            validator.validate(good, reset)
+        assert err.value.reason == REJECT_COUNTER
+        assert not err.value.persistent
+    # The third time it is a reset of the device
+    validator.validate(good, reset)
+    assert validator.rejected == {REJECT_COUNTER: 2}
+
+
+def test_persistent_out_of_range_value_stays_accepted():
+    """Test that a confirmed out of range value isn't rejected again while it lasts."""
+    validator = SampleValidator()
+    good = _silk()
+    high_flow = _silk({_CURRENT_FLOW_RATE: 1000})
+    for _ in range(2):
+        with pytest.raises(InvalidSample):
+            validator.validate(good, high_flow)
+    for _ in range(5):
+        validator.validate(good, high_flow)
+    assert validator.rejected == {REJECT_FLOW: 2}
+
+    # Once the value was plausible again, it takes new confirmations
+    validator.validate(good, good)
+    with pytest.raises(InvalidSample):
+        validator.validate(good, high_flow)
+
+
+def test_glitches_between_good_samples():
+    """Test that single implausible samples are rejected and counted by reason."""
+    validator = SampleValidator()
+    good = _silk()
+    for glitch, reason in (
+        (_silk({_CURRENT_FLOW_RATE: 1000}), REJECT_FLOW),
+        (_silk({_TOTAL_WATER_SERVED: 0}), REJECT_COUNTER),
+        (_silk({_CURRENT_FLOW_RATE: -1}), REJECT_FLOW),
+    ):
+        with pytest.raises(InvalidSample) as err:
+            validator.validate(good, glitch)
+        assert err.value.reason == reason
+        validator.validate(good, good)
+    assert validator.rejected_count == 3
+    assert validator.rejected == {REJECT_FLOW: 2, REJECT_COUNTER: 1}
+
+
+def test_malformed_sample_is_never_accepted():
+    """Test that an unreadable sample becomes persistent instead of accepted."""
+    validator = SampleValidator()
+    truncated = SilkApiData([0] * 10)
+    for attempt in range(4):
+        with pytest.raises(InvalidSample) as err:
+            validator.validate(None, truncated)
+        assert err.value.reason == REJECT_MALFORMED
+        assert err.value.persistent == (attempt >= 2)
+
+
+def test_value_the_device_doesnt_give():
+    """Test that a value which can't be computed skips its check instead of the sample."""
+    validator = SampleValidator()
+    # A Silk without a salt capacity has no salt level
+    no_salt = _silk({_REGENERATIV_CAPACITY: 0})
+    for _ in range(4):
+        validator.validate(no_salt, no_salt)
+    with pytest.raises(InvalidSample) as err:
+        validator.validate(no_salt, _silk({_REGENERATIV_CAPACITY: 0, _CURRENT_FLOW_RATE: 1000}))
+    assert err.value.reason == REJECT_FLOW
+
+
+async def test_hardness_without_softening():
+    """Test that the capacity is unknown without softening and a harder output is rejected."""
+    responses = fixture_responses(BwtModel.PERLA_LOCAL_API)
+
+    def respond(path: str):
+        response = dict(responses(path))
+        if path.endswith("GetCurrentData"):
+            response["HardnessOUT_dH"] = hardness_out
+        return response
+
+    poller = DevicePoller(stand_in_api(BwtModel.PERLA_LOCAL_API, respond), BwtModel.PERLA_LOCAL_API)
+    hardness_out = 11
+    data: LocalApiData = await poller.poll(None, True, 0)
+    assert data.capacity_1() is None
+    assert data.capacity_2() is None
+
+    hardness_out = 12
+    with pytest.raises(InvalidSample) as err:
+        await poller.poll(data, True, 1)
+    assert err.value.reason == REJECT_HARDNESS
+
+
+async def test_coordinator_holds_the_last_good_sample(hass: HomeAssistant):
+    """Test that the coordinator keeps its data on a glitch and fails on persistent garbage."""
+    registers = fixture_responses(BwtModel.PERLA_SILK)("/silk/registers")["params"]
+
+    def respond(path: str):
+        return {"params": registers}
+
+    coordinator = BwtCoordinator(
+        hass, stand_in_api(BwtModel.PERLA_SILK, respond), BwtModel.PERLA_SILK
+    )
+    await coordinator.async_refresh()
+    good = coordinator.data
+    assert coordinator.last_update_success
+
+    slow_lane = []
+    coordinator.async_add_listener(lambda: slow_lane.append(coordinator.data), UpdateLane.SLOW)
+    registers = list(registers)
+    registers[_TOTAL_WATER_SERVED] = 0
+    coordinator._slow_lane_updated = None
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.data is good
+    # The slow lane waits for a sample that was polled in full and kept
+    assert not slow_lane
+    assert coordinator._slow_lane_updated is None
+    assert coordinator.poller.validator.rejected == {REJECT_COUNTER: 1}
+
+    registers = registers[:10]
+    for _ in range(2):
+        await coordinator.async_refresh()
+        assert coordinator.data is good
+        assert coordinator.last_update_success
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    await coordinator.async_shutdown()
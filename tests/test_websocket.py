@@ -0,0 +1,57 @@
+"""Test the live flow WebSocket subscription."""
+from datetime import timedelta
+
+from bwt_api.bwt import BwtModel
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from custom_components.bwt_perla import websocket
+from custom_components.bwt_perla.const import DOMAIN
+from custom_components.bwt_perla.coordinator import BwtCoordinator
+
+from .stand_in import idle_api
+
+
+async def test_subscribe_flow(hass: HomeAssistant, hass_ws_client) -> None:
+    """Test that samples are streamed and polling is faster while subscribed."""
+    api = idle_api()
+    coordinator = BwtCoordinator(hass, api, BwtModel.PERLA_LOCAL_API)
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=30)
+    hass.data[DOMAIN] = {"live": coordinator}
+    assert await async_setup_component(hass, "websocket_api", {})
+    websocket.async_setup(hass)
+    client = await hass_ws_client(hass)
+
+    await client.send_json({"id": 1, "type": f"{DOMAIN}/subscribe_flow", "entry_id": "live", "interval": 2})
+    assert (await client.receive_json())["success"]
+    sample = (await client.receive_json())["event"]
+    assert sample["available"]
+    assert (sample["flow"], sample["state"]) == (0, "OK")
+
+    # The faster interval refreshes right away
+    await hass.async_block_till_done()
+    assert (await client.receive_json())["event"]["flow"] == 0
+    assert coordinator.update_interval == timedelta(seconds=2)
+    requests = api.requests
+    await coordinator.async_refresh()
+    assert (await client.receive_json())["event"]["flow"] == 0
+    assert api.requests == requests + 1
+
+    await client.send_json({"id": 2, "type": "unsubscribe_events", "subscription": 1})
+    assert (await client.receive_json())["success"]
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=4)
+    await coordinator.async_shutdown()
+
+
+async def test_subscribe_unknown_entry(hass: HomeAssistant, hass_ws_client) -> None:
+    """Test that an entry that is not loaded is an error."""
+    assert await async_setup_component(hass, "websocket_api", {})
+    websocket.async_setup(hass)
+    client = await hass_ws_client(hass)
+
+    await client.send_json({"id": 1, "type": f"{DOMAIN}/subscribe_flow", "entry_id": "missing"})
+    response = await client.receive_json()
+    assert response["error"]["code"] == "not_found"